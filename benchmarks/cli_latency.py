@@ -0,0 +1,346 @@
+"""
+Latency of the journal-manager subcommands.
+
+For each register size, a synthetic configuration folder is created and
+each subcommand is timed in two ways:
+
+    - api: The API function of the subcommand is called in this process.
+      Cold calls parse the register again (the api cache is invalidated),
+      warm calls reuse the parsed register.
+    - jm: The `jm` entry point is executed in a subprocess. Cold runs
+      start with an empty bytecode cache, warm runs reuse it. A
+      `-X importtime` breakdown of a warm run is recorded as well.
+
+The build subcommand builds a real journal. Its cold calls rebuild it
+(--force), its warm calls are incremental builds.
+
+Example:
+    python benchmarks/cli_latency.py --sizes 10 1000 --output results.json
+"""
+
+from danoan.journal_manager.core import api, model
+from danoan.journal_manager.cli.commands import build
+from danoan.journal_manager.cli.commands.journal_commands import (
+    create,
+    edit,
+    show,
+)
+from danoan.journal_manager.cli.commands.template_commands import (
+    show as template_show,
+)
+
+import common
+
+import argparse
+from contextlib import redirect_stdout
+import io
+import os
+from pathlib import Path
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+BENCHMARK_JOURNAL_NAME = "benchmark-journal"
+DEFAULT_SIZES = [10, 1000, 100000]
+ENTRY_POINT_SCRIPT = (
+    "import sys;"
+    "from danoan.journal_manager.cli.cli import main;"
+    "sys.exit(main())"
+)
+IMPORTTIME_PATTERN = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( +)(\S+)")
+
+
+class Command(NamedTuple):
+    """
+    A subcommand to time.
+
+    The cold variants are used for the cold calls. If None, cold and warm
+    calls are the same.
+    """
+
+    name: str
+    argv: List[str]
+    api_function: Optional[Callable[[], object]] = None
+    cold_argv: Optional[List[str]] = None
+    cold_api_function: Optional[Callable[[], object]] = None
+
+
+# -------------------- Helper Functions --------------------
+
+
+def __get_commands__(build_location: Path) -> List[Command]:
+    def build_journal(force_rebuild: bool):
+        return build.build(
+            model.BuildInstructions(
+                build_location=build_location.as_posix(),
+                journals_names_to_build=[BENCHMARK_JOURNAL_NAME],
+                force_rebuild=force_rebuild,
+            )
+        )
+
+    build_argv = [
+        "build",
+        "--jn",
+        BENCHMARK_JOURNAL_NAME,
+        "--build-location",
+        build_location.as_posix(),
+        "--ignore-safety-questions",
+    ]
+    return [
+        Command("help", ["--help"]),
+        Command(
+            "journal show",
+            ["journal", "show", BENCHMARK_JOURNAL_NAME],
+            lambda: list(show.show(BENCHMARK_JOURNAL_NAME, [])),
+        ),
+        Command(
+            "journal edit",
+            ["journal", "edit", BENCHMARK_JOURNAL_NAME],
+            lambda: edit.edit(BENCHMARK_JOURNAL_NAME),
+        ),
+        Command(
+            "template show",
+            ["template", "show", common.BENCHMARK_TEMPLATE_NAME],
+            lambda: list(
+                template_show.show(common.BENCHMARK_TEMPLATE_NAME, [])
+            ),
+        ),
+        Command(
+            "build --jn",
+            build_argv,
+            lambda: build_journal(False),
+            build_argv + ["--force"],
+            lambda: build_journal(True),
+        ),
+    ]
+
+
+def __time_api_function__(function: Callable[[], object], cold: bool) -> float:
+    if cold:
+        api.invalidate_cache()
+
+    with redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        function()
+        return time.perf_counter() - start
+
+
+def __run_entry_point__(
+    argv: List[str], pycache_prefix: Path, importtime: bool = False
+) -> subprocess.CompletedProcess:
+    command = [sys.executable, "-X", f"pycache_prefix={pycache_prefix}"]
+    if importtime:
+        command.extend(["-X", "importtime"])
+    command.extend(["-c", ENTRY_POINT_SCRIPT, *argv])
+
+    # Bytecode must be written for the warm runs to reuse it.
+    env = os.environ.copy()
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+
+    completed = subprocess.run(
+        command,
+        capture_output=True,
+        text=True,
+        stdin=subprocess.DEVNULL,
+        env=env,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"jm {' '.join(argv)} failed:\n{completed.stderr}")
+    return completed
+
+
+def __time_entry_point__(argv: List[str], pycache_prefix: Path) -> float:
+    start = time.perf_counter()
+    __run_entry_point__(argv, pycache_prefix)
+    return time.perf_counter() - start
+
+
+def __parse_importtime__(stderr: str, top: int) -> Dict:
+    """
+    Return the total import time and the modules that took the longest.
+
+    Times are given in microseconds, as reported by `-X importtime`.
+    """
+    modules = []
+    total_us = 0
+    for match in IMPORTTIME_PATTERN.finditer(stderr):
+        self_us, cumulative_us = int(match.group(1)), int(match.group(2))
+        # Top level imports are indented by a single space.
+        if len(match.group(3)) == 1:
+            total_us += cumulative_us
+        modules.append(
+            {
+                "module": match.group(4),
+                "self_us": self_us,
+                "cumulative_us": cumulative_us,
+            }
+        )
+
+    modules.sort(key=lambda x: x["cumulative_us"], reverse=True)
+    return {
+        "total_us": total_us,
+        "number_of_modules": len(modules),
+        "top": modules[:top],
+    }
+
+
+def __benchmark_size__(
+    size: int,
+    repeat: int,
+    importtime_top: int,
+    journal_data_backend: str,
+) -> List[Dict]:
+    results = []
+    with tempfile.TemporaryDirectory() as benchmark_folder:
+        benchmark_folder = Path(benchmark_folder)
+        common.create_configuration_folder(
+            benchmark_folder,
+            common.create_synthetic_journals(
+                size - 1, benchmark_folder.joinpath("journals")
+            ),
+            journal_data_backend,
+        )
+        # The only journal that exists on disk is the last registered one.
+        with redirect_stdout(io.StringIO()):
+            create.create(
+                BENCHMARK_JOURNAL_NAME, benchmark_folder.joinpath("journals")
+            )
+
+        warm_pycache_prefix = benchmark_folder.joinpath("pycache")
+        for command in __get_commands__(benchmark_folder.joinpath("build")):
+            print(f"[{size}] {command.name}", file=sys.stderr)
+
+            if command.api_function is not None:
+                cold_api_function = (
+                    command.cold_api_function or command.api_function
+                )
+                command.api_function()
+                results.append(
+                    {
+                        "benchmark": "cli_latency",
+                        "name": f"api/{command.name}",
+                        "size": size,
+                        "cold": common.summarize(
+                            [
+                                __time_api_function__(cold_api_function, True)
+                                for _ in range(repeat)
+                            ]
+                        ),
+                        "warm": common.summarize(
+                            [
+                                __time_api_function__(
+                                    command.api_function, False
+                                )
+                                for _ in range(repeat)
+                            ]
+                        ),
+                    }
+                )
+
+            cold_timings = [
+                __time_entry_point__(
+                    command.cold_argv or command.argv,
+                    Path(tempfile.mkdtemp(dir=benchmark_folder)),
+                )
+                for _ in range(repeat)
+            ]
+            __run_entry_point__(command.argv, warm_pycache_prefix)
+            warm_timings = [
+                __time_entry_point__(command.argv, warm_pycache_prefix)
+                for _ in range(repeat)
+            ]
+            completed = __run_entry_point__(
+                command.argv, warm_pycache_prefix, importtime=True
+            )
+            results.append(
+                {
+                    "benchmark": "cli_latency",
+                    "name": f"jm/{command.name}",
+                    "size": size,
+                    "cold": common.summarize(cold_timings),
+                    "warm": common.summarize(warm_timings),
+                    "importtime": __parse_importtime__(
+                        completed.stderr, importtime_top
+                    ),
+                }
+            )
+    return results
+
+
+def __print_results__(results: List[Dict]):
+    print(f"{'benchmark':<24} {'size':>8} {'cold (ms)':>10} {'warm (ms)':>10}")
+    for result in results:
+        print(
+            f"{result['name']:<24} {result['size']:>8} "
+            f"{result['cold']['median'] * 1000:>10.1f} "
+            f"{result['warm']['median'] * 1000:>10.1f}"
+        )
+
+
+# -------------------- CLI --------------------
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=DEFAULT_SIZES,
+        help="Number of registered journals.",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=5,
+        help="Number of timed calls per measurement.",
+    )
+    parser.add_argument(
+        "--importtime-top",
+        type=int,
+        default=20,
+        help="Number of modules recorded in the import time breakdown.",
+    )
+    parser.add_argument(
+        "--journal-data-backend",
+        default="toml",
+        help="Storage backend of the synthetic registers.",
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=Path("benchmarks", "results", "cli_latency.json"),
+        help="Json file where results are written.",
+    )
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        results.extend(
+            __benchmark_size__(
+                size,
+                args.repeat,
+                args.importtime_top,
+                args.journal_data_backend,
+            )
+        )
+
+    common.write_results(
+        args.output,
+        common.get_metadata(
+            repeat=args.repeat,
+            journal_data_backend=args.journal_data_backend,
+        ),
+        results,
+    )
+    __print_results__(results)
+
+
+if __name__ == "__main__":
+    main()
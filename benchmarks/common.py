@@ -0,0 +1,157 @@
+"""
+Helpers shared by the journal-manager benchmarks.
+"""
+
+from danoan.journal_manager.core import api, model
+
+from datetime import datetime
+import importlib.metadata
+import json
+import os
+import platform
+import statistics
+import subprocess
+from pathlib import Path
+import sys
+from typing import Any, Dict, List, Optional
+
+BENCHMARK_TEMPLATE_NAME = "benchmark-template"
+
+# -------------------- Helper Functions --------------------
+
+
+def __get_git_revision__() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# -------------------- API --------------------
+
+
+def create_synthetic_journals(
+    number_of_journals: int, journals_folder: Path
+) -> List[model.JournalData]:
+    """
+    Return journal entries that only exist in the register.
+    """
+    return [
+        model.JournalData(
+            f"journal-{i}",
+            journals_folder.joinpath(f"journal-{i}").as_posix(),
+            i % 3 != 0,
+            f"Journal {i}",
+            datetime(2024, 1, 1).isoformat(),
+        )
+        for i in range(number_of_journals)
+    ]
+
+
+def create_configuration_folder(
+    benchmark_folder: Path,
+    list_of_journal_data: List[model.JournalData],
+    journal_data_backend: str = "toml",
+) -> Path:
+    """
+    Create a journal-manager configuration folder for a benchmark.
+
+    The JOURNAL_MANAGER_CONFIG_FOLDER environment variable is set to the
+    created folder. A template named BENCHMARK_TEMPLATE_NAME is registered
+    and the journals are written to the register with the given backend.
+
+    Args:
+        benchmark_folder: Empty folder where configuration, journals and templates are created.
+        list_of_journal_data: Journals of the register.
+        journal_data_backend (optional): Storage backend of the register.
+    Returns:
+        The configuration folder.
+    """
+    config_folder = benchmark_folder.joinpath("config")
+    os.environ[api.ENV_JOURNAL_MANAGER_CONFIG_FOLDER] = config_folder.as_posix()
+    api.invalidate_cache()
+
+    api.create_configuration_file(
+        benchmark_folder.joinpath("journals"),
+        benchmark_folder.joinpath("templates"),
+    )
+
+    config_file = api.get_configuration_file()
+    config_file.journal_data_backend = journal_data_backend
+    config_file.parameters.default_text_editor_path = "true"
+    if journal_data_backend != "toml":
+        config_file.journal_data_filepath = config_folder.joinpath(
+            f"journal_data.{journal_data_backend}"
+        ).as_posix()
+    api.write_configuration_file(config_file)
+
+    template_folder = benchmark_folder.joinpath(
+        "templates", BENCHMARK_TEMPLATE_NAME
+    )
+    template_folder.mkdir()
+    template_folder.joinpath("mkdocs.tpl.yml").write_text(
+        "site_name: {{ journal.title }}\n"
+    )
+    api.write_template_list_file(
+        model.JournalTemplateList(
+            [
+                model.JournalTemplate(
+                    BENCHMARK_TEMPLATE_NAME, template_folder.as_posix()
+                )
+            ]
+        )
+    )
+
+    api.write_journal_data_file(model.JournalDataList(list_of_journal_data))
+    return config_folder
+
+
+def summarize(timings: List[float]) -> Dict[str, float]:
+    """
+    Return the minimum, median, mean and maximum of a list of timings.
+    """
+    return {
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "mean": statistics.mean(timings),
+        "max": max(timings),
+        "samples": len(timings),
+    }
+
+
+def get_metadata(**kwargs) -> Dict[str, Any]:
+    """
+    Return the description of the environment a benchmark was run on.
+
+    Keyword arguments are added to the metadata, e.g. benchmark parameters.
+    """
+    return {
+        "journal_manager_version": importlib.metadata.version(
+            "journal-manager"
+        ),
+        "git_revision": __get_git_revision__(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "date": datetime.now().isoformat(timespec="seconds"),
+        **kwargs,
+    }
+
+
+def write_results(
+    output_filepath: Path, metadata: Dict[str, Any], results: List[Dict]
+):
+    """
+    Write benchmark results to a json file.
+
+    Each result is identified by its `benchmark`, `name` and `size` keys.
+    Results of two versions can be compared with `compare.py`.
+    """
+    output_filepath.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_filepath, "w") as f:
+        json.dump({"metadata": metadata, "results": results}, f, indent=2)
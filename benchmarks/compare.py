@@ -0,0 +1,144 @@
+"""
+Compare two benchmark result files.
+
+Results are matched by benchmark, name and size. For each matched result,
+the median timings and peak memory (or the metrics given with --metric) of
+both files are printed with their ratio. The exit status is 1 if a ratio is
+above the threshold.
+
+Example:
+    python benchmarks/compare.py baseline.json results.json --threshold 1.2
+"""
+
+import argparse
+import json
+from pathlib import Path
+import sys
+from typing import Dict, List, Tuple
+
+DEFAULT_METRICS = ["median", "peak_bytes"]
+
+# -------------------- Helper Functions --------------------
+
+
+def __flatten__(value, prefix: str = "") -> Dict[str, float]:
+    if isinstance(value, dict):
+        flattened = {}
+        for key, entry in value.items():
+            flattened.update(__flatten__(entry, f"{prefix}{key}."))
+        return flattened
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        return {prefix[:-1]: value}
+    return {}
+
+
+def __read_results__(filepath: Path) -> Dict[Tuple, Dict[str, float]]:
+    with open(filepath) as f:
+        results = json.load(f)["results"]
+
+    return {
+        (x["benchmark"], x["name"], x["size"]): __flatten__(
+            {
+                k: v
+                for k, v in x.items()
+                if k not in ["benchmark", "name", "size"]
+            }
+        )
+        for x in results
+    }
+
+
+# -------------------- API --------------------
+
+
+def compare(
+    baseline_filepath: Path,
+    results_filepath: Path,
+    metrics: List[str] = DEFAULT_METRICS,
+) -> List[Dict]:
+    """
+    Return the ratio between the metrics of two benchmark result files.
+
+    Args:
+        baseline_filepath: Results of the reference version.
+        results_filepath: Results of the version being evaluated.
+        metrics (optional): Names of the metrics to compare, e.g. `median`
+                            matches `cold.median` and `warm.median`.
+    Returns:
+        A list of dictionaries with keys benchmark, name, size, metric,
+        baseline, value and ratio.
+    """
+    baseline = __read_results__(baseline_filepath)
+    results = __read_results__(results_filepath)
+
+    comparisons = []
+    for key in sorted(baseline.keys() & results.keys(), key=str):
+        for metric, baseline_value in baseline[key].items():
+            if metric.split(".")[-1] not in metrics:
+                continue
+            if metric not in results[key]:
+                continue
+
+            value = results[key][metric]
+            comparisons.append(
+                {
+                    "benchmark": key[0],
+                    "name": key[1],
+                    "size": key[2],
+                    "metric": metric,
+                    "baseline": baseline_value,
+                    "value": value,
+                    "ratio": (
+                        value / baseline_value if baseline_value else None
+                    ),
+                }
+            )
+    return comparisons
+
+
+# -------------------- CLI --------------------
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("baseline", type=Path)
+    parser.add_argument("results", type=Path)
+    parser.add_argument(
+        "--metric",
+        dest="metrics",
+        action="append",
+        help="Metric to compare. It can be given several times. Default: median and peak_bytes.",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.1,
+        help="Ratios above this value are reported as regressions.",
+    )
+    args = parser.parse_args()
+
+    regressions = 0
+    for entry in compare(
+        args.baseline, args.results, args.metrics or DEFAULT_METRICS
+    ):
+        ratio = entry["ratio"]
+        flag = ""
+        if ratio is not None and ratio > args.threshold:
+            flag = " REGRESSION"
+            regressions += 1
+
+        ratio_text = "-" if ratio is None else f"{ratio:.2f}x"
+        print(
+            f"{entry['name']:<32} {entry['size']:>8} {entry['metric']:<16} "
+            f"{entry['baseline']:>12.6g} {entry['value']:>12.6g} "
+            f"{ratio_text:>8}{flag}"
+        )
+
+    sys.exit(1 if regressions > 0 else 0)
+
+
+if __name__ == "__main__":
+    main()
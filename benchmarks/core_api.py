@@ -0,0 +1,247 @@
+"""
+Microbenchmarks of the core api queries and register round-trips.
+
+For each register size, realistic journal and template registers are
+generated (see registry.py) and the following functions are measured:
+
+    - api.find_journal_by_name: hit in the middle, hit at the end, miss.
+    - api.find_journal: AND and OR queries, with and without an indexed
+      attribute (name, location).
+    - api.find_template_by_name: hit at the end, miss.
+    - JournalDataList read and write for each register backend.
+
+Timings are taken with timeit (seconds per call). Memory is measured with
+tracemalloc over a single call: peak is the largest amount allocated
+during the call, retained is what is still allocated after it.
+
+Example:
+    python benchmarks/core_api.py --sizes 10 1000 --output results.json
+"""
+
+from danoan.journal_manager.core import api, backends, model
+
+import common
+import registry
+
+import argparse
+from pathlib import Path
+import sys
+import tempfile
+import timeit
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+DEFAULT_SIZES = [10, 1000, 10000, 100000]
+
+# -------------------- Helper Functions --------------------
+
+
+def __query__(**kwargs) -> model.JournalData:
+    """
+    Return a JournalData whose attributes not given are None.
+    """
+    attributes = {
+        "name": None,
+        "location_folder": None,
+        "active": None,
+        "title": None,
+        "last_edit_date": None,
+    }
+    attributes.update(kwargs)
+    return model.JournalData(**attributes)
+
+
+def __get_benchmarks__(
+    size: int, benchmark_folder: Path
+) -> List[Tuple[str, Callable[[], object]]]:
+    journal_data_file = registry.generate_journal_data_list(size)
+    template_list_file = registry.generate_template_list(size)
+
+    journals = journal_data_file.list_of_journal_data
+    middle_journal = journals[len(journals) // 2]
+    last_journal = journals[-1]
+    last_template = template_list_file.list_of_template_data[-1]
+
+    AND = model.LogicOperator.AND
+    OR = model.LogicOperator.OR
+    benchmarks = [
+        (
+            "find_journal_by_name[middle]",
+            lambda: api.find_journal_by_name(
+                journal_data_file, middle_journal.name
+            ),
+        ),
+        (
+            "find_journal_by_name[last]",
+            lambda: api.find_journal_by_name(
+                journal_data_file, last_journal.name
+            ),
+        ),
+        (
+            "find_journal_by_name[miss]",
+            lambda: api.find_journal_by_name(journal_data_file, "missing"),
+        ),
+        (
+            "find_journal[AND name]",
+            lambda: api.find_journal(
+                journal_data_file,
+                __query__(name=last_journal.name, active=last_journal.active),
+                AND,
+            ),
+        ),
+        (
+            "find_journal[AND location]",
+            lambda: api.find_journal(
+                journal_data_file,
+                __query__(location_folder=last_journal.location_folder),
+                AND,
+            ),
+        ),
+        (
+            "find_journal[AND active title]",
+            lambda: api.find_journal(
+                journal_data_file,
+                __query__(active=True, title=last_journal.title),
+                AND,
+            ),
+        ),
+        (
+            "find_journal[OR name title]",
+            lambda: api.find_journal(
+                journal_data_file,
+                __query__(name=last_journal.name, title=middle_journal.title),
+                OR,
+            ),
+        ),
+        (
+            "find_journal[OR active]",
+            lambda: api.find_journal(
+                journal_data_file, __query__(active=False), OR
+            ),
+        ),
+        (
+            "find_template_by_name[last]",
+            lambda: api.find_template_by_name(
+                template_list_file, last_template.name
+            ),
+        ),
+        (
+            "find_template_by_name[miss]",
+            lambda: api.find_template_by_name(template_list_file, "missing"),
+        ),
+    ]
+
+    for backend_name in backends.list_backends():
+        backend = backends.get_backend(
+            backend_name,
+            benchmark_folder.joinpath(f"journal_data.{backend_name}"),
+        )
+        backend.write(journal_data_file)
+        benchmarks.extend(
+            [
+                (f"JournalDataList.read[{backend_name}]", backend.read),
+                (
+                    f"JournalDataList.write[{backend_name}]",
+                    # Bind the current backend, not the last one of the loop.
+                    lambda backend=backend: backend.write(journal_data_file),
+                ),
+            ]
+        )
+
+    return benchmarks
+
+
+def __measure_time__(function: Callable[[], object], repeat: int) -> Dict:
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    return common.summarize(
+        [x / number for x in timer.repeat(repeat=repeat, number=number)]
+    )
+
+
+def __measure_memory__(function: Callable[[], object]) -> Dict[str, int]:
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        result = function()
+        after, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    del result
+    return {
+        "peak_bytes": peak - before,
+        "retained_bytes": after - before,
+    }
+
+
+def __benchmark_size__(size: int, repeat: int) -> List[Dict]:
+    results = []
+    with tempfile.TemporaryDirectory() as benchmark_folder:
+        for name, function in __get_benchmarks__(size, Path(benchmark_folder)):
+            print(f"[{size}] {name}", file=sys.stderr)
+            results.append(
+                {
+                    "benchmark": "core_api",
+                    "name": name,
+                    "size": size,
+                    "time": __measure_time__(function, repeat),
+                    "memory": __measure_memory__(function),
+                }
+            )
+    return results
+
+
+def __print_results__(results: List[Dict]):
+    print(
+        f"{'benchmark':<36} {'size':>8} {'median (us)':>14} {'peak (KiB)':>12}"
+    )
+    for result in results:
+        print(
+            f"{result['name']:<36} {result['size']:>8} "
+            f"{result['time']['median'] * 1e6:>14.1f} "
+            f"{result['memory']['peak_bytes'] / 1024:>12.1f}"
+        )
+
+
+# -------------------- CLI --------------------
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=DEFAULT_SIZES,
+        help="Number of registered journals and templates.",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=5,
+        help="Number of timeit repetitions per measurement.",
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=Path("benchmarks", "results", "core_api.json"),
+        help="Json file where results are written.",
+    )
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        results.extend(__benchmark_size__(size, args.repeat))
+
+    common.write_results(
+        args.output, common.get_metadata(repeat=args.repeat), results
+    )
+    __print_results__(results)
+
+
+if __name__ == "__main__":
+    main()
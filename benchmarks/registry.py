@@ -0,0 +1,167 @@
+"""
+Generator of realistic journal and template registers.
+
+Journals have unicode titles, long and nested location folders (with
+spaces, unicode and home-relative paths) and a mix of active and inactive
+entries. Generation is deterministic for a given seed.
+
+Example:
+    python benchmarks/registry.py 10000 journal_data.toml --seed 7
+"""
+
+from danoan.journal_manager.core import model
+from danoan.journal_manager.cli import utils
+
+import argparse
+from datetime import datetime, timedelta
+from pathlib import Path
+import random
+
+TITLE_WORDS = [
+    "notes",
+    "journal",
+    "Réflexions",
+    "Mathématiques",
+    "Физика",
+    "数学",
+    "ノート",
+    "Ἀρχαῖα",
+    "química",
+    "Straße",
+    "🚀 projects",
+    "Lógica",
+    "Dünya",
+    "עברית",
+    "العربية",
+    "machine learning",
+    "reading list",
+    "week",
+    "ideas",
+    "Ökonomie",
+]
+FOLDER_WORDS = [
+    "Documents",
+    "Notebooks",
+    "Área de trabalho",
+    "Projets personnels",
+    "研究",
+    "archive",
+    "2019",
+    "2024",
+    "drafts",
+    "Universität",
+    "курсы",
+    "shared with team",
+]
+HOME_FOLDERS = ["~", "/home/journal-manager-user", "/mnt/data/users/jm"]
+FIRST_EDIT_DATE = datetime(2015, 1, 1)
+
+# -------------------- API --------------------
+
+
+def generate_journal_data_list(
+    number_of_journals: int, active_ratio: float = 0.7, seed: int = 0
+) -> model.JournalDataList:
+    """
+    Return a register of journals that only exist in the register.
+
+    Names are derived from the titles like `jm journal create` does and a
+    suffix keeps them unique.
+
+    Args:
+        number_of_journals: Number of journals in the register.
+        active_ratio (optional): Probability of a journal being active.
+        seed (optional): Seed of the random generator.
+    """
+    generator = random.Random(seed)
+
+    list_of_journal_data = []
+    for i in range(number_of_journals):
+        title = " ".join(
+            generator.choice(TITLE_WORDS)
+            for _ in range(generator.randint(1, 5))
+        ).capitalize()
+        name = f"{utils.journal_name_from_title(title)}-{i}"
+
+        location_folder = Path(
+            generator.choice(HOME_FOLDERS),
+            *generator.choices(FOLDER_WORDS, k=generator.randint(2, 8)),
+            name,
+        ).as_posix()
+        if generator.random() < 0.1:
+            location_folder += "/"
+
+        last_edit_date = FIRST_EDIT_DATE + timedelta(
+            seconds=generator.randint(0, 10 * 365 * 24 * 3600)
+        )
+        list_of_journal_data.append(
+            model.JournalData(
+                name,
+                location_folder,
+                generator.random() < active_ratio,
+                title,
+                last_edit_date.isoformat(),
+            )
+        )
+
+    return model.JournalDataList(list_of_journal_data)
+
+
+def generate_template_list(
+    number_of_templates: int, seed: int = 0
+) -> model.JournalTemplateList:
+    """
+    Return a register of templates that only exist in the register.
+
+    Args:
+        number_of_templates: Number of templates in the register.
+        seed (optional): Seed of the random generator.
+    """
+    generator = random.Random(seed)
+
+    list_of_template_data = []
+    for i in range(number_of_templates):
+        name = f"{utils.journal_name_from_title(generator.choice(TITLE_WORDS))}-template-{i}"
+        filepath = Path(
+            generator.choice(HOME_FOLDERS),
+            ".config",
+            "journal-manager",
+            "templates",
+            *generator.choices(FOLDER_WORDS, k=generator.randint(0, 3)),
+            name,
+        ).as_posix()
+        list_of_template_data.append(model.JournalTemplate(name, filepath))
+
+    return model.JournalTemplateList(list_of_template_data)
+
+
+# -------------------- CLI --------------------
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("number_of_journals", type=int)
+    parser.add_argument(
+        "output", type=Path, help="Toml file where the register is written."
+    )
+    parser.add_argument(
+        "--active-ratio",
+        type=float,
+        default=0.7,
+        help="Probability of a journal being active.",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    journal_data_file = generate_journal_data_list(
+        args.number_of_journals, args.active_ratio, args.seed
+    )
+    with open(args.output, "w") as f:
+        journal_data_file.write(f)
+
+
+if __name__ == "__main__":
+    main()
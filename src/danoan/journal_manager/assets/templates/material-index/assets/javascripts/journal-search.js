@@ -0,0 +1,105 @@
+// Search across all journals using the merged search index written by the
+// BuildSearchIndex build step. The shards are fetched the first time the
+// search input is used.
+(function () {
+    const MAX_RESULTS = 20;
+    const SNIPPET_LENGTH = 160;
+
+    let documents = null;
+
+    function load_documents() {
+        if (documents === null) {
+            documents = fetch("_search/manifest.json")
+                .then((response) => response.json())
+                .then((manifest) =>
+                    Promise.all(
+                        manifest.shards.map((shard) =>
+                            fetch(`_search/${shard.url}`).then((response) =>
+                                response.json()
+                            )
+                        )
+                    )
+                )
+                .then((shards) =>
+                    shards.flatMap((shard) =>
+                        shard.docs.map((doc) => ({
+                            journal: shard.title,
+                            location: doc.location,
+                            title: doc.title,
+                            text: doc.text,
+                            search_title: doc.title.toLowerCase(),
+                            search_text: doc.text.toLowerCase(),
+                        }))
+                    )
+                );
+        }
+        return documents;
+    }
+
+    function count_occurrences(text, term) {
+        let count = 0;
+        let position = text.indexOf(term);
+        while (position !== -1) {
+            count += 1;
+            position = text.indexOf(term, position + term.length);
+        }
+        return count;
+    }
+
+    function search(docs, query) {
+        const terms = query.toLowerCase().split(/[\s\-]+/).filter((x) => x.length > 0);
+        if (terms.length === 0) return [];
+
+        const results = [];
+        for (const doc of docs) {
+            let score = 0;
+            for (const term of terms) {
+                const title_count = count_occurrences(doc.search_title, term);
+                const text_count = count_occurrences(doc.search_text, term);
+                if (title_count + text_count === 0) {
+                    score = 0;
+                    break;
+                }
+                score += 10 * title_count + text_count;
+            }
+            if (score > 0) results.push({ doc: doc, score: score, term: terms[0] });
+        }
+        results.sort((a, b) => b.score - a.score);
+        return results.slice(0, MAX_RESULTS);
+    }
+
+    function create_snippet(doc, term) {
+        const position = Math.max(doc.search_text.indexOf(term), 0);
+        const start = Math.max(position - SNIPPET_LENGTH / 2, 0);
+        const snippet = doc.text.substr(start, SNIPPET_LENGTH);
+        return (start > 0 ? "…" : "") + snippet + (start + SNIPPET_LENGTH < doc.text.length ? "…" : "");
+    }
+
+    function render(results_element, results) {
+        results_element.replaceChildren();
+        for (const result of results) {
+            const item = document.createElement("li");
+            const link = document.createElement("a");
+            link.href = result.doc.location;
+            link.textContent = `${result.doc.journal} › ${result.doc.title}`;
+            const snippet = document.createElement("p");
+            snippet.textContent = create_snippet(result.doc, result.term);
+            item.append(link, snippet);
+            results_element.append(item);
+        }
+    }
+
+    document.addEventListener("DOMContentLoaded", () => {
+        const input = document.getElementById("journal-search-input");
+        const results_element = document.getElementById("journal-search-results");
+        if (!input || !results_element) return;
+
+        input.addEventListener("focus", load_documents, { once: true });
+        input.addEventListener("input", () => {
+            const query = input.value;
+            load_documents().then((docs) => {
+                if (input.value === query) render(results_element, search(docs, query));
+            });
+        });
+    });
+})();
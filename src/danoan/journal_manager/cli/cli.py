@@ -2,31 +2,87 @@
 
 import argparse
 import sys
+from typing import List, Optional
 
 from danoan.journal_manager.cli import utils
-from danoan.journal_manager.cli.commands import build, journal, setup, template
 
+COMMANDS_PACKAGE = "danoan.journal_manager.cli.commands"
 
-def get_parser() -> argparse.ArgumentParser:
+# Command modules are imported only when they are dispatched. See
+# utils.register_lazy_commands.
+LAZY_COMMANDS = [
+    utils.LazyCommand(
+        "build",
+        f"{COMMANDS_PACKAGE}.build",
+        "Build html static pages from journals",
+        ("b",),
+    ),
+    utils.LazyCommand(
+        "daemon",
+        f"{COMMANDS_PACKAGE}.daemon",
+        "Start a daemon that keeps mkdocs warm and builds journals on request",
+    ),
+    utils.LazyCommand(
+        "journal",
+        f"{COMMANDS_PACKAGE}.journal",
+        "Collection of commands to edit journals. If no sub-command is given, list the registered journals.",
+        ("j",),
+        is_group=True,
+    ),
+    utils.LazyCommand(
+        "search",
+        f"{COMMANDS_PACKAGE}.search",
+        "Search the markdown files of all journals",
+    ),
+    utils.LazyCommand(
+        "setup",
+        f"{COMMANDS_PACKAGE}.setup",
+        "Configure journal-manager settings. If no sub-command is given, open the configuration file.",
+        ("s",),
+        is_group=True,
+    ),
+    utils.LazyCommand(
+        "template",
+        f"{COMMANDS_PACKAGE}.template",
+        "Collection of commands to manage journal templates. If no subcommand is given, list the registered templates.",
+        ("t",),
+        is_group=True,
+    ),
+    utils.LazyCommand(
+        "watch",
+        f"{COMMANDS_PACKAGE}.watch",
+        "Watch journal folders and rebuild journals whenever their files change",
+        ("w",),
+    ),
+]
+
+
+def get_parser(argv: Optional[List[str]] = None) -> argparse.ArgumentParser:
+    """
+    Return the parser of the jm command.
+
+    Args:
+        argv (optional): Command line arguments. If given, only the modules
+                         of the dispatched commands are imported. Otherwise,
+                         the complete parser is created.
+    """
     parser = argparse.ArgumentParser(
         description="Create, edit and manage your mkdocs journals."
     )
 
-    list_of_commands = [build, journal, setup, template]
-
     subparser_action = parser.add_subparsers(
         title="journal-manager subcommands"
     )
-    for command in list_of_commands:
-        command.get_parser(subparser_action)
+    utils.register_lazy_commands(subparser_action, LAZY_COMMANDS, argv)
 
     return parser
 
 
 def main():
     utils.ensure_configuration_folder_exists()
-    parser = get_parser()
-    args = parser.parse_args()
+    argv = sys.argv[1:]
+    parser = get_parser(argv)
+    args = parser.parse_args(argv)
 
     if "func" in args:
         args.func(**vars(args))
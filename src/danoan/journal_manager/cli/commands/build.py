@@ -1,37 +1,818 @@
-from danoan.journal_manager.core import api, model, exceptions
+from danoan.journal_manager.core import (
+    api,
+    exceptions,
+    file_utils,
+    http_server,
+    jinja_utils,
+    model,
+    profiling,
+)
 
 from danoan.journal_manager.cli import utils
-from danoan.journal_manager.cli.wrappers import (
-    general_proc_call,
-    mkdocs_wrapper,
-    node_wrapper,
-)
+from danoan.journal_manager.cli.wrappers import mkdocs_wrapper, node_wrapper
 
-from danoan.journal_manager.cli.commands.journal_commands.register import (
-    register as register_journal,
+from danoan.journal_manager.cli.commands import search as search_command
+from danoan.journal_manager.cli.commands.journal_commands import (
+    register as register_command,
 )
 
 import multiprocessing
 import argparse
+import dataclasses
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+import contextlib
+import gzip
+import hashlib
+import html
+import json
+from importlib import metadata
 from importlib_resources import files, as_file
 from io import StringIO
-from jinja2 import Environment, PackageLoader
 import logging
+import os
 from pathlib import Path
+import re
 import shutil
 import signal
-from typing import List, Any, Optional, Dict, Tuple
+import sqlite3
+import time
+import uuid
+from typing import Callable, List, Any, Optional, Dict, Set, Tuple, Type
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None  # type: ignore
 
 
 logger = logging.getLogger("danoan.journal_manager")
 
+# Files smaller than this size (in bytes) are not precompressed.
+PRECOMPRESS_MIN_SIZE = 1024
+PRECOMPRESS_EXTENSIONS = [
+    ".css",
+    ".html",
+    ".js",
+    ".json",
+    ".map",
+    ".svg",
+    ".txt",
+    ".xml",
+]
+# File of the precompress cache folder with the digest of each site file.
+PRECOMPRESS_DIGESTS_FILENAME = "digests.json"
+
+# Folder of the site where the search indexes of the journals are merged.
+SEARCH_INDEX_FOLDER_NAME = "_search"
+
 # -------------------- Helper Functions --------------------
 
 
-def __remove_directory_before_copy__(src_dir: Path, dest_dir: Path):
-    if dest_dir.exists():
-        shutil.rmtree(dest_dir)
-    shutil.copytree(src_dir, dest_dir)
+def __get_file_digest__(filepath: Path) -> str:
+    digest = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def __is_same_file_content__(src_file: Path, dest_file: Path) -> bool:
+    """
+    Check if two files have the same content.
+
+    Hardlinks of the same file are detected without reading them. Otherwise,
+    the sizes are compared before the content digests.
+    """
+    if not dest_file.is_file() or dest_file.is_symlink():
+        return False
+
+    src_stat = src_file.stat()
+    dest_stat = dest_file.stat()
+    if (src_stat.st_dev, src_stat.st_ino) == (
+        dest_stat.st_dev,
+        dest_stat.st_ino,
+    ):
+        return True
+    if src_stat.st_size != dest_stat.st_size:
+        return False
+    return __get_file_digest__(src_file) == __get_file_digest__(dest_file)
+
+
+def __sync_directory__(src_dir: Path, dest_dir: Path) -> List[Path]:
+    """
+    Make dest_dir a copy of src_dir touching only the files that differ.
+
+    Files are hardlinked from src_dir when possible and copied otherwise.
+    Each file is replaced atomically. Files and folders of dest_dir that are
+    not in src_dir are removed.
+
+    Returns:
+        The list of updated files in dest_dir.
+    """
+    updated_files: List[Path] = []
+    for root, dirs, filenames in os.walk(src_dir):
+        src_folder = Path(root)
+        dest_folder = dest_dir.joinpath(src_folder.relative_to(src_dir))
+        if dest_folder.is_symlink() or dest_folder.is_file():
+            dest_folder.unlink()
+        dest_folder.mkdir(parents=True, exist_ok=True)
+
+        for filename in filenames:
+            src_file = src_folder.joinpath(filename)
+            dest_file = dest_folder.joinpath(filename)
+            if __is_same_file_content__(src_file, dest_file):
+                continue
+
+            if dest_file.is_dir() and not dest_file.is_symlink():
+                shutil.rmtree(dest_file)
+
+            temp_file = dest_folder.joinpath(f".{filename}.tmp")
+            if temp_file.exists():
+                temp_file.unlink()
+            try:
+                os.link(src_file, temp_file)
+            except OSError:
+                shutil.copy2(src_file, temp_file)
+            os.replace(temp_file, dest_file)
+            updated_files.append(dest_file)
+
+        expected_names = set(dirs).union(filenames)
+        for dest_entry in dest_folder.iterdir():
+            if dest_entry.name in expected_names:
+                continue
+            # Precompressed siblings are kept while their file exists
+            if (
+                dest_entry.suffix in __get_compressors__()
+                and dest_entry.stem in filenames
+            ):
+                continue
+            if dest_entry.is_dir() and not dest_entry.is_symlink():
+                shutil.rmtree(dest_entry)
+            else:
+                dest_entry.unlink()
+
+    return updated_files
+
+
+def __get_compressors__() -> Dict[str, Callable[[bytes], bytes]]:
+    """
+    Return the available compression functions by file suffix.
+
+    Brotli is used only if the brotli package is installed.
+    """
+    compressors: Dict[str, Callable[[bytes], bytes]] = {
+        ".gz": lambda data: gzip.compress(data, compresslevel=9, mtime=0)
+    }
+    if brotli is not None:
+        compressors[".br"] = lambda data: brotli.compress(data)
+    return compressors
+
+
+def __is_compressible__(filepath: Path) -> bool:
+    return (
+        filepath.suffix in PRECOMPRESS_EXTENSIONS
+        and filepath.stat().st_size >= PRECOMPRESS_MIN_SIZE
+    )
+
+
+def __precompress_file__(
+    filepath: Path, cache_folder: Path, digest: Optional[str] = None
+) -> Tuple[bool, str]:
+    """
+    Write the compressed siblings of a file, e.g. main.css.gz.
+
+    Compressed contents are stored in cache_folder by digest of the source
+    file and hardlinked (or copied) next to it, so identical files (e.g. the
+    theme bundles of every journal) are compressed only once. Files whose
+    siblings are newer than them are not compressed again.
+
+    Args:
+        filepath: File to compress.
+        cache_folder: Folder of the compressed contents.
+        digest (optional): Digest of the file computed by a previous run.
+                           If given, up-to-date files are not read.
+    Returns:
+        True if a sibling was written and the digest of the file.
+    """
+    compressors = __get_compressors__()
+    source_mtime = filepath.stat().st_mtime_ns
+    variants = {
+        suffix: filepath.with_name(filepath.name + suffix)
+        for suffix in compressors
+    }
+    if all(
+        x.exists() and x.stat().st_mtime_ns >= source_mtime
+        for x in variants.values()
+    ):
+        if digest is None:
+            digest = hashlib.sha256(filepath.read_bytes()).hexdigest()
+        return False, digest
+
+    data = filepath.read_bytes()
+    digest = hashlib.sha256(data).hexdigest()
+    for suffix, variant in variants.items():
+        cached_filepath = cache_folder.joinpath(f"{digest}{suffix}")
+        if not cached_filepath.exists():
+            temp_cached_filepath = cache_folder.joinpath(
+                f".{digest}{suffix}.{uuid.uuid4().hex}.tmp"
+            )
+            temp_cached_filepath.write_bytes(compressors[suffix](data))
+            os.replace(temp_cached_filepath, cached_filepath)
+
+        temp_filepath = variant.with_name(f".{variant.name}.tmp")
+        if temp_filepath.exists():
+            temp_filepath.unlink()
+        try:
+            os.link(cached_filepath, temp_filepath)
+        except OSError:
+            shutil.copy2(cached_filepath, temp_filepath)
+        # The cached file can be older than the source. The http server
+        # only sends siblings that are newer than their file.
+        os.utime(temp_filepath)
+        os.replace(temp_filepath, variant)
+    return True, digest
+
+
+def __read_precompress_digests__(digests_filepath: Path) -> Dict[str, str]:
+    if not digests_filepath.exists():
+        return {}
+    try:
+        return json.loads(digests_filepath.read_text())
+    except ValueError:
+        return {}
+
+
+def __precompress_directory__(
+    directory: Path, cache_folder: Path, max_workers: Optional[int] = None
+) -> List[Path]:
+    """
+    Precompress the compressible files of a directory and its links.
+
+    Files are compressed by a thread pool. The digest of each file is kept
+    in cache_folder, so the cache entries used by files that were not
+    compressed again are known without reading them. Entries of
+    cache_folder that are not used by any file anymore are removed.
+
+    Returns:
+        The list of files whose compressed siblings were written.
+    """
+    cache_folder.mkdir(parents=True, exist_ok=True)
+    digests_filepath = cache_folder.joinpath(PRECOMPRESS_DIGESTS_FILENAME)
+    previous_digests = __read_precompress_digests__(digests_filepath)
+
+    compressors = __get_compressors__()
+    filepaths = [
+        Path(root).joinpath(filename)
+        for root, _, filenames in os.walk(directory, followlinks=True)
+        for filename in filenames
+        if not filename.startswith(".")
+        and Path(filename).suffix not in compressors
+    ]
+    filepaths = [x for x in filepaths if __is_compressible__(x)]
+    keys = [x.relative_to(directory).as_posix() for x in filepaths]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(
+            executor.map(
+                lambda x: __precompress_file__(
+                    x[0], cache_folder, previous_digests.get(x[1])
+                ),
+                zip(filepaths, keys),
+            )
+        )
+
+    digests = {key: digest for key, (_, digest) in zip(keys, results)}
+    with file_utils.atomic_write(digests_filepath, lock=False) as f:
+        json.dump(digests, f)
+
+    used_entries = {
+        f"{digest}{suffix}"
+        for digest in digests.values()
+        for suffix in compressors
+    }
+    used_entries.add(PRECOMPRESS_DIGESTS_FILENAME)
+    for cached_filepath in cache_folder.iterdir():
+        if cached_filepath.name not in used_entries:
+            cached_filepath.unlink()
+
+    return [x for x, (was_written, _) in zip(filepaths, results) if was_written]
+
+
+def __read_search_manifest__(search_folder: Path) -> Dict[str, Any]:
+    manifest_filepath = search_folder.joinpath("manifest.json")
+    if not manifest_filepath.exists():
+        return {"shards": []}
+    try:
+        return json.loads(manifest_filepath.read_text())
+    except ValueError:
+        return {"shards": []}
+
+
+def __create_search_shard__(
+    journal_name: str, journal_title: str, search_index_filepath: Path
+) -> Dict[str, Any]:
+    """
+    Convert the mkdocs search index of a journal into a shard.
+
+    Document locations are rewritten relative to the journals site folder
+    and html tags are removed from the indexed text.
+    """
+    search_index = json.loads(search_index_filepath.read_text())
+    docs = []
+    for doc in search_index.get("docs", []):
+        text = html.unescape(re.sub(r"<[^>]+>", " ", doc.get("text", "")))
+        docs.append(
+            {
+                "location": f"{journal_name}/{doc.get('location', '')}",
+                "title": html.unescape(doc.get("title", "")),
+                "text": " ".join(text.split()),
+            }
+        )
+    return {"journal": journal_name, "title": journal_title, "docs": docs}
+
+
+def __merge_search_indexes__(
+    journals_site_folder: Path, journals_titles: Dict[str, str]
+) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Merge the search indexes of the journal sites in a sharded index.
+
+    Each journal has a shard in _search/shards, listed by
+    _search/manifest.json. The merged index is not stored in search/ to
+    avoid clashing with a journal named "search". A shard is created again
+    only if the search index of its journal was published again, i.e., if
+    the journal was rebuilt. Shards of journals that are not in the site
+    folder anymore are removed.
+
+    Args:
+        journals_site_folder: Folder where the journal sites are stored.
+        journals_titles: Titles of the journals by name. Journals not listed
+                         keep their previous title.
+    Returns:
+        The manifest and the names of the journals whose shard was replaced.
+    """
+    search_folder = journals_site_folder.joinpath(SEARCH_INDEX_FOLDER_NAME)
+    shards_folder = search_folder.joinpath("shards")
+    shards_folder.mkdir(parents=True, exist_ok=True)
+
+    previous_shards = {
+        x["journal"]: x
+        for x in __read_search_manifest__(search_folder)["shards"]
+    }
+    shards: List[Dict[str, Any]] = []
+    updated_journals: List[str] = []
+    for journal_site_folder in sorted(journals_site_folder.iterdir()):
+        if journal_site_folder.name == SEARCH_INDEX_FOLDER_NAME:
+            continue
+
+        search_index_filepath = journal_site_folder.joinpath(
+            "search", "search_index.json"
+        )
+        if not search_index_filepath.is_file():
+            continue
+
+        journal_name = journal_site_folder.name
+        previous_shard = previous_shards.get(journal_name, {})
+        journal_title = journals_titles.get(
+            journal_name, previous_shard.get("title", journal_name)
+        )
+        search_index_stat = search_index_filepath.stat()
+        source = {
+            "source": os.path.realpath(search_index_filepath),
+            "source_mtime_ns": search_index_stat.st_mtime_ns,
+            "source_size": search_index_stat.st_size,
+        }
+        if (
+            all(previous_shard.get(k) == v for k, v in source.items())
+            and previous_shard.get("title") == journal_title
+            and search_folder.joinpath(previous_shard["url"]).exists()
+        ):
+            shards.append(previous_shard)
+            continue
+
+        content = json.dumps(
+            __create_search_shard__(
+                journal_name, journal_title, search_index_filepath
+            ),
+            separators=(",", ":"),
+        )
+        digest = hashlib.sha256(content.encode()).hexdigest()[:16]
+        shard_filepath = shards_folder.joinpath(f"{journal_name}.{digest}.json")
+        if not shard_filepath.exists():
+            with file_utils.atomic_write(shard_filepath, lock=False) as f:
+                f.write(content)
+
+        shards.append(
+            {
+                "journal": journal_name,
+                "title": journal_title,
+                "url": shard_filepath.relative_to(search_folder).as_posix(),
+                **source,
+            }
+        )
+        updated_journals.append(journal_name)
+
+    manifest = {"version": 1, "shards": shards}
+    if manifest != __read_search_manifest__(search_folder):
+        with file_utils.atomic_write(
+            search_folder.joinpath("manifest.json"), lock=False
+        ) as f:
+            json.dump(manifest, f, indent=2)
+
+    used_shards = set(search_folder.joinpath(x["url"]).name for x in shards)
+    for shard_filepath in shards_folder.iterdir():
+        # Precompressed siblings are removed together with their shard
+        shard_name = shard_filepath.name
+        if shard_filepath.suffix in __get_compressors__():
+            shard_name = shard_filepath.stem
+        if shard_name not in used_shards:
+            shard_filepath.unlink()
+
+    return manifest, updated_journals
+
+
+def __build_journal__(
+    journal_location: Path,
+    site_location: Path,
+    build_engine: str,
+    journal_name: str = "",
+) -> List[profiling.Span]:
+    """
+    Build a single journal.
+
+    This function is executed by the build workers.
+
+    Returns:
+        The spans measuring the journal build and the mkdocs execution.
+    Raises:
+        RuntimeError if mkdocs does not exit successfully.
+        InvalidAttribute if the build engine is unknown.
+    """
+    # Only the subprocess engine runs mkdocs in a child process
+    include_children = build_engine == mkdocs_wrapper.SUBPROCESS_ENGINE
+    with profiling.measure(
+        journal_name,
+        profiling.JOURNAL_CATEGORY,
+        include_children,
+        journal=journal_name,
+    ) as journal_span:
+        with profiling.measure(
+            "mkdocs",
+            profiling.MKDOCS_CATEGORY,
+            include_children,
+            journal=journal_name,
+            engine=build_engine,
+        ) as mkdocs_span:
+            if build_engine == mkdocs_wrapper.IN_PROCESS_ENGINE:
+                mkdocs_wrapper.build_in_process(journal_location, site_location)
+            elif build_engine == mkdocs_wrapper.SUBPROCESS_ENGINE:
+                result = mkdocs_wrapper.build(journal_location, site_location)
+                if result.returncode != 0:
+                    raise RuntimeError(
+                        f"mkdocs exited with code {result.returncode}."
+                    )
+            else:
+                raise exceptions.InvalidAttribute(
+                    f"Unknown build engine: {build_engine}"
+                )
+
+    return [journal_span, mkdocs_span]
+
+
+def __build_journals__(
+    list_of_journal_data: List[model.JournalData],
+    journals_site_folder: Path,
+    max_workers: int,
+    build_engine: str,
+    executor: Optional[Executor] = None,
+    generations_to_keep: int = 3,
+    profiler: Optional[profiling.Profiler] = None,
+) -> Dict[str, str]:
+    """
+    Build journals with up to max_workers concurrent processes.
+
+    The failure of a journal does not interrupt the build of the others.
+    Worker processes are reused from one journal to the next, so the
+    in-process engine imports mkdocs only once per worker.
+
+    Each journal is built in a new generation folder, which is published
+    once the build succeeds. A journal that fails to build keeps its
+    previously published site.
+
+    Args:
+        list_of_journal_data: Journals to build.
+        journals_site_folder: Folder where the journal sites are stored.
+        max_workers: Maximum number of concurrent builds. If 0, the number
+                     of CPUs is used. If 1, journals are built sequentially.
+        build_engine: Either mkdocs_wrapper.SUBPROCESS_ENGINE or
+                      mkdocs_wrapper.IN_PROCESS_ENGINE.
+        executor (optional): Long-lived executor used instead of max_workers
+                             new processes. It is not shut down.
+        generations_to_keep (optional): Number of generations kept per journal.
+        profiler (optional): Profiler that records the journal builds.
+    Returns:
+        A dictionary mapping the name of journals that failed to build to
+        the error message. Journals are listed in the given order.
+    """
+    if max_workers == 0:
+        max_workers = os.cpu_count() or 1
+    if profiler is None:
+        profiler = profiling.Profiler()
+
+    generation_folders = {
+        journal_data.name: __get_new_generation_folder__(
+            journals_site_folder, journal_data.name
+        )
+        for journal_data in list_of_journal_data
+    }
+
+    errors: Dict[str, str] = {}
+    if executor is not None and len(list_of_journal_data) > 1:
+        errors = __collect_build_errors__(
+            executor,
+            list_of_journal_data,
+            generation_folders,
+            build_engine,
+            profiler,
+        )
+    elif max_workers == 1 or len(list_of_journal_data) <= 1:
+        for journal_data in list_of_journal_data:
+            try:
+                spans = __build_journal__(
+                    Path(journal_data.location_folder),
+                    generation_folders[journal_data.name],
+                    build_engine,
+                    journal_data.name,
+                )
+                profiler.add_spans(spans)
+            except Exception as ex:
+                errors[journal_data.name] = str(ex)
+    else:
+        with ProcessPoolExecutor(
+            max_workers=max_workers, mp_context=get_worker_pool_context()
+        ) as new_executor:
+            errors = __collect_build_errors__(
+                new_executor,
+                list_of_journal_data,
+                generation_folders,
+                build_engine,
+                profiler,
+            )
+
+    for journal_name, generation_folder in generation_folders.items():
+        if journal_name in errors:
+            shutil.rmtree(generation_folder, ignore_errors=True)
+            continue
+
+        with profiler.span(
+            "publish", profiling.TASK_CATEGORY, journal=journal_name
+        ):
+            journal_site_folder = journals_site_folder.joinpath(journal_name)
+            __publish_generation__(journal_site_folder, generation_folder)
+            __remove_old_generations__(journal_site_folder, generations_to_keep)
+
+    for journal_name, error in errors.items():
+        logger.error(f"Journal {journal_name} could not be built: {error}")
+
+    return errors
+
+
+def __collect_build_errors__(
+    executor: Executor,
+    list_of_journal_data: List[model.JournalData],
+    build_folders: Dict[str, Path],
+    build_engine: str,
+    profiler: profiling.Profiler,
+) -> Dict[str, str]:
+    """
+    Submit the journal builds to an executor and collect their errors.
+
+    The spans measured by the workers are added to the profiler.
+    """
+    futures = {
+        journal_data.name: executor.submit(
+            __build_journal__,
+            Path(journal_data.location_folder),
+            build_folders[journal_data.name],
+            build_engine,
+            journal_data.name,
+        )
+        for journal_data in list_of_journal_data
+    }
+
+    errors: Dict[str, str] = {}
+    for journal_name, future in futures.items():
+        try:
+            profiler.add_spans(future.result())
+        except Exception as ex:
+            errors[journal_name] = str(ex)
+    return errors
+
+
+def __get_generations_folder__(
+    journals_site_folder: Path, journal_name: str
+) -> Path:
+    """
+    Return the folder where the build generations of a journal are stored.
+
+    It is located next to the site folder, so generations are not served.
+    """
+    return journals_site_folder.parent.joinpath("generations", journal_name)
+
+
+def __get_new_generation_folder__(
+    journals_site_folder: Path, journal_name: str
+) -> Path:
+    """
+    Return a path for a new build generation of a journal.
+
+    Generation names sort in creation order.
+    """
+    generations_folder = __get_generations_folder__(
+        journals_site_folder, journal_name
+    )
+    generations_folder.mkdir(parents=True, exist_ok=True)
+    return generations_folder.joinpath(f"{time.time_ns():020d}")
+
+
+def __list_generations__(generations_folder: Path) -> List[Path]:
+    """
+    Return the build generations of a journal from the oldest to the newest.
+    """
+    if not generations_folder.exists():
+        return []
+    return sorted(x for x in generations_folder.iterdir() if x.is_dir())
+
+
+def __get_published_generation__(journal_site_folder: Path) -> Optional[Path]:
+    """
+    Return the generation folder the journal site points to, if any.
+    """
+    if not journal_site_folder.is_symlink():
+        return None
+    return Path(os.path.realpath(journal_site_folder))
+
+
+def __publish_generation__(journal_site_folder: Path, generation_folder: Path):
+    """
+    Atomically replace the journal site by a build generation.
+
+    The journal site is a relative symbolic link to the generation folder.
+    Readers see either the previous or the new site. A journal site built
+    before generations were introduced becomes the previous generation.
+    """
+    journal_site_folder.parent.mkdir(parents=True, exist_ok=True)
+    if journal_site_folder.is_dir() and not journal_site_folder.is_symlink():
+        previous_generation = generation_folder.with_name(
+            f"{int(generation_folder.name) - 1:020d}"
+        )
+        os.rename(journal_site_folder, previous_generation)
+
+    file_utils.atomic_symlink(
+        os.path.relpath(generation_folder, journal_site_folder.parent),
+        journal_site_folder,
+    )
+
+
+def __remove_old_generations__(
+    journal_site_folder: Path, generations_to_keep: int
+):
+    """
+    Remove all but the newest generations of a journal.
+
+    The published generation is never removed.
+    """
+    published_generation = __get_published_generation__(journal_site_folder)
+    generations = __list_generations__(
+        __get_generations_folder__(
+            journal_site_folder.parent, journal_site_folder.name
+        )
+    )
+    for generation_folder in generations[: -max(generations_to_keep, 1)]:
+        if Path(os.path.realpath(generation_folder)) != published_generation:
+            shutil.rmtree(generation_folder, ignore_errors=True)
+
+
+def __get_node_modules_cache_folder__() -> Optional[Path]:
+    """
+    Return the folder where the http server dependencies are cached.
+
+    The folder is located in the journal-manager configuration folder. If
+    the configuration folder is not set, None is returned.
+    """
+    try:
+        return api.get_configuration_folder().joinpath("cache", "node_modules")
+    except exceptions.ConfigurationFolderDoesNotExist:
+        return None
+
+
+def __get_build_environment_fingerprint__() -> str:
+    """
+    Return a digest of the versions of the packages that take part in a build.
+
+    These are journal-manager, mkdocs and every installed mkdocs theme and
+    plugin.
+    """
+    versions = set()
+    for package in ["journal-manager", "mkdocs"]:
+        try:
+            versions.add(f"{package}=={metadata.version(package)}")
+        except metadata.PackageNotFoundError:
+            pass
+
+    for group in ["mkdocs.themes", "mkdocs.plugins"]:
+        for entry_point in metadata.entry_points(group=group):
+            if entry_point.dist:
+                versions.add(
+                    f"{entry_point.dist.name}=={entry_point.dist.version}"
+                )
+
+    return hashlib.sha256("\n".join(sorted(versions)).encode()).hexdigest()
+
+
+def __compute_journal_fingerprint__(
+    journal_data: model.JournalData, build_environment_fingerprint: str
+) -> str:
+    """
+    Return a digest that changes whenever the journal site would change.
+
+    The digest combines the build environment, the journal location, the
+    content of its mkdocs configuration file and the path, size and
+    modification time of every file in the journal folder. Only stat calls
+    are issued for the journal files.
+
+    Args:
+        journal_data: The journal to fingerprint.
+        build_environment_fingerprint: Value returned by
+                                       __get_build_environment_fingerprint__.
+                                       It is computed once per build.
+    """
+    journal_location = Path(journal_data.location_folder).expanduser()
+
+    digest = hashlib.sha256()
+    digest.update(build_environment_fingerprint.encode())
+    digest.update(journal_location.as_posix().encode())
+
+    for config_name in ["mkdocs.yml", "mkdocs.yaml"]:
+        config_filepath = journal_location.joinpath(config_name)
+        if config_filepath.exists():
+            digest.update(config_filepath.read_bytes())
+
+    for root, dirs, filenames in os.walk(journal_location):
+        dirs[:] = sorted(d for d in dirs if d != ".git")
+        for filename in sorted(filenames):
+            filepath = Path(root).joinpath(filename)
+            stat = filepath.stat()
+            digest.update(
+                f"{filepath.relative_to(journal_location).as_posix()}:"
+                f"{stat.st_size}:{stat.st_mtime_ns}\n".encode()
+            )
+
+    return digest.hexdigest()
+
+
+def __read_build_manifest__(build_manifest_filepath: Path) -> Dict[str, str]:
+    """
+    Return the journal fingerprints recorded in the build manifest.
+    """
+    if not build_manifest_filepath.exists():
+        return {}
+
+    build_manifest = model.BuildManifest.read(build_manifest_filepath)
+    return {
+        record.name: record.fingerprint
+        for record in build_manifest.list_of_build_records
+    }
+
+
+def __write_build_manifest__(
+    build_manifest_filepath: Path, fingerprints: Dict[str, str]
+):
+    """
+    Write the journal fingerprints to the build manifest.
+    """
+    build_manifest = model.BuildManifest(
+        [
+            model.JournalBuildRecord(name, fingerprint)
+            for name, fingerprint in sorted(fingerprints.items())
+        ]
+    )
+    with file_utils.atomic_write(build_manifest_filepath) as f:
+        build_manifest.write(f)
+
+
+def __is_site_intact__(journal_site_folder: Path) -> bool:
+    """
+    Check that a previously built journal site was not removed.
+    """
+    return journal_site_folder.joinpath("index.html").exists()
 
 
 def __register_journals_by_location__(locations: List[Path]):
@@ -52,9 +833,12 @@ def __register_journals_by_location__(locations: List[Path]):
     if len(invalid_locations) != 0:
         raise exceptions.InvalidLocation(invalid_locations)
 
-    for journal_location in locations:
-        journal_title = Path(journal_location).expanduser().name
-        register_journal(Path(journal_location), journal_title)
+    with api.journal_data_transaction() as transaction:
+        for journal_location in locations:
+            journal_title = Path(journal_location).expanduser().name
+            register_command.__add_to_transaction__(
+                transaction, Path(journal_location), journal_title
+            )
 
 
 def __collect_journal_names_from_location__(
@@ -98,8 +882,9 @@ def __validate_journal_names_in_registry__(
     registered_names = list(
         filter(lambda x: api.find_journal_by_name(journal_data_file, x), names)
     )
+    registered_names_set = set(registered_names)
     non_registered_names = list(
-        filter(lambda x: x not in registered_names, names)
+        filter(lambda x: x not in registered_names_set, names)
     )
 
     return registered_names, non_registered_names
@@ -125,8 +910,9 @@ def __validate_journal_locations_in_registry__(
             locations,
         )
     )
+    registered_locations_set = set(registered_locations)
     non_registered_locations = list(
-        filter(lambda x: x not in registered_locations, locations)
+        filter(lambda x: x not in registered_locations_set, locations)
     )
 
     return registered_locations, non_registered_locations
@@ -169,8 +955,12 @@ class BuildStep:
     This class defined the interface and also the basic implementations
     of the methods that made the BuildStep interface.
 
-    The design of the journal build process expects build steps to be
-    called in a chain. For example:
+    Build steps are usually executed by a BuildGraph. Each step declares
+    the parameters it reads (inputs) and the attributes it produces
+    (outputs). A step runs as soon as the steps producing its inputs are
+    finished, so independent steps run concurrently.
+
+    Build steps can also be called in a chain. For example:
 
         MyFirstBuildStep(some_parameters)
         .build()
@@ -178,8 +968,20 @@ class BuildStep:
 
     The parameters passed to a build step persist in following steps.
     If a parameter of same name had been set before, it will be overwritten.
+
+    If a profiler parameter is given, the wall and cpu time of each step
+    called with `next` is recorded. Steps that start subprocesses set
+    `starts_subprocesses`, so the cpu time of their child processes is
+    recorded too.
     """
 
+    inputs: Tuple[str, ...] = ()
+    outputs: Tuple[str, ...] = ()
+    starts_subprocesses = False
+
+    # Output of BuildHttpServer. It is None if that step was not executed.
+    http_server_folder: Optional[Path] = None
+
     def __init__(self, **kwargs):
         self.__dict__.update(**kwargs)
 
@@ -187,7 +989,29 @@ class BuildStep:
         return self
 
     def next(self, build_step_class):
-        return build_step_class(**self.__dict__).build()
+        build_step = build_step_class(**self.__dict__)
+
+        profiler = self.__dict__.get("profiler")
+        if profiler is None:
+            return build_step.build()
+
+        with profiler.span(
+            build_step_class.__name__,
+            profiling.STEP_CATEGORY,
+            build_step_class.starts_subprocesses,
+        ):
+            return build_step.build()
+
+    def _span(self, name: str, include_children: bool = False, **kwargs):
+        """
+        Measure a task of the build step if a profiler is given.
+        """
+        profiler = self.__dict__.get("profiler")
+        if profiler is None:
+            return contextlib.nullcontext()
+        return profiler.span(
+            name, profiling.TASK_CATEGORY, include_children, **kwargs
+        )
 
     def __getitem__(self, key):
         return self.__dict__[key]
@@ -209,31 +1033,178 @@ class FailedStep(BuildStep):
         return self
 
 
-class BuildJournals(BuildStep):
+class BuildGraph:
     """
-    Build html static pages from journals using mkdocs
+    Run build steps concurrently according to their inputs and outputs.
+
+    A step depends on the steps that produce one of its inputs. Inputs that
+    are not produced by any step must be given to `run`. Each step receives
+    the parameters given to `run` plus the outputs of the steps it depends
+    on. If a step fails, the steps that depend on it are not executed, but
+    the independent ones are.
     """
 
-    def __init__(self, build_instructions: model.BuildInstructions, **kwargs):
-        super().__init__(**kwargs)
-        self.build_instructions = build_instructions
+    def __init__(self, build_steps: List[Type[BuildStep]]):
+        """
+        Raises:
+            InvalidAttribute if two steps produce the same output or if
+            the steps have circular dependencies.
+        """
+        self.build_steps = list(build_steps)
+
+        self.producers: Dict[str, Type[BuildStep]] = {}
+        for build_step in self.build_steps:
+            for output in build_step.outputs:
+                if output in self.producers:
+                    raise exceptions.InvalidAttribute(
+                        f"The output {output} is produced by {self.producers[output].__name__} and {build_step.__name__}."
+                    )
+                self.producers[output] = build_step
 
-        if not self.build_instructions.build_location:
-            raise RuntimeError(
-                "Journal could not be built because a location was not specified."
+        self.dependencies: Dict[Type[BuildStep], Set[Type[BuildStep]]] = {
+            build_step: {
+                self.producers[x]
+                for x in build_step.inputs
+                if x in self.producers and self.producers[x] is not build_step
+            }
+            for build_step in self.build_steps
+        }
+        self._check_cycles()
+
+    def _check_cycles(self):
+        sorted_steps: Set[Type[BuildStep]] = set()
+        while len(sorted_steps) < len(self.build_steps):
+            ready_steps = [
+                x
+                for x in self.build_steps
+                if x not in sorted_steps
+                and self.dependencies[x].issubset(sorted_steps)
+            ]
+            if len(ready_steps) == 0:
+                raise exceptions.InvalidAttribute(
+                    "The build steps have circular dependencies."
+                )
+            sorted_steps.update(ready_steps)
+
+    def _run_step(
+        self, build_step_class: Type[BuildStep], parameters: Dict[str, Any]
+    ) -> BuildStep:
+        profiler = parameters.get("profiler")
+        span: Any = contextlib.nullcontext()
+        if profiler is not None:
+            span = profiler.span(
+                build_step_class.__name__,
+                profiling.STEP_CATEGORY,
+                build_step_class.starts_subprocesses,
             )
 
-        self.journals_site_folder = Path(
-            self.build_instructions.build_location
-        ).joinpath("site")
+        with span:
+            try:
+                return build_step_class(**parameters).build()
+            except Exception as ex:
+                return FailedStep(BuildStep(**parameters), str(ex))
+
+    def run(self, **kwargs) -> BuildStep:
+        """
+        Execute the build steps.
+
+        Args:
+            kwargs: Parameters given to all build steps.
+        Returns:
+            A BuildStep with the parameters and the outputs of all the
+            executed steps. If a step failed, a FailedStep with the message
+            of the first failed step (in the order the steps were given).
+        Raises:
+            InvalidAttribute if an input is neither produced by a step nor
+            given as a parameter.
+        """
+        for build_step in self.build_steps:
+            for x in build_step.inputs:
+                if x not in self.producers and x not in kwargs:
+                    raise exceptions.InvalidAttribute(
+                        f"The input {x} of {build_step.__name__} is not available."
+                    )
+
+        state: Dict[str, Any] = dict(kwargs)
+        failed_steps: Dict[Type[BuildStep], FailedStep] = {}
+        finished_steps: Set[Type[BuildStep]] = set()
+        pending_steps = list(self.build_steps)
+        running_steps: Dict[Future, Type[BuildStep]] = {}
+
+        with ThreadPoolExecutor(
+            max_workers=max(len(self.build_steps), 1)
+        ) as executor:
+            while len(pending_steps) > 0 or len(running_steps) > 0:
+                for build_step in list(pending_steps):
+                    dependencies = self.dependencies[build_step]
+                    if not dependencies.issubset(finished_steps):
+                        continue
+
+                    pending_steps.remove(build_step)
+                    if any(x in failed_steps for x in dependencies):
+                        # Skipped steps are considered failed by the
+                        # steps that depend on them.
+                        failed_steps[build_step] = failed_steps[
+                            next(x for x in dependencies if x in failed_steps)
+                        ]
+                        finished_steps.add(build_step)
+                        continue
+
+                    future = executor.submit(
+                        self._run_step, build_step, dict(state)
+                    )
+                    running_steps[future] = build_step
+
+                if len(running_steps) == 0:
+                    continue
+
+                done, _ = wait(running_steps, return_when=FIRST_COMPLETED)
+                for future in done:
+                    build_step = running_steps.pop(future)
+                    result = future.result()
+                    finished_steps.add(build_step)
+                    if isinstance(result, FailedStep):
+                        failed_steps[build_step] = result
+                        continue
+
+                    for output in build_step.outputs:
+                        if output in result.__dict__:
+                            state[output] = result.__dict__[output]
+
+        for build_step in self.build_steps:
+            if build_step in failed_steps:
+                return FailedStep(
+                    BuildStep(**state), failed_steps[build_step].msg
+                )
+        return BuildStep(**state)
+
+
+class SelectJournals(BuildStep):
+    """
+    Select the registered journals to build.
+
+    Only the journals register is read, so the steps that need the list
+    of journals but not their sites can run while journals are built.
+    """
+
+    inputs = ("build_instructions",)
+    outputs = ("journal_data", "journals_to_build")
+
+    def __init__(self, build_instructions: model.BuildInstructions, **kwargs):
+        super().__init__(**kwargs)
+        self.build_instructions = build_instructions
 
     def build(self, **kwargs):
         try:
             data: Dict[str, Any] = {"journals": []}
-            for journal_name in get_journals_names_to_build(
-                self.build_instructions
-            ):
+            with self._span("resolve journal names"):
+                journals_names_to_build = get_journals_names_to_build(
+                    self.build_instructions
+                )
+            with self._span("load registry"):
                 journal_data_file = api.get_journal_data_file()
+            journals_to_build: List[model.JournalData] = []
+            for journal_name in journals_names_to_build:
                 journal_data = api.find_journal_by_name(
                     journal_data_file, journal_name
                 )
@@ -253,15 +1224,11 @@ class BuildJournals(BuildStep):
                         journal_data.active
                         or self.build_instructions.build_inactive
                     ):
-                        mkdocs_wrapper.build(
-                            Path(journal_data.location_folder),
-                            Path(
-                                f"{self.journals_site_folder}/{journal_data.name}"
-                            ),
-                        )
+                        journals_to_build.append(journal_data)
                     data["journals"].append(journal_data)
 
             self.journal_data = data
+            self.journals_to_build = journals_to_build
             return self
         except exceptions.InvalidName as ex:
             ss = StringIO()
@@ -293,11 +1260,111 @@ class BuildJournals(BuildStep):
             return FailedStep(self, str(ex))
 
 
+class BuildJournals(BuildStep):
+    """
+    Build html static pages from journals using mkdocs
+    """
+
+    inputs = ("build_instructions", "journals_to_build")
+    outputs = ("failed_journals",)
+    starts_subprocesses = True
+
+    def __init__(self, build_instructions: model.BuildInstructions, **kwargs):
+        super().__init__(**kwargs)
+        self.build_instructions = build_instructions
+
+        if not self.build_instructions.build_location:
+            raise RuntimeError(
+                "Journal could not be built because a location was not specified."
+            )
+
+        self.journals_site_folder = Path(
+            self.build_instructions.build_location
+        ).joinpath("site")
+        self.build_manifest_filepath = Path(
+            self.build_instructions.build_location
+        ).joinpath("build-manifest.toml")
+
+        # Not really necessay, but this make explicit the variables that are inherit
+        # by other build steps and that are necessary to be defined at this point. It
+        # is also useful as a sanity check during static type checking
+        self.journals_to_build: List[model.JournalData] = self.__dict__[
+            "journals_to_build"
+        ]
+
+    def build(self, **kwargs):
+        try:
+            self.journals_site_folder.mkdir(parents=True, exist_ok=True)
+            journals_to_build = self.journals_to_build
+            with self._span("compute fingerprints"):
+                recorded_fingerprints = __read_build_manifest__(
+                    self.build_manifest_filepath
+                )
+                build_environment_fingerprint = (
+                    __get_build_environment_fingerprint__()
+                )
+                fingerprints = {
+                    journal_data.name: __compute_journal_fingerprint__(
+                        journal_data, build_environment_fingerprint
+                    )
+                    for journal_data in journals_to_build
+                }
+
+            if not self.build_instructions.force_rebuild:
+                up_to_date_journals = [
+                    journal_data.name
+                    for journal_data in journals_to_build
+                    if recorded_fingerprints.get(journal_data.name)
+                    == fingerprints[journal_data.name]
+                    and __is_site_intact__(
+                        self.journals_site_folder.joinpath(journal_data.name)
+                    )
+                ]
+                for journal_name in up_to_date_journals:
+                    logger.info(
+                        f"Skipping {journal_name} because it did not change since the last build."
+                    )
+                journals_to_build = [
+                    journal_data
+                    for journal_data in journals_to_build
+                    if journal_data.name not in up_to_date_journals
+                ]
+
+            self.failed_journals = __build_journals__(
+                journals_to_build,
+                self.journals_site_folder,
+                self.build_instructions.max_workers,
+                self.build_instructions.build_engine,
+                self.__dict__.get("executor"),
+                self.build_instructions.generations_to_keep,
+                self.__dict__.get("profiler"),
+            )
+
+            for journal_data in journals_to_build:
+                if journal_data.name in self.failed_journals:
+                    recorded_fingerprints.pop(journal_data.name, None)
+                else:
+                    recorded_fingerprints[journal_data.name] = fingerprints[
+                        journal_data.name
+                    ]
+            with self._span("write build manifest"):
+                __write_build_manifest__(
+                    self.build_manifest_filepath, recorded_fingerprints
+                )
+
+            return self
+        except BaseException as ex:
+            return FailedStep(self, str(ex))
+
+
 class BuildIndexPage(BuildStep):
     """
     Build the index page with links to all rendered journals.
     """
 
+    inputs = ("build_instructions", "journal_data", "journals_site_folder")
+    outputs = ("index_filepath",)
+
     assets = files("danoan.journal_manager.assets.templates").joinpath(
         "material-index", "assets"
     )
@@ -317,21 +1384,128 @@ class BuildIndexPage(BuildStep):
         if not self.build_instructions.build_index:
             return self
 
-        env = Environment(
-            loader=PackageLoader(
-                "danoan.journal_manager.assets", package_path="templates"
-            )
-        )
+        env = jinja_utils.get_package_environment()
+        self.journals_site_folder.mkdir(parents=True, exist_ok=True)
 
-        with as_file(BuildIndexPage.assets) as assets_path:
-            __remove_directory_before_copy__(
+        with self._span("copy assets"), as_file(
+            BuildIndexPage.assets
+        ) as assets_path:
+            __sync_directory__(
                 assets_path, self.journals_site_folder.joinpath("assets")
             )
 
-        with open(self.journals_site_folder.joinpath("index.html"), "w") as f:
-            template = env.get_template("material-index/index.tpl.html")
-            f.write(template.render(self["journal_data"]))
+        self.index_filepath = self.journals_site_folder.joinpath("index.html")
+        with self._span("render index"):
+            with file_utils.atomic_write(self.index_filepath, lock=False) as f:
+                template = env.get_template("material-index/index.tpl.html")
+                f.write(template.render(self["journal_data"]))
+
+        return self
+
+
+class BuildSearchIndex(BuildStep):
+    """
+    Merge the search indexes of all journals for the index page.
+
+    The index page loads the merged index when the search is used for
+    the first time. Only the shards of the journals that were rebuilt
+    are replaced. The step runs even if the index page is not rebuilt,
+    e.g. when the file watcher rebuilds a journal.
+    """
+
+    inputs = (
+        "build_instructions",
+        "journal_data",
+        "journals_site_folder",
+        "failed_journals",
+    )
+    outputs = ("search_manifest", "updated_search_shards")
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+
+        # Not really necessay, but this make explicit the variables that are inherit
+        # by other build steps and that are necessary to be defined at this point. It
+        # is also useful as a sanity check during static type checking
+        self.journals_site_folder = self.__dict__["journals_site_folder"]
+        self.build_instructions: model.BuildInstructions = self.__dict__[
+            "build_instructions"
+        ]
+
+    def build(self, **kwargs):
+        journals_titles = {
+            x.name: x.title for x in self["journal_data"]["journals"]
+        }
+        with self._span("merge search indexes"):
+            (
+                self.search_manifest,
+                self.updated_search_shards,
+            ) = __merge_search_indexes__(
+                self.journals_site_folder, journals_titles
+            )
+        return self
+
+
+class UpdateFullTextIndex(BuildStep):
+    """
+    Update the full-text index of `jm search` with the selected journals.
+
+    Only the markdown files modified since the last update are read. An
+    index that can not be updated does not fail the build.
+    """
+
+    inputs = ("journals_to_build",)
+
+    def build(self, **kwargs):
+        journals_names = [x.name for x in self["journals_to_build"]]
+        try:
+            with self._span("update full-text index"):
+                search_command.update_index(journals_names)
+        except sqlite3.Error as ex:
+            logger.warning(f"The search index could not be updated: {ex}")
+        return self
+
+
+class PrecompressSite(BuildStep):
+    """
+    Write gzip (and brotli) compressed siblings of the site files.
+
+    The http server sends the compressed sibling of a file instead of
+    compressing it at every request. The step runs after the journals and
+    the index page are built.
+    """
+
+    inputs = (
+        "build_instructions",
+        "journals_site_folder",
+        "failed_journals",
+        "index_filepath",
+        "search_manifest",
+    )
+    outputs = ("precompressed_files",)
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
 
+        # Not really necessay, but this make explicit the variables that are inherit
+        # by other build steps and that are necessary to be defined at this point. It
+        # is also useful as a sanity check during static type checking
+        self.journals_site_folder = self.__dict__["journals_site_folder"]
+        self.build_instructions: model.BuildInstructions = self.__dict__[
+            "build_instructions"
+        ]
+
+    def build(self, **kwargs):
+        if not self.build_instructions.precompress:
+            return self
+
+        cache_folder = self.journals_site_folder.parent.joinpath(
+            "cache", "precompressed"
+        )
+        with self._span("compress files"):
+            self.precompressed_files = __precompress_directory__(
+                self.journals_site_folder, cache_folder
+            )
         return self
 
 
@@ -340,22 +1514,28 @@ class BuildHttpServer(BuildStep):
     Sets up the http server that will serve the journals.
 
     The http server structure is composed of:
-        1. An http server written in node.js + express
-        2. A file monitor script using entr
-        3. A file monitor action to rebuild journals that are updated
+        1. An http server. Either the static file server of this package
+           (see core.http_server) or one written in node.js + express
+        2. A file watcher (see the watch command) that rebuilds journals
+           that are updated
+
+    Only the node.js server needs to be set up in the build location.
 
-    The http server and the file monitor run independently. Whenever a
-    markdown file is modified, the file monitor triggers the file monitor
-    action scripts that rebuilds only the journal affected. The http server
-    will automatically reflect the changes.
+    The http server and the file watcher run independently. Whenever a
+    journal file is modified, the file watcher rebuilds only the journal
+    affected. The http server will automatically reflect the changes.
     """
 
+    inputs = ("build_instructions", "journals_site_folder")
+    outputs = ("http_server_folder",)
+    starts_subprocesses = True
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         if not self.build_instructions.build_location:
             raise exceptions.InvalidAttribute("No build location was given")
 
-        self.http_server_folder = Path(
+        self.http_server_folder: Path = Path(
             self.build_instructions.build_location
         ).joinpath("http-server")
 
@@ -369,76 +1549,100 @@ class BuildHttpServer(BuildStep):
 
     def build(self, **kwargs):
         try:
-            if not self.build_instructions.with_http_server:
+            if (
+                not self.build_instructions.with_http_server
+                or self.build_instructions.http_server_backend
+                != http_server.NODE_BACKEND
+            ):
                 return self
 
-            env = Environment(
-                loader=PackageLoader(
-                    "danoan.journal_manager.assets", package_path="templates"
+            with self._span("copy http server"), as_file(
+                files("danoan.journal_manager.assets.templates").joinpath(
+                    "http-server"
+                )
+            ) as http_server_template:
+                shutil.copytree(
+                    http_server_template,
+                    self.http_server_folder,
+                    dirs_exist_ok=True,
                 )
-            )
 
-            http_server = files(
-                "danoan.journal_manager.assets.templates"
-            ).joinpath("http-server")
-            shutil.copytree(
-                http_server, self.http_server_folder, dirs_exist_ok=True
-            )
+            with self._span(
+                "install http server dependencies", include_children=True
+            ):
+                node_wrapper.install_dependencies(
+                    self.http_server_folder,
+                    __get_node_modules_cache_folder__(),
+                )
 
-            node_wrapper.install_dependencies(self.http_server_folder)
+            return self
+        except BaseException as ex:
+            return FailedStep(self, str(ex))
 
-            file_monitor_action_template = env.get_template(
-                "file-monitor/file-monitor-action.tpl.sh"
-            )
-            file_monitor_template = env.get_template(
-                "file-monitor/file-monitor.tpl.sh"
-            )
 
-            if not self.build_instructions.build_location:
-                raise RuntimeError("No build location was given.")
+# -------------------- API --------------------
 
-            file_monitor_folder = Path(
-                self.build_instructions.build_location
-            ).joinpath("file-monitor")
-            file_monitor_folder.mkdir(exist_ok=True)
+BUILD_STEPS_ENTRY_POINT_GROUP = "danoan.journal_manager.build_steps"
 
-            self.file_monitor_script = file_monitor_folder.joinpath(
-                "file-monitor.sh"
-            )
-            file_monitor_action_script = file_monitor_folder.joinpath(
-                "file-monitor-action.sh"
-            )
+__registered_build_steps__: List[Type[BuildStep]] = []
 
-            folders_to_monitor = set()
-            journal_data_file = api.get_journal_data_file()
-            for journal_name in get_journals_names_to_build(
-                self.build_instructions
-            ):
-                journal_data = api.find_journal_by_name(
-                    journal_data_file, journal_name
-                )
-                if journal_data:
-                    folders_to_monitor.add(journal_data.location_folder)
 
-            data = {
-                "journals_site_folder": self.journals_site_folder,
-                "journals_files_folder": list(folders_to_monitor),
-            }
+def get_worker_pool_context() -> multiprocessing.context.BaseContext:
+    """
+    Return the multiprocessing context of the build worker pools.
+
+    Worker pools are created while other threads are running (e.g. the
+    concurrent build steps), and forking a process with threads can
+    deadlock. Workers are therefore started by a fork server or, where it
+    is not available, spawned.
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
 
-            with open(self.file_monitor_script, "w") as f:
-                f.write(file_monitor_template.render(data=data))
-            self.file_monitor_script.chmod(0o777)
 
-            with open(file_monitor_action_script, "w") as f:
-                f.write(file_monitor_action_template.render(data=data))
-            file_monitor_action_script.chmod(0o777)
+def register_build_step(build_step_class: Type[BuildStep]) -> Type[BuildStep]:
+    """
+    Add a build step to every build.
 
-            return self
-        except BaseException as ex:
-            return FailedStep(self, str(ex))
+    The step runs after the steps that produce its inputs. It can be used
+    as a class decorator. Packages can also register build steps in the
+    danoan.journal_manager.build_steps entry point group.
 
+    Args:
+        build_step_class: A subclass of BuildStep.
+    Returns:
+        The build step class.
+    """
+    if build_step_class not in __registered_build_steps__:
+        __registered_build_steps__.append(build_step_class)
+    return build_step_class
 
-# -------------------- API --------------------
+
+def get_build_steps() -> List[Type[BuildStep]]:
+    """
+    Return the build steps executed by a build.
+
+    The default steps come first, followed by the registered steps and the
+    steps of the danoan.journal_manager.build_steps entry point group.
+    """
+    build_steps: List[Type[BuildStep]] = [
+        SelectJournals,
+        BuildJournals,
+        BuildIndexPage,
+        BuildSearchIndex,
+        UpdateFullTextIndex,
+        PrecompressSite,
+        BuildHttpServer,
+        *__registered_build_steps__,
+    ]
+    for entry_point in metadata.entry_points(
+        group=BUILD_STEPS_ENTRY_POINT_GROUP
+    ):
+        build_step_class = entry_point.load()
+        if build_step_class not in build_steps:
+            build_steps.append(build_step_class)
+    return build_steps
 
 
 def get_journals_names_to_build(
@@ -518,9 +1722,17 @@ def get_journals_names_to_build(
     return journals_names_to_build
 
 
-def build(build_instructions: model.BuildInstructions):
+def build(
+    build_instructions: model.BuildInstructions,
+    executor: Optional[Executor] = None,
+    profiler: Optional[profiling.Profiler] = None,
+):
     """
     Build html static pages from journals.
+
+    The build steps returned by get_build_steps are executed by a
+    BuildGraph. The index page and the http server are set up while
+    the journals are built.
     """
     if not build_instructions.build_location:
         raise RuntimeError("No build location was given.")
@@ -528,53 +1740,120 @@ def build(build_instructions: model.BuildInstructions):
     build_location = Path(build_instructions.build_location)
     build_location.mkdir(exist_ok=True)
 
-    return (
-        BuildJournals(build_instructions=build_instructions)
-        .build()
-        .next(BuildIndexPage)
-        .next(BuildHttpServer)
+    if profiler is None:
+        profiler = profiling.Profiler()
+
+    return BuildGraph(get_build_steps()).run(
+        build_instructions=build_instructions,
+        journals_site_folder=build_location.joinpath("site"),
+        executor=executor,
+        profiler=profiler,
     )
 
 
+def rollback(build_instructions: model.BuildInstructions) -> Dict[str, Path]:
+    """
+    Publish again the previous build generation of journals.
+
+    Journals are selected in the same way as in the build function. The
+    rolled back journals are removed from the build manifest, so they are
+    built again by the next build.
+
+    Args:
+        build_instructions: A BuildInstructions object.
+    Returns:
+        A dictionary mapping the name of rolled back journals to the
+        generation folder that is now published. Journals without a
+        previous generation are not listed.
+    Raises:
+        InvalidName if invalid journal names are given.
+        InvalidLocation if invalid journal locations are given.
+    """
+    if not build_instructions.build_location:
+        raise RuntimeError("No build location was given.")
+
+    build_location = Path(build_instructions.build_location)
+    journals_site_folder = build_location.joinpath("site")
+    build_manifest_filepath = build_location.joinpath("build-manifest.toml")
+
+    rolled_back_journals: Dict[str, Path] = {}
+    for journal_name in get_journals_names_to_build(build_instructions):
+        journal_site_folder = journals_site_folder.joinpath(journal_name)
+        generations = __list_generations__(
+            __get_generations_folder__(journals_site_folder, journal_name)
+        )
+        published_generation = __get_published_generation__(journal_site_folder)
+
+        published_index = len(generations)
+        for index, generation_folder in enumerate(generations):
+            if (
+                Path(os.path.realpath(generation_folder))
+                == published_generation
+            ):
+                published_index = index
+
+        if published_index == 0:
+            continue
+
+        previous_generation = generations[published_index - 1]
+        __publish_generation__(journal_site_folder, previous_generation)
+        rolled_back_journals[journal_name] = previous_generation
+
+    if len(rolled_back_journals) > 0:
+        fingerprints = __read_build_manifest__(build_manifest_filepath)
+        for journal_name in rolled_back_journals:
+            fingerprints.pop(journal_name, None)
+        __write_build_manifest__(build_manifest_filepath, fingerprints)
+
+    return rolled_back_journals
+
+
 # -------------------- CLI --------------------
 
 
-def __start_http_server__(http_server_folder: Path, file_monitor_script: Path):
+def __start_http_server__(
+    http_server_folder: Path, build_instructions: model.BuildInstructions
+):
     """
-    Start a local http server.
+    Start a local http server and a file watcher.
 
     This function is offered as as a helper for test purposes. It expects
     that the structure of the http_server_folder is exactly the same created
     by the BuildHttpServer build step.
     """
-    t1 = multiprocessing.Process(
-        target=node_wrapper.start_server,
-        args=[http_server_folder.joinpath("init.js")],
-    )
-    t2 = multiprocessing.Process(
-        target=general_proc_call.start, args=[file_monitor_script]
-    )
+    # The watch command builds journals with this module.
+    from danoan.journal_manager.cli.commands import watch
+
+    if build_instructions.http_server_backend == http_server.NODE_BACKEND:
+        t1 = multiprocessing.Process(
+            target=node_wrapper.start_server,
+            args=[http_server_folder.joinpath("init.js")],
+        )
+    else:
+        t1 = multiprocessing.Process(
+            target=http_server.serve,
+            args=[http_server_folder.parent.joinpath("site")],
+        )
+    t2 = multiprocessing.Process(target=watch.watch, args=[build_instructions])
 
     try:
         t1.start()
     except Exception as ex:
         print(ex)
-        print(
-            "HTTP server could not be started. Make sure you have `nodejs` installed."
-        )
+        print("HTTP server could not be started.")
+        if build_instructions.http_server_backend == http_server.NODE_BACKEND:
+            print("Make sure you have `nodejs` installed.")
 
     try:
         t2.start()
     except Exception as ex:
         print(ex)
-        print(
-            "File monitor could not be started. Make sure you have `entr` installed."
-        )
+        print("File watcher could not be started.")
 
     def terminate_processes(sig, frame):
         print("Terminating http server")
         t1.terminate()
-        print("Terminating file-monitor")
+        print("Terminating file watcher")
         t2.terminate()
 
     signal.signal(signal.SIGINT, terminate_processes)
@@ -614,6 +1893,117 @@ def __merge_build_instructions__(
     return build_instructions
 
 
+def __build_with_daemon__(
+    build_instructions: model.BuildInstructions,
+) -> BuildStep:
+    """
+    Send the build instructions to the build daemon.
+
+    Relative paths are resolved before they are sent. If the daemon is not
+    running, journals are built locally.
+    """
+    # The daemon command builds journals with this module.
+    from danoan.journal_manager.cli.commands import daemon
+
+    def absolute(path: str) -> str:
+        return Path(path).expanduser().absolute().as_posix()
+
+    build_instructions = dataclasses.replace(build_instructions)
+    if build_instructions.journals_locations_to_build is not None:
+        build_instructions.journals_locations_to_build = [
+            absolute(x) for x in build_instructions.journals_locations_to_build
+        ]
+    if build_instructions.include_all_folder is not None:
+        build_instructions.include_all_folder = absolute(
+            build_instructions.include_all_folder
+        )
+
+    try:
+        response = daemon.request_build(build_instructions)
+    except exceptions.DaemonNotRunning:
+        print(
+            "The build daemon is not running. Start it with `jm daemon`. Building locally."
+        )
+        return build(build_instructions)
+
+    if response["status"] != "ok":
+        return FailedStep(BuildStep(), response["msg"])
+
+    http_server_folder = response.get("http_server_folder")
+    return BuildStep(
+        failed_journals=response["failed_journals"],
+        http_server_folder=(
+            Path(http_server_folder) if http_server_folder else None
+        ),
+    )
+
+
+def __rollback__(
+    build_location: Path,
+    build_instructions_path: Optional[Path] = None,
+    journals_names_to_build: Optional[List[str]] = None,
+    journals_locations_to_build: Optional[List[str]] = None,
+):
+    build_instructions = __merge_build_instructions__(
+        build_location.expanduser(),
+        build_instructions_path,
+        journals_names_to_build=journals_names_to_build,
+        journals_locations_to_build=journals_locations_to_build,
+    )
+
+    try:
+        rolled_back_journals = rollback(build_instructions)
+    except exceptions.InvalidName as ex:
+        print(
+            f"The following journal names are not part of the registry: {', '.join(ex.names)}"
+        )
+        exit(1)
+
+    if len(rolled_back_journals) == 0:
+        print("There is no previous generation to roll back to.")
+    for journal_name, generation_folder in rolled_back_journals.items():
+        print(f"{journal_name}: {generation_folder.name}")
+
+
+def __write_trace__(profiler: profiling.Profiler, trace_filepath: Path):
+    """
+    Write the spans of a profiler as a Chrome trace event file.
+    """
+    with file_utils.atomic_write(trace_filepath, lock=False) as f:
+        json.dump(profiler.get_trace(), f)
+
+
+def __report_profile__(
+    build_result: BuildStep,
+    profile_filepath: Optional[Path] = None,
+    profile_summary: Optional[int] = None,
+    trace_filepath: Optional[Path] = None,
+):
+    """
+    Write the profile report and the trace, and print the profile summary
+    of a build.
+    """
+    if isinstance(build_result, FailedStep):
+        build_result = build_result.build_step
+
+    profiler = build_result.__dict__.get("profiler")
+    if profiler is None:
+        print("Profiling information is not available for this build.")
+        return
+
+    if profile_filepath is not None:
+        with file_utils.atomic_write(profile_filepath, lock=False) as f:
+            json.dump(profiler.get_report(), f, indent=2)
+        print(f"Profile report written to: {profile_filepath}")
+
+    if trace_filepath is not None:
+        __write_trace__(profiler, trace_filepath)
+        print(f"Trace written to: {trace_filepath}")
+
+    if profile_summary is not None:
+        print(profiler.get_summary(profile_summary))
+
+
 def __build__(
     build_location: Path,
     build_inactive: bool = False,
@@ -622,12 +2012,32 @@ def __build__(
     journals_names_to_build: Optional[List[str]] = None,
     journals_locations_to_build: Optional[List[str]] = None,
     with_http_server: Optional[bool] = None,
+    http_server_backend: Optional[str] = None,
+    precompress: Optional[bool] = None,
     ignore_safety_questions: bool = False,
+    max_workers: Optional[int] = None,
+    build_engine: Optional[str] = None,
+    force_rebuild: bool = False,
+    via_daemon: bool = False,
+    generations_to_keep: Optional[int] = None,
+    rollback_build: bool = False,
+    profile_filepath: Optional[Path] = None,
+    profile_summary: Optional[int] = None,
+    trace_filepath: Optional[Path] = None,
     **kwargs,
 ):
     utils.ensure_configuration_file_exists()
     build_location = Path(build_location).absolute()
 
+    if rollback_build:
+        __rollback__(
+            build_location,
+            build_instructions_path,
+            journals_names_to_build,
+            journals_locations_to_build,
+        )
+        return
+
     if build_location.exists():
         if not ignore_safety_questions:
             ok_continue = input(
@@ -645,16 +2055,41 @@ def __build__(
         journals_names_to_build=journals_names_to_build,
         journals_locations_to_build=journals_locations_to_build,
         with_http_server=with_http_server,
+        http_server_backend=http_server_backend,
+        precompress=precompress,
+        max_workers=max_workers,
+        build_engine=build_engine,
+        force_rebuild=force_rebuild,
+        generations_to_keep=generations_to_keep,
     )
 
-    build_result = build(build_instructions)
+    if via_daemon:
+        build_result = __build_with_daemon__(build_instructions)
+    else:
+        build_result = build(build_instructions)
+
+    if any(
+        x is not None
+        for x in [profile_filepath, profile_summary, trace_filepath]
+    ):
+        __report_profile__(
+            build_result, profile_filepath, profile_summary, trace_filepath
+        )
 
     if not isinstance(build_result, FailedStep):
+        failed_journals = build_result["failed_journals"]
+        if len(failed_journals) > 0:
+            print("The following journals could not be built:")
+            for journal_name, error in failed_journals.items():
+                print(f"{journal_name}: {error}")
+
         if with_http_server:
-            __start_http_server__(
-                build_result.http_server_folder,
-                build_result.file_monitor_script,
-            )
+            if build_result.http_server_folder is None:
+                print("The http server was not set up by the build.")
+            else:
+                __start_http_server__(
+                    build_result.http_server_folder, build_instructions
+                )
     else:
         print(f"Build was not successful with error: {build_result.msg}.")
     pass
@@ -692,6 +2127,14 @@ def get_parser(subparser_action=None):
         type=Path,
         help="Configuration file with build instructions.",
     )
+    parser.add_argument(
+        "--build-engine",
+        choices=[
+            mkdocs_wrapper.SUBPROCESS_ENGINE,
+            mkdocs_wrapper.IN_PROCESS_ENGINE,
+        ],
+        help="How mkdocs is executed. The in-process engine avoids starting a new interpreter for each journal.",
+    )
     parser.add_argument(
         "--build-location",
         help="Directory where build artifacts will be stored. If not specified, current working directory is used",
@@ -705,11 +2148,35 @@ def get_parser(subparser_action=None):
         action="store_false",
         default=True,
     )
+    parser.add_argument(
+        "--force",
+        dest="force_rebuild",
+        action="store_true",
+        help="Build journals even if they did not change since the last build.",
+    )
+    parser.add_argument(
+        "--http-server-backend",
+        choices=[http_server.PYTHON_BACKEND, http_server.NODE_BACKEND],
+        help="Server used by --with-http-server. The python server does not need nodejs.",
+    )
     parser.add_argument(
         "--ignore-safety-questions",
         action="store_true",
         help="If specified, the program will overwrite the contents of BUILD_LOCATION without previous warning.",
     )
+    parser.add_argument(
+        "--keep-generations",
+        dest="generations_to_keep",
+        type=int,
+        help="Number of build generations kept per journal for rollback.",
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        dest="max_workers",
+        type=int,
+        help="Number of journals built concurrently. If 0, all available CPUs are used.",
+    )
     parser.add_argument(
         "--journal-name",
         "--jn",
@@ -724,6 +2191,43 @@ def get_parser(subparser_action=None):
         action="append",
         help="Location of the journal to build",
     )
+    parser.add_argument(
+        "--precompress",
+        action="store_const",
+        const=True,
+        help="Write gzip (and brotli, if installed) compressed copies of the site files for the http server.",
+    )
+    parser.add_argument(
+        "--profile",
+        dest="profile_filepath",
+        type=Path,
+        help="Write the wall and cpu time of each build step and journal to a json file.",
+    )
+    parser.add_argument(
+        "--profile-summary",
+        nargs="?",
+        type=int,
+        const=10,
+        metavar="N",
+        help="Print the N longest build steps and journal builds (default: 10).",
+    )
+    parser.add_argument(
+        "--rollback",
+        dest="rollback_build",
+        action="store_true",
+        help="Publish again the previous build of the journals instead of building them.",
+    )
+    parser.add_argument(
+        "--trace",
+        dest="trace_filepath",
+        type=Path,
+        help="Write a Chrome trace event file of the build. Open it with chrome://tracing or Perfetto.",
+    )
+    parser.add_argument(
+        "--via-daemon",
+        action="store_true",
+        help="Send the build to the build daemon started with `jm daemon`.",
+    )
     parser.add_argument(
         "--with-http-server",
         action="store_true",
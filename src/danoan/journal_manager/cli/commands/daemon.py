@@ -0,0 +1,338 @@
+from danoan.journal_manager.core import api, exceptions, model
+
+from danoan.journal_manager.cli import utils
+from danoan.journal_manager.cli.commands import build as build_command
+from danoan.journal_manager.cli.wrappers import mkdocs_wrapper
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import dataclasses
+import json
+import logging
+import os
+from pathlib import Path
+import socket
+import socketserver
+import threading
+from typing import Any, Dict, Optional, cast
+
+
+logger = logging.getLogger("danoan.journal_manager")
+
+BUILD_REQUEST = "build"
+PING_REQUEST = "ping"
+SHUTDOWN_REQUEST = "shutdown"
+
+# -------------------- Helper Functions --------------------
+
+
+def __encode_build_instructions__(
+    build_instructions: model.BuildInstructions,
+) -> Dict[str, Any]:
+    """
+    Return the build instructions as a json serializable dictionary.
+
+    Path values (e.g. the build location set by `jm build`) are sent as
+    posix strings.
+    """
+
+    def encode(value: Any) -> Any:
+        if isinstance(value, Path):
+            return value.as_posix()
+        elif isinstance(value, list):
+            return [encode(x) for x in value]
+        return value
+
+    return {
+        key: encode(value)
+        for key, value in dataclasses.asdict(build_instructions).items()
+    }
+
+
+def __decode_build_instructions__(
+    encoded_build_instructions: Dict[str, Any]
+) -> model.BuildInstructions:
+    """
+    Return the build instructions sent by `__encode_build_instructions__`.
+
+    The build location is given back as a Path, like `jm build` sets it.
+    """
+    build_instructions = model.BuildInstructions(**encoded_build_instructions)
+    if build_instructions.build_location:
+        build_instructions.__dict__["build_location"] = Path(
+            build_instructions.build_location
+        )
+    return build_instructions
+
+
+def get_socket_filepath() -> Path:
+    """
+    Return the path of the Unix socket where the build daemon listens.
+
+    The socket is located in the journal-manager configuration folder.
+    """
+    return api.get_configuration_folder().joinpath("daemon.sock")
+
+
+def __send_request__(
+    request: Dict[str, Any], socket_filepath: Optional[Path] = None
+) -> Dict[str, Any]:
+    """
+    Send a request to the build daemon and wait for its response.
+
+    Messages are json objects terminated by a newline.
+
+    Raises:
+        DaemonNotRunning if no daemon is listening on the socket.
+    """
+    if socket_filepath is None:
+        socket_filepath = get_socket_filepath()
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(socket_filepath.as_posix())
+            client.sendall(json.dumps(request).encode() + b"\n")
+            with client.makefile("r") as f:
+                response = f.readline()
+    except (FileNotFoundError, ConnectionRefusedError) as ex:
+        raise exceptions.DaemonNotRunning(socket_filepath) from ex
+
+    if not response:
+        raise exceptions.DaemonNotRunning(socket_filepath)
+    return json.loads(response)
+
+
+class BuildRequestHandler(socketserver.StreamRequestHandler):
+    """
+    Read a single request from a connection and write the response.
+    """
+
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline())
+            response = cast(BuildDaemon, self.server).dispatch(request)
+        except Exception as ex:
+            response = {"status": "error", "msg": str(ex)}
+        self.wfile.write(json.dumps(response).encode() + b"\n")
+
+
+class BuildDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Unix socket server that builds journals on request.
+
+    mkdocs, its themes and plugins are imported when the daemon starts and
+    the journals register stays cached between requests. Journals are built
+    with the in-process engine, either in the daemon process or in a pool of
+    long-lived worker processes. Builds are executed one at a time.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_filepath: Path, max_workers: int = 1):
+        self.socket_filepath = socket_filepath
+        self.build_lock = threading.Lock()
+
+        if socket_filepath.exists():
+            try:
+                __send_request__({"command": PING_REQUEST}, socket_filepath)
+                raise exceptions.DaemonAlreadyRunning(socket_filepath)
+            except exceptions.DaemonNotRunning:
+                # Left behind by a daemon that did not exit cleanly
+                socket_filepath.unlink()
+
+        mkdocs_wrapper.preload()
+        if max_workers == 0:
+            max_workers = os.cpu_count() or 1
+
+        self.executor: Optional[ProcessPoolExecutor] = None
+        if max_workers > 1:
+            self.executor = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=build_command.get_worker_pool_context(),
+                initializer=mkdocs_wrapper.preload,
+            )
+
+        super().__init__(socket_filepath.as_posix(), BuildRequestHandler)
+
+    def dispatch(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        command = request.get("command")
+        if command == PING_REQUEST:
+            return {"status": "ok"}
+        elif command == SHUTDOWN_REQUEST:
+            threading.Thread(target=self.shutdown).start()
+            return {"status": "ok"}
+        elif command == BUILD_REQUEST:
+            build_instructions = dataclasses.replace(
+                __decode_build_instructions__(request["build_instructions"]),
+                build_engine=mkdocs_wrapper.IN_PROCESS_ENGINE,
+            )
+            with self.build_lock:
+                build_result = build_command.build(
+                    build_instructions, self.executor
+                )
+
+            if isinstance(build_result, build_command.FailedStep):
+                return {"status": "error", "msg": build_result.msg}
+
+            return {
+                "status": "ok",
+                "failed_journals": build_result["failed_journals"],
+                "http_server_folder": (
+                    str(build_result.http_server_folder)
+                    if build_result.http_server_folder
+                    else None
+                ),
+            }
+
+        return {"status": "error", "msg": f"Unknown command: {command}"}
+
+    def server_close(self):
+        super().server_close()
+        if self.executor is not None:
+            self.executor.shutdown()
+        if self.socket_filepath.exists():
+            self.socket_filepath.unlink()
+
+
+# -------------------- API --------------------
+
+
+def start(socket_filepath: Optional[Path] = None, max_workers: int = 1):
+    """
+    Start a daemon that keeps mkdocs warm and builds journals on request.
+
+    The daemon listens on a Unix socket located in the journal-manager
+    configuration folder. Use `jm build --via-daemon` or
+    `jm watch --via-daemon` to send builds to the daemon. The daemon runs
+    until it is interrupted or stopped with `jm daemon --stop`.
+
+    Args:
+        socket_filepath (optional): Path of the Unix socket.
+        max_workers (optional): Number of worker processes. If 0, the number
+                                of CPUs is used. If 1, journals are built by
+                                the daemon process itself.
+    Raises:
+        DaemonAlreadyRunning if a daemon is listening on the socket.
+    """
+    if socket_filepath is None:
+        socket_filepath = get_socket_filepath()
+
+    with BuildDaemon(socket_filepath, max_workers) as server:
+        server.serve_forever()
+
+
+def stop(socket_filepath: Optional[Path] = None):
+    """
+    Stop the build daemon.
+
+    Raises:
+        DaemonNotRunning if no daemon is listening on the socket.
+    """
+    __send_request__({"command": SHUTDOWN_REQUEST}, socket_filepath)
+
+
+def request_build(
+    build_instructions: model.BuildInstructions,
+    socket_filepath: Optional[Path] = None,
+) -> Dict[str, Any]:
+    """
+    Ask the build daemon to build journals.
+
+    Paths in the build instructions are interpreted by the daemon, so they
+    should be absolute.
+
+    Args:
+        build_instructions: A BuildInstructions object.
+        socket_filepath (optional): Path of the Unix socket.
+    Returns:
+        The daemon response. Its status is "ok" or "error". In the first
+        case, failed_journals maps the journals that failed to build to the
+        error message. In the second case, msg describes the error.
+    Raises:
+        DaemonNotRunning if no daemon is listening on the socket.
+    """
+    return __send_request__(
+        {
+            "command": BUILD_REQUEST,
+            "build_instructions": __encode_build_instructions__(
+                build_instructions
+            ),
+        },
+        socket_filepath,
+    )
+
+
+# -------------------- CLI --------------------
+
+
+def __daemon__(
+    socket_filepath: Optional[Path] = None,
+    max_workers: int = 1,
+    stop_daemon: bool = False,
+    **kwargs,
+):
+    utils.ensure_configuration_file_exists()
+    if socket_filepath is None:
+        socket_filepath = get_socket_filepath()
+
+    if stop_daemon:
+        try:
+            stop(socket_filepath)
+        except exceptions.DaemonNotRunning:
+            print(f"No daemon is listening on {socket_filepath}.")
+            exit(1)
+        return
+
+    try:
+        print(f"Build daemon listening on {socket_filepath}")
+        start(socket_filepath, max_workers)
+    except exceptions.DaemonAlreadyRunning:
+        print(f"A daemon is already listening on {socket_filepath}.")
+        exit(1)
+    except KeyboardInterrupt:
+        print("Exiting build daemon")
+
+
+def get_parser(subparser_action=None):
+    command_name = "daemon"
+    command_description = start.__doc__ if start.__doc__ else ""
+    command_help = command_description.split(".")[0]
+
+    parser = None
+    if subparser_action:
+        parser = subparser_action.add_parser(
+            command_name,
+            description=command_description,
+            help=command_help,
+            formatter_class=argparse.RawDescriptionHelpFormatter,
+        )
+    else:
+        parser = argparse.ArgumentParser(
+            command_name,
+            description=command_description,
+            formatter_class=argparse.RawDescriptionHelpFormatter,
+        )
+
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        dest="max_workers",
+        type=int,
+        default=1,
+        help="Number of worker processes. If 0, all available CPUs are used.",
+    )
+    parser.add_argument(
+        "--socket",
+        dest="socket_filepath",
+        type=Path,
+        help="Path of the Unix socket. By default, daemon.sock in the configuration folder.",
+    )
+    parser.add_argument(
+        "--stop",
+        dest="stop_daemon",
+        action="store_true",
+        help="Stop the running daemon.",
+    )
+    parser.set_defaults(func=__daemon__)
+
+    return parser
@@ -1,18 +1,58 @@
 from danoan.journal_manager.core import api, exceptions, model
 
 from danoan.journal_manager.cli import utils
-from danoan.journal_manager.cli.commands.journal_commands import (
-    activate,
-    create,
-    deactivate,
-    deregister,
-    edit,
-    show,
-    register,
-)
 
 import argparse
 
+JOURNAL_COMMANDS_PACKAGE = (
+    "danoan.journal_manager.cli.commands.journal_commands"
+)
+
+LAZY_COMMANDS = [
+    utils.LazyCommand(
+        "activate",
+        f"{JOURNAL_COMMANDS_PACKAGE}.activate",
+        "Activate a journal",
+        ("act",),
+    ),
+    utils.LazyCommand(
+        "create",
+        f"{JOURNAL_COMMANDS_PACKAGE}.create",
+        "Creates a mkdocs journal file structure",
+        ("c",),
+    ),
+    utils.LazyCommand(
+        "deactivate",
+        f"{JOURNAL_COMMANDS_PACKAGE}.deactivate",
+        "Deactivate a journal to be built",
+        ("dct",),
+    ),
+    utils.LazyCommand(
+        "deregister",
+        f"{JOURNAL_COMMANDS_PACKAGE}.deregister",
+        "Deregister a journal from the list of registered journals",
+        ("d",),
+    ),
+    utils.LazyCommand(
+        "edit",
+        f"{JOURNAL_COMMANDS_PACKAGE}.edit",
+        "Edit journal files",
+        ("e",),
+    ),
+    utils.LazyCommand(
+        "show",
+        f"{JOURNAL_COMMANDS_PACKAGE}.show",
+        "Get attribute data from a registered journal",
+        ("s",),
+    ),
+    utils.LazyCommand(
+        "register",
+        f"{JOURNAL_COMMANDS_PACKAGE}.register",
+        "Register an existing journal structure to the list of managed journals",
+        ("r",),
+    ),
+]
+
 # -------------------- API --------------------
 
 
@@ -59,7 +99,7 @@ def __list_journals__(list_all: bool, **kwargs):
         print("There is no journal registered yet.")
 
 
-def get_parser(subparser_action=None):
+def get_parser(subparser_action=None, argv=None):
     command_name = "journal"
     command_description = """
     Collection of commands to edit journals. 
@@ -89,19 +129,8 @@ def get_parser(subparser_action=None):
         help="List all journals, including the inactive ones",
     )
 
-    list_of_commands = [
-        activate,
-        create,
-        deactivate,
-        deregister,
-        edit,
-        show,
-        register,
-    ]
-
     subparser_action = parser.add_subparsers(title="Journal subcommands")
-    for command in list_of_commands:
-        command.get_parser(subparser_action)
+    utils.register_lazy_commands(subparser_action, LAZY_COMMANDS, argv)
 
     parser.set_defaults(
         subcommand_help=parser.print_help, func=__list_journals__
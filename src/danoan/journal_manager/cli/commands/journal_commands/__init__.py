@@ -1,7 +1,21 @@
-from . import activate
-from . import create
-from . import deactivate
-from . import deregister
-from . import edit
-from . import register
-from . import show
+"""
+Subcommand modules are imported on first access, e.g. `journal_commands.activate`.
+"""
+
+import importlib
+
+__all__ = [
+    "activate",
+    "create",
+    "deactivate",
+    "deregister",
+    "edit",
+    "register",
+    "show",
+]
+
+
+def __getattr__(name):
+    if name in __all__:
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
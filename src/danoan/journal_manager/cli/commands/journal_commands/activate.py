@@ -21,23 +21,18 @@ def activate(journal_names: List[str]):
     Raises:
         InvalidName if one or more journal names are not present in the list of registered journals.
     """
-    journal_data_file = api.get_journal_data_file()
-
-    updated_journal_data_list = []
-    not_found_journal_names = []
-    for journal_name in journal_names:
-        journal = api.find_journal_by_name(journal_data_file, journal_name)
-        if journal:
-            journal.active = True
-            updated_journal_data_list.append(journal)
-        else:
-            not_found_journal_names.append(journal_name)
-
-    if len(not_found_journal_names) > 0:
-        raise exceptions.InvalidName(not_found_journal_names)
-
-    for journal in updated_journal_data_list:
-        api.update_journal(journal_data_file, journal)
+    with api.journal_data_transaction() as transaction:
+        not_found_journal_names = []
+        for journal_name in journal_names:
+            journal = transaction.find_journal_by_name(journal_name)
+            if journal:
+                journal.active = True
+                transaction.update_journal(journal)
+            else:
+                not_found_journal_names.append(journal_name)
+
+        if len(not_found_journal_names) > 0:
+            raise exceptions.InvalidName(not_found_journal_names)
 
 
 # -------------------- CLI --------------------
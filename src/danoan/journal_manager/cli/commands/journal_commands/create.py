@@ -1,4 +1,4 @@
-from danoan.journal_manager.core import api, model, exceptions
+from danoan.journal_manager.core import api, exceptions, jinja_utils, model
 from danoan.journal_manager.cli import utils
 from danoan.journal_manager.cli.wrappers import mkdocs_wrapper
 
@@ -9,7 +9,7 @@ from pathlib import Path
 import shutil
 from typing import Optional
 
-from jinja2 import Environment, FileSystemLoader, Template
+from jinja2 import Template
 
 
 # -------------------- Helper Functions --------------------
@@ -35,11 +35,7 @@ def __create_mkdocs_from_template__(
 def __create_mkdocs_from_template_name__(
     journal_data: model.JournalData, template_name: str
 ):
-    config_file = api.get_configuration_file()
-
-    journal_template_list = model.JournalTemplateList.read(
-        config_file.template_data_filepath
-    )
+    journal_template_list = api.get_template_list_file()
 
     template_entry = api.find_template_by_name(
         journal_template_list, template_name
@@ -60,7 +56,9 @@ def __create_mkdocs_from_template_name__(
         mkdocs_template_path = Path(journal_location_path).joinpath(
             "mkdocs.tpl.yml"
         )
-        env = Environment(loader=FileSystemLoader(journal_location_path))
+        # The environment of the registered template is shared by all the
+        # journals created from it.
+        env = jinja_utils.get_filesystem_environment(template_path)
         template = env.get_template("mkdocs.tpl.yml")
         __create_mkdocs_from_template__(journal_data, template)
         os.remove(mkdocs_template_path)
@@ -97,12 +95,8 @@ def create(
     Important:
         If the journal exist already it will be overwrite.
     """
-    config_file = api.get_configuration_file()
-
     journal_name = utils.journal_name_from_title(journal_title)
-    journal_data_file = model.JournalDataList.read(
-        config_file.journal_data_filepath
-    )
+    journal_data_file = api.get_journal_data_file()
 
     utils.ensure_journal_name_is_unique(journal_data_file, journal_name)
 
@@ -119,7 +113,6 @@ def create(
         journal_title,
         datetime.now().isoformat(),
     )
-    journal_data_file.list_of_journal_data.append(journal_data)
 
     if mkdocs_template_name:
         __create_mkdocs_from_template_name__(journal_data, mkdocs_template_name)
@@ -127,8 +120,7 @@ def create(
         journal_location.mkdir(parents=True)
         mkdocs_wrapper.create(journal_location)
 
-    with open(config_file.journal_data_filepath, "w") as f:
-        journal_data_file.write(f)
+    api.add_journal(journal_data_file, journal_data)
 
 
 # -------------------- CLI --------------------
@@ -23,22 +23,18 @@ def deregister(journal_names: List[str]):
     Raises:
         InvalidName if one or more journal names are not present in the list of registered journals.
     """
-    journal_data_file = api.get_journal_data_file()
-
-    not_found_journal_names = []
-    for journal_name in journal_names:
-        journal = api.find_journal_by_name(journal_data_file, journal_name)
-
-        if journal:
-            journal_data_file.list_of_journal_data.remove(journal)
-        else:
-            not_found_journal_names.append(journal_name)
-
-    if len(not_found_journal_names) > 0:
-        raise exceptions.InvalidName(not_found_journal_names)
-
-    with open(api.get_configuration_file().journal_data_filepath, "w") as f:
-        journal_data_file.write(f)
+    with api.journal_data_transaction() as transaction:
+        not_found_journal_names = []
+        for journal_name in journal_names:
+            journal = transaction.find_journal_by_name(journal_name)
+
+            if journal:
+                transaction.remove_journal(journal)
+            else:
+                not_found_journal_names.append(journal_name)
+
+        if len(not_found_journal_names) > 0:
+            raise exceptions.InvalidName(not_found_journal_names)
 
 
 # -------------------- CLI --------------------
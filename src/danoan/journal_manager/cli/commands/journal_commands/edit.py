@@ -28,8 +28,6 @@ def edit(journal_name: str):
         InvalidName if the journal name is not registered.
         InvalidAttribute if no text editor has been set.
     """
-    journal_data_file = api.get_journal_data_file()
-
     config_file = api.get_configuration_file()
 
     if not config_file.parameters.default_text_editor_path:
@@ -42,11 +40,13 @@ def edit(journal_name: str):
             "Text editor path not found. Please set it with: jm setup init."
         )
 
-    journal = api.find_journal_by_name(journal_data_file, journal_name)
-    if journal:
-        journal.last_edit_date = datetime.now().isoformat()
-        api.update_journal(journal_data_file, journal)
+    with api.journal_data_transaction() as transaction:
+        journal = transaction.find_journal_by_name(journal_name)
+        if journal:
+            journal.last_edit_date = datetime.now().isoformat()
+            transaction.update_journal(journal)
 
+    if journal:
         mkdocs_config_path = Path(journal.location_folder).joinpath(
             "mkdocs.yml"
         )
@@ -7,23 +7,24 @@ from pathlib import Path
 from typing import Optional
 
 
-# -------------------- API --------------------
+# -------------------- Helper Functions --------------------
 
 
-def register(location_folder: Path, journal_title: str):
+def __add_to_transaction__(
+    transaction: api.JournalDataTransaction,
+    location_folder: Path,
+    journal_title: str,
+):
     """
-    Register an existing journal structure to the list of managed journals.
+    Add an existing journal structure to a register transaction.
 
-    Args:
-        location_folder: Directory where the journal files are located
-        journal_title: The title of the journal.
     Raises:
+        InvalidName if a journal with the same name is registered already.
         InvalidLocation if the given location folder does not exist.
     """
-    journal_data_file = api.get_journal_data_file()
-
     journal_name = utils.journal_name_from_title(journal_title)
-    utils.ensure_journal_name_is_unique(journal_data_file, journal_name)
+    if transaction.find_journal_by_name(journal_name) is not None:
+        raise exceptions.InvalidName([journal_name])
 
     if not location_folder.exists():
         raise exceptions.InvalidLocation(location_folder)
@@ -35,10 +36,25 @@ def register(location_folder: Path, journal_title: str):
         journal_title,
         datetime.now().isoformat(),
     )
-    journal_data_file.list_of_journal_data.append(journal_data)
+    transaction.add_journal(journal_data)
+
+
+# -------------------- API --------------------
+
 
-    with open(api.get_configuration_file().journal_data_filepath, "w") as f:
-        journal_data_file.write(f)
+def register(location_folder: Path, journal_title: str):
+    """
+    Register an existing journal structure to the list of managed journals.
+
+    Args:
+        location_folder: Directory where the journal files are located
+        journal_title: The title of the journal.
+    Raises:
+        InvalidName if a journal with the same name is registered already.
+        InvalidLocation if the given location folder does not exist.
+    """
+    with api.journal_data_transaction() as transaction:
+        __add_to_transaction__(transaction, location_folder, journal_title)
 
 
 # -------------------- CLI --------------------
@@ -53,6 +69,11 @@ def __register__(
 
     try:
         register(Path(location_folder), journal_title)
+    except exceptions.InvalidName as ex:
+        print(
+            f"A journal with name {', '.join(ex.names)} is registered already. Please, choose a different name."
+        )
+        exit(1)
     except exceptions.InvalidLocation as ex:
         print(
             f"The given directory: {ex.locations} does not exist. Please specify an existing directory."
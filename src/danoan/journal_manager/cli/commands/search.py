@@ -0,0 +1,371 @@
+from danoan.journal_manager.core import api, model
+
+from danoan.journal_manager.cli import utils
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+import os
+from pathlib import Path
+import sqlite3
+from typing import Dict, List, Optional, Tuple
+
+SEARCH_INDEX_VERSION = 2
+
+# -------------------- Helper Functions --------------------
+
+
+def get_search_index_filepath() -> Path:
+    """
+    Return the path of the full-text search index of the journals.
+
+    The index is located in the journal-manager configuration folder.
+    """
+    return api.get_configuration_folder().joinpath("search-index.sqlite3")
+
+
+def __connect__(search_index_filepath: Path) -> sqlite3.Connection:
+    """
+    Open the search index, creating its tables if necessary.
+
+    Indexes created by another version of journal-manager are recreated.
+    """
+    connection = sqlite3.connect(search_index_filepath.as_posix())
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+
+    version = connection.execute("PRAGMA user_version").fetchone()[0]
+    if version != SEARCH_INDEX_VERSION:
+        connection.executescript(
+            f"""
+            DROP TABLE IF EXISTS files;
+            DROP TABLE IF EXISTS documents;
+            CREATE TABLE files(
+                id INTEGER PRIMARY KEY,
+                path TEXT UNIQUE NOT NULL,
+                journal TEXT NOT NULL,
+                active INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                size INTEGER NOT NULL
+            );
+            CREATE VIRTUAL TABLE documents USING fts5(
+                title, content, tokenize='unicode61 remove_diacritics 2'
+            );
+            PRAGMA user_version = {SEARCH_INDEX_VERSION};
+            """
+        )
+    return connection
+
+
+def __scan_journal__(
+    journal_data: model.JournalData,
+) -> Dict[str, Tuple[int, int]]:
+    """
+    Return the modification time and the size of the markdown files of a
+    journal by path.
+
+    Hidden folders are skipped.
+    """
+    docs_folder = (
+        Path(journal_data.location_folder).expanduser().joinpath("docs")
+    )
+    markdown_files: Dict[str, Tuple[int, int]] = {}
+    folders = [docs_folder.as_posix()]
+    while len(folders) > 0:
+        try:
+            entries = os.scandir(folders.pop())
+        except OSError:
+            continue
+
+        with entries:
+            for entry in entries:
+                if entry.name.startswith("."):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    folders.append(entry.path)
+                elif entry.name.endswith(".md") and entry.is_file():
+                    stat = entry.stat()
+                    markdown_files[entry.path] = (
+                        stat.st_mtime_ns,
+                        stat.st_size,
+                    )
+    return markdown_files
+
+
+def __read_markdown__(filepath: str) -> Tuple[str, str]:
+    """
+    Return the title and the content of a markdown file.
+
+    The title is the first level one heading or, if there is none, the
+    file name.
+    """
+    content = Path(filepath).read_text(errors="replace")
+    title = Path(filepath).stem
+    for line in content.splitlines():
+        if line.startswith("# "):
+            title = line[2:].strip()
+            break
+    return title, content
+
+
+def __sync_active_flags__(
+    connection: sqlite3.Connection, journals: List[model.JournalData]
+):
+    """
+    Copy the active flag of the registered journals to their indexed files.
+
+    Only the rows of journals whose flag changed are written.
+    """
+    with connection:
+        connection.executemany(
+            "UPDATE files SET active = ? WHERE journal = ? AND active != ?",
+            [(x.active, x.name, x.active) for x in journals],
+        )
+
+
+def __quote_query__(query: str) -> str:
+    """
+    Turn each word of the query into a string, so FTS5 operators and
+    punctuation are searched literally.
+    """
+    return " ".join('"' + x.replace('"', '""') + '"' for x in query.split())
+
+
+# -------------------- API --------------------
+
+
+def update_index(
+    journals_names: Optional[List[str]] = None,
+    max_workers: Optional[int] = None,
+    search_index_filepath: Optional[Path] = None,
+) -> Dict[str, int]:
+    """
+    Update the full-text search index with the markdown files of the journals.
+
+    The docs folders of the registered journals, active or not, are scanned
+    in parallel. Only the files whose modification time or size changed are
+    read again. The active flag of the indexed files is kept in sync with
+    the register, so activating or deactivating a journal does not read its
+    files again. Files of journals that are not registered anymore are
+    removed.
+
+    Args:
+        journals_names (optional): Update only the files of these journals.
+                                   By default, all journals are updated.
+        max_workers (optional): Number of threads scanning and reading files.
+        search_index_filepath (optional): Path of the search index.
+    Returns:
+        The number of added, updated and removed files.
+    """
+    if search_index_filepath is None:
+        search_index_filepath = get_search_index_filepath()
+
+    registered_journals = api.get_journal_data_file().list_of_journal_data
+    journals = [
+        x
+        for x in registered_journals
+        if journals_names is None or x.name in journals_names
+    ]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor, closing(
+        __connect__(search_index_filepath)
+    ) as connection:
+        scanned_files: Dict[str, Tuple[str, int, int]] = {}
+        for journal_data, markdown_files in zip(
+            journals, executor.map(__scan_journal__, journals)
+        ):
+            for filepath, (mtime_ns, size) in markdown_files.items():
+                scanned_files[filepath] = (journal_data.name, mtime_ns, size)
+
+        sql = "SELECT id, path, journal, mtime_ns, size FROM files"
+        parameters: List[str] = []
+        if journals_names is not None:
+            sql += f" WHERE journal IN ({', '.join('?' * len(journals_names))})"
+            parameters.extend(journals_names)
+
+        indexed_files = {
+            path: (file_id, (journal, mtime_ns, size))
+            for file_id, path, journal, mtime_ns, size in connection.execute(
+                sql, parameters
+            )
+        }
+        removed_ids = [
+            file_id
+            for path, (file_id, _) in indexed_files.items()
+            if path not in scanned_files
+        ]
+        changed_files = [
+            path
+            for path, file_info in scanned_files.items()
+            if path not in indexed_files or indexed_files[path][1] != file_info
+        ]
+        updated_ids = [
+            indexed_files[x][0] for x in changed_files if x in indexed_files
+        ]
+
+        with connection:
+            connection.executemany(
+                "DELETE FROM documents WHERE rowid = ?",
+                [(x,) for x in removed_ids + updated_ids],
+            )
+            connection.executemany(
+                "DELETE FROM files WHERE id = ?",
+                [(x,) for x in removed_ids + updated_ids],
+            )
+            for path, (title, content) in zip(
+                changed_files, executor.map(__read_markdown__, changed_files)
+            ):
+                journal, mtime_ns, size = scanned_files[path]
+                cursor = connection.execute(
+                    "INSERT INTO files(path, journal, active, mtime_ns, size) VALUES (?, ?, 0, ?, ?)",
+                    (path, journal, mtime_ns, size),
+                )
+                connection.execute(
+                    "INSERT INTO documents(rowid, title, content) VALUES (?, ?, ?)",
+                    (cursor.lastrowid, title, content),
+                )
+        __sync_active_flags__(connection, registered_journals)
+
+    return {
+        "added": len(changed_files) - len(updated_ids),
+        "updated": len(updated_ids),
+        "removed": len(removed_ids),
+    }
+
+
+def search(
+    query: str,
+    limit: int = 10,
+    journals_names: Optional[List[str]] = None,
+    include_inactive: bool = False,
+    update: bool = False,
+    search_index_filepath: Optional[Path] = None,
+) -> List[model.SearchResult]:
+    """
+    Search the markdown files of all journals.
+
+    Results are ranked with BM25, matches in the title of a page count
+    more than matches in its content. The query accepts the FTS5 syntax,
+    e.g. `"exact phrase"`, `prefix*`, `word1 OR word2`, `word1 NOT word2`.
+    The search index is stored in the configuration folder. It is updated
+    by `jm build`, `jm watch` and `jm search --update`.
+
+    Args:
+        query: Words to search.
+        limit (optional): Maximum number of results.
+        journals_names (optional): Search only the files of these journals.
+        include_inactive (optional): If True, inactive journals are searched.
+        update (optional): If True, the search index is updated before the
+                           search. An index that does not exist yet is
+                           always created.
+        search_index_filepath (optional): Path of the search index.
+    Returns:
+        The list of results, best match first.
+    """
+    if search_index_filepath is None:
+        search_index_filepath = get_search_index_filepath()
+
+    if update or not search_index_filepath.exists():
+        update_index(search_index_filepath=search_index_filepath)
+
+    if not query.strip():
+        return []
+
+    sql = """
+        SELECT files.journal, files.path, documents.title,
+               snippet(documents, 1, '[', ']', '...', 16),
+               bm25(documents, 10.0, 1.0) AS score
+        FROM documents JOIN files ON files.id = documents.rowid
+        WHERE documents MATCH ?
+    """
+    parameters: List = [query]
+    if not include_inactive:
+        sql += " AND files.active = 1"
+    if journals_names:
+        sql += f" AND files.journal IN ({', '.join('?' * len(journals_names))})"
+        parameters.extend(journals_names)
+    sql += " ORDER BY score LIMIT ?"
+    parameters.append(limit)
+
+    with closing(__connect__(search_index_filepath)) as connection:
+        __sync_active_flags__(
+            connection, api.get_journal_data_file().list_of_journal_data
+        )
+        try:
+            rows = connection.execute(sql, parameters).fetchall()
+        except sqlite3.OperationalError:
+            # Not a valid FTS5 query, e.g. it contains punctuation.
+            parameters[0] = __quote_query__(query)
+            rows = connection.execute(sql, parameters).fetchall()
+
+    return [model.SearchResult(*row) for row in rows]
+
+
+# -------------------- CLI --------------------
+
+
+def __search__(
+    query: List[str],
+    limit: int = 10,
+    journals_names: Optional[List[str]] = None,
+    include_inactive: bool = False,
+    update: bool = False,
+    **kwargs,
+):
+    utils.ensure_configuration_file_exists()
+    results = search(
+        " ".join(query), limit, journals_names, include_inactive, update
+    )
+    for result in results:
+        print(f"{result.journal}: {result.path}")
+        print(f"    {result.title}: {' '.join(result.snippet.split())}")
+
+
+def get_parser(subparser_action=None):
+    command_name = "search"
+    command_description = search.__doc__ if search.__doc__ else ""
+    command_help = command_description.split(".")[0]
+
+    parser = None
+    if subparser_action:
+        parser = subparser_action.add_parser(
+            command_name,
+            description=command_description,
+            help=command_help,
+            formatter_class=argparse.RawDescriptionHelpFormatter,
+        )
+    else:
+        parser = argparse.ArgumentParser(
+            command_name,
+            description=command_description,
+            formatter_class=argparse.RawDescriptionHelpFormatter,
+        )
+
+    parser.add_argument("query", nargs="+", help="Words to search.")
+    parser.add_argument(
+        "--include-inactive",
+        action="store_true",
+        help="If passed, inactive journals are also searched.",
+    )
+    parser.add_argument(
+        "--journal-name",
+        "--jn",
+        dest="journals_names",
+        action="append",
+        help="Name of a journal to search. By default, all journals are searched.",
+    )
+    parser.add_argument(
+        "--limit",
+        "-n",
+        type=int,
+        default=10,
+        help="Maximum number of results.",
+    )
+    parser.add_argument(
+        "--update",
+        action="store_true",
+        help="Update the index with the modified files before the search.",
+    )
+    parser.set_defaults(func=__search__)
+
+    return parser
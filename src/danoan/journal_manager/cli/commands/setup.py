@@ -1,11 +1,26 @@
-from danoan.journal_manager.core import api, exceptions
+from danoan.journal_manager.core import api, backends, exceptions
+from danoan.journal_manager.cli import utils
 from danoan.journal_manager.cli.wrappers import nvim_wrapper
-from danoan.journal_manager.cli.commands.setup_commands import init
 
 import argparse
 from pathlib import Path
 from typing import Optional
 
+SETUP_COMMANDS_PACKAGE = "danoan.journal_manager.cli.commands.setup_commands"
+
+LAZY_COMMANDS = [
+    utils.LazyCommand(
+        "init",
+        f"{SETUP_COMMANDS_PACKAGE}.init",
+        "Initialize journal-manager settings",
+    ),
+    utils.LazyCommand(
+        "migrate-registry",
+        f"{SETUP_COMMANDS_PACKAGE}.migrate_registry",
+        "Move the journals register to a different storage backend",
+    ),
+]
+
 # -------------------- API --------------------
 
 
@@ -34,6 +49,10 @@ def edit_config_file():
 
 def edit_journal_data_file():
     config_file = api.get_configuration_file()
+    if config_file.journal_data_backend != backends.TOML_BACKEND:
+        raise NotImplementedError(
+            "Only journals registers stored as toml can be edited as text."
+        )
     edit_file(Path(config_file.journal_data_filepath))
 
 
@@ -48,15 +67,22 @@ def edit_template_data_file():
 def __open_config_file__(
     journal: Optional[bool], template: Optional[bool], **kwargs
 ):
-    if journal:
-        edit_journal_data_file()
-    elif template:
-        edit_template_data_file()
-    else:
-        edit_config_file()
-
-
-def get_parser(subparser_action=None):
+    try:
+        if journal:
+            edit_journal_data_file()
+        elif template:
+            edit_template_data_file()
+        else:
+            edit_config_file()
+    except NotImplementedError as ex:
+        print(ex)
+        exit(1)
+    except exceptions.InvalidAttribute as ex:
+        print(f"{ex.msg} To set one, run: jm setup init.")
+        exit(1)
+
+
+def get_parser(subparser_action=None, argv=None):
     command_name = "setup"
     command_description = """
     Configure journal-manager settings.
@@ -78,10 +104,8 @@ def get_parser(subparser_action=None):
             command_name, description=command_description
         )
 
-    list_of_commands = [init]
     subparser_action = parser.add_subparsers(title="Setup subcommands")
-    for command in list_of_commands:
-        command.get_parser(subparser_action)
+    utils.register_lazy_commands(subparser_action, LAZY_COMMANDS, argv)
 
     group = parser.add_mutually_exclusive_group()
 
@@ -1 +1,13 @@
-from . import init
+"""
+Subcommand modules are imported on first access, e.g. `setup_commands.init`.
+"""
+
+import importlib
+
+__all__ = ["init", "migrate_registry"]
+
+
+def __getattr__(name):
+    if name in __all__:
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
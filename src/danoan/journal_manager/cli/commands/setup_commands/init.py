@@ -33,8 +33,7 @@ def init_journal_manager(
         default_text_editor_path.as_posix()
     )
 
-    with open(api.get_configuration_filepath(), "w") as f:
-        config_file.write(f)
+    api.write_configuration_file(config_file)
 
 
 # -------------------- CLI --------------------
@@ -107,6 +106,7 @@ def __init_journal_manager__(
               default_journal_folder={config_file.default_journal_folder}
               default_template_folder={config_file.default_template_folder}
               journal_data_filepath={config_file.journal_data_filepath}
+              journal_data_backend={config_file.journal_data_backend}
               template_data_filepath={config_file.template_data_filepath}
               
               default_text_editor_path={config_file.parameters.default_text_editor_path}
@@ -0,0 +1,116 @@
+from danoan.journal_manager.core import api, backends, exceptions
+from danoan.journal_manager.cli import utils
+
+import argparse
+from pathlib import Path
+from typing import Optional
+
+
+# -------------------- API --------------------
+
+
+def migrate_registry(
+    backend_name: str, journal_data_filepath: Optional[Path] = None
+) -> Path:
+    """
+    Move the journals register to a different storage backend.
+
+    The registered journals are copied to the new backend and the
+    configuration file is updated to use it. The previous register
+    file is kept untouched.
+
+    Available backends: toml, sqlite.
+
+    Args:
+        backend_name: Name of the target backend.
+        journal_data_filepath (optional): Path to the new register file. If empty,
+                                          journal_data.<backend_name> is created in
+                                          the configuration folder.
+    Returns:
+        The path to the new register file.
+    Raises:
+        InvalidAttribute if the backend name is unknown or if it is the current backend.
+        InvalidLocation if the new register file exists already.
+    """
+    config_file = api.get_configuration_file()
+    if backend_name == config_file.journal_data_backend:
+        raise exceptions.InvalidAttribute(
+            f"The journals register is already stored with the {backend_name} backend."
+        )
+
+    if journal_data_filepath is None:
+        journal_data_filepath = api.get_configuration_folder().joinpath(
+            f"journal_data.{backend_name}"
+        )
+    journal_data_filepath = journal_data_filepath.expanduser()
+
+    target_backend = backends.get_backend(backend_name, journal_data_filepath)
+    if journal_data_filepath.exists():
+        raise exceptions.InvalidLocation(journal_data_filepath)
+
+    target_backend.write(api.get_journal_data_file())
+
+    config_file.journal_data_backend = backend_name
+    config_file.journal_data_filepath = journal_data_filepath.as_posix()
+    api.write_configuration_file(config_file)
+
+    return journal_data_filepath
+
+
+# -------------------- CLI --------------------
+
+
+def __migrate_registry__(
+    backend_name: str, journal_data_filepath: Optional[Path] = None, **kwargs
+):
+    utils.ensure_configuration_file_exists()
+    try:
+        new_filepath = migrate_registry(backend_name, journal_data_filepath)
+        print(f"The journals register was migrated to: {new_filepath}")
+    except exceptions.InvalidAttribute as ex:
+        print(ex.msg)
+        exit(1)
+    except exceptions.InvalidLocation as ex:
+        print(
+            f"The file {ex.locations} exists already. Remove it or choose another location with --journal-data-filepath."
+        )
+        exit(1)
+
+
+def get_parser(subparser_action=None):
+    command_name = "migrate-registry"
+    command_description = (
+        migrate_registry.__doc__ if migrate_registry.__doc__ else ""
+    )
+    command_help = command_description.split(".")[0]
+
+    parser = None
+    if subparser_action:
+        parser = subparser_action.add_parser(
+            command_name,
+            description=command_description,
+            help=command_help,
+            formatter_class=argparse.RawTextHelpFormatter,
+        )
+    else:
+        parser = argparse.ArgumentParser(
+            command_name,
+            description=command_description,
+            formatter_class=argparse.RawTextHelpFormatter,
+        )
+
+    parser.add_argument(
+        "backend_name",
+        choices=backends.list_backends(),
+        help="Storage backend of the journals register.",
+    )
+    parser.add_argument(
+        "--journal-data-filepath",
+        type=Path,
+        help="Path to the new register file.",
+    )
+    parser.set_defaults(
+        subcommand_help=parser.print_help, func=__migrate_registry__
+    )
+
+    return parser
@@ -1,14 +1,31 @@
 from danoan.journal_manager.core import api, exceptions
 from danoan.journal_manager.cli import utils
-from danoan.journal_manager.cli.commands.template_commands import (
-    register,
-    remove,
-    show,
-)
 
 import argparse
 from typing import Iterable
 
+TEMPLATE_COMMANDS_PACKAGE = (
+    "danoan.journal_manager.cli.commands.template_commands"
+)
+
+LAZY_COMMANDS = [
+    utils.LazyCommand(
+        "register",
+        f"{TEMPLATE_COMMANDS_PACKAGE}.register",
+        "Register a journal template",
+    ),
+    utils.LazyCommand(
+        "remove",
+        f"{TEMPLATE_COMMANDS_PACKAGE}.remove",
+        "Remove a template from the registered templates list",
+    ),
+    utils.LazyCommand(
+        "show",
+        f"{TEMPLATE_COMMANDS_PACKAGE}.show",
+        "Get attribute data from a registered template",
+    ),
+]
+
 
 # -------------------- API --------------------
 
@@ -43,7 +60,7 @@ def __list_templates__(**kwargs):
         print("No template registered yet.")
 
 
-def get_parser(subparser_action=None):
+def get_parser(subparser_action=None, argv=None):
     command_name = "template"
     command_description = """
     Collection of commands to manage journal templates.
@@ -69,10 +86,7 @@ def get_parser(subparser_action=None):
         )
 
     subparser_action = parser.add_subparsers()
-
-    list_of_commands = [register, remove, show]
-    for command in list_of_commands:
-        command.get_parser(subparser_action)
+    utils.register_lazy_commands(subparser_action, LAZY_COMMANDS, argv)
 
     parser.set_defaults(
         subcommand_help=parser.print_help, func=__list_templates__
@@ -0,0 +1,13 @@
+"""
+Subcommand modules are imported on first access, e.g. `template_commands.register`.
+"""
+
+import importlib
+
+__all__ = ["register", "remove", "show"]
+
+
+def __getattr__(name):
+    if name in __all__:
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
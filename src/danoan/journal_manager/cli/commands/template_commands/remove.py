@@ -34,10 +34,7 @@ def remove(template_name: str):
             )
         template_list_file.list_of_template_data.remove(template)
 
-        with open(
-            api.get_configuration_file().template_data_filepath, "w"
-        ) as f:
-            template_list_file.write(f)
+        api.write_template_list_file(template_list_file)
     else:
         raise exceptions.InvalidName()
 
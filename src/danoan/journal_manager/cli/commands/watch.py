@@ -0,0 +1,518 @@
+from danoan.journal_manager.core import api, exceptions, model, profiling
+
+from danoan.journal_manager.cli import utils
+from danoan.journal_manager.cli.commands import build as build_command
+from danoan.journal_manager.cli.commands import daemon
+from danoan.journal_manager.cli.wrappers import mkdocs_wrapper
+
+import argparse
+import dataclasses
+import logging
+from pathlib import Path
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from watchdog.events import (
+    EVENT_TYPE_CREATED,
+    EVENT_TYPE_DELETED,
+    EVENT_TYPE_MODIFIED,
+    EVENT_TYPE_MOVED,
+    FileSystemEvent,
+    FileSystemEventHandler,
+)
+from watchdog.observers import Observer
+from watchdog.observers.api import BaseObserver
+from watchdog.observers.polling import PollingObserver
+
+
+logger = logging.getLogger("danoan.journal_manager")
+
+# Events that do not modify the file system (e.g. opened) are ignored.
+__content_events__ = {
+    EVENT_TYPE_CREATED,
+    EVENT_TYPE_DELETED,
+    EVENT_TYPE_MODIFIED,
+    EVENT_TYPE_MOVED,
+}
+
+# -------------------- Helper Functions --------------------
+
+
+def __find_journal_by_path__(
+    journal_data_file: model.JournalDataList, path: Path
+) -> Optional[model.JournalData]:
+    """
+    Return the registered journal that contains a path.
+
+    The path and each of its parents are looked up in the location index
+    of the registry. The cost is proportional to the depth of the path and
+    it does not depend on the number of registered journals.
+    """
+    for candidate in [path, *path.parents]:
+        journal_data = journal_data_file.find_by_location(str(candidate))
+        if len(journal_data) > 0:
+            return journal_data[0]
+    return None
+
+
+class JournalEventHandler(FileSystemEventHandler):
+    """
+    Translate file system events in journal names.
+
+    Events of files that are not part of a watched journal, as well as
+    events of files located in ignored folders (e.g. the build location),
+    are discarded.
+    """
+
+    def __init__(
+        self,
+        journal_data_file: model.JournalDataList,
+        on_journal_modified: Callable[[str], None],
+        ignored_folders: Iterable[Path] = (),
+    ):
+        super().__init__()
+        self.journal_data_file = journal_data_file
+        self.on_journal_modified = on_journal_modified
+        self.ignored_folders = [
+            Path(model.normalize_location(str(x))) for x in ignored_folders
+        ]
+
+    def _is_ignored(self, path: Path) -> bool:
+        if ".git" in path.parts:
+            return True
+        return any(
+            path == folder or folder in path.parents
+            for folder in self.ignored_folders
+        )
+
+    def on_any_event(self, event: FileSystemEvent):
+        if event.event_type not in __content_events__:
+            return
+
+        paths = [event.src_path]
+        if event.event_type == EVENT_TYPE_MOVED:
+            paths.append(event.dest_path)
+
+        for src_path in paths:
+            if isinstance(src_path, bytes):
+                src_path = src_path.decode()
+            path = Path(model.normalize_location(src_path))
+            if self._is_ignored(path):
+                continue
+
+            journal_data = __find_journal_by_path__(
+                self.journal_data_file, path
+            )
+            if journal_data:
+                self.on_journal_modified(journal_data.name)
+
+
+class RebuildQueue:
+    """
+    Debounce and coalesce rebuild requests of journals.
+
+    A journal becomes ready to be rebuilt once no request for it was
+    received during debounce_window seconds. Repeated requests of a pending
+    journal are merged in a single rebuild. A journal that is being rebuilt
+    is never handed out again until `task_done` is called. Requests received
+    in the meantime schedule exactly one follow-up rebuild.
+
+    The queue is thread-safe: requests are usually put by the file watcher
+    thread and consumed by the thread that runs the builds.
+    """
+
+    def __init__(self, debounce_window: float = 0.5):
+        self.debounce_window = debounce_window
+        self._condition = threading.Condition()
+        # Pending journal name -> monotonic time at which it is ready.
+        self._ready_times: Dict[str, float] = {}
+        self._building: Set[str] = set()
+
+    def put(self, journal_name: str):
+        """
+        Request the rebuild of a journal.
+
+        The debounce window of the journal starts again.
+        """
+        with self._condition:
+            self._ready_times[journal_name] = (
+                time.monotonic() + self.debounce_window
+            )
+            self._condition.notify_all()
+
+    def get(self, timeout: Optional[float] = None) -> List[str]:
+        """
+        Return the journals that are ready to be rebuilt.
+
+        The returned journals are marked as being built.
+
+        Args:
+            timeout (optional): Maximum number of seconds to wait for a journal
+                                to be ready. If None, wait until there is one.
+        Returns:
+            A sorted list of journal names. It is empty if the timeout expired.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                ready_journals = sorted(
+                    name
+                    for name, ready_time in self._ready_times.items()
+                    if ready_time <= now and name not in self._building
+                )
+                if len(ready_journals) > 0:
+                    for name in ready_journals:
+                        del self._ready_times[name]
+                        self._building.add(name)
+                    return ready_journals
+
+                wait_times = [
+                    ready_time - now
+                    for name, ready_time in self._ready_times.items()
+                    if name not in self._building
+                ]
+                if deadline is not None:
+                    if now >= deadline:
+                        return []
+                    wait_times.append(deadline - now)
+
+                self._condition.wait(min(wait_times) if wait_times else None)
+
+    def task_done(self, journals_names: Iterable[str]):
+        """
+        Signal that the rebuild of journals returned by `get` is finished.
+        """
+        with self._condition:
+            self._building.difference_update(journals_names)
+            self._condition.notify_all()
+
+    def pending(self) -> List[str]:
+        """
+        Return the journals waiting to be rebuilt.
+        """
+        with self._condition:
+            return sorted(self._ready_times.keys())
+
+
+def __start_observer__(
+    event_handler: FileSystemEventHandler,
+    folders: Iterable[Path],
+    use_polling: bool = False,
+    polling_interval: float = 1.0,
+) -> BaseObserver:
+    """
+    Start an observer that recursively watches a list of folders.
+
+    The native observer (inotify on Linux) watches directories, not files,
+    and it follows directories created after the start. If the native
+    observer cannot be started (e.g. the inotify watch limit is reached),
+    a polling observer is used instead.
+    """
+
+    def start(observer: BaseObserver) -> BaseObserver:
+        for folder in folders:
+            observer.schedule(event_handler, folder.as_posix(), recursive=True)
+        observer.start()
+        return observer
+
+    if not use_polling:
+        try:
+            return start(Observer())
+        except OSError as ex:
+            logger.warning(
+                f"Native file watcher could not be started ({ex}). Falling back to polling."
+            )
+
+    return start(PollingObserver(timeout=polling_interval))
+
+
+def __rebuild_journals__(
+    build_instructions: model.BuildInstructions,
+    journals_names: List[str],
+    via_daemon: bool = False,
+    profiler: Optional[profiling.Profiler] = None,
+):
+    """
+    Rebuild a set of journals in the current process or in the build daemon.
+
+    The index page and the http server are not rebuilt. If the build daemon
+    is not running, journals are rebuilt in the current process. Rebuilds
+    done by the daemon are not recorded by the profiler. Errors of a daemon
+    request are logged, so they do not stop the watcher.
+    """
+    rebuild_instructions = dataclasses.replace(
+        build_instructions,
+        journals_names_to_build=journals_names,
+        journals_locations_to_build=None,
+        include_all_folder=None,
+        build_index=False,
+        with_http_server=False,
+        build_engine=mkdocs_wrapper.IN_PROCESS_ENGINE,
+    )
+
+    logger.info(f"Rebuilding: {', '.join(journals_names)}")
+    if via_daemon:
+        try:
+            response = daemon.request_build(rebuild_instructions)
+            if response["status"] != "ok":
+                logger.error(f"Rebuild was not successful: {response['msg']}")
+            return
+        except exceptions.DaemonNotRunning:
+            logger.warning(
+                "The build daemon is not running. Rebuilding in the current process."
+            )
+        except Exception as ex:
+            logger.error(f"Rebuild request to the build daemon failed: {ex}")
+            return
+
+    build_result = build_command.build(rebuild_instructions, profiler=profiler)
+    if isinstance(build_result, build_command.FailedStep):
+        logger.error(f"Rebuild was not successful: {build_result.msg}")
+
+
+def __get_journals_to_watch__(
+    build_instructions: model.BuildInstructions,
+) -> List[model.JournalData]:
+    """
+    Return the journals selected by the build instructions.
+
+    Inactive journals are only watched if build_inactive is set.
+    """
+    journal_data_file = api.get_journal_data_file()
+    journals_to_watch = []
+    for journal_name in build_command.get_journals_names_to_build(
+        build_instructions
+    ):
+        journal_data = api.find_journal_by_name(journal_data_file, journal_name)
+        if journal_data and (
+            journal_data.active or build_instructions.build_inactive
+        ):
+            journals_to_watch.append(journal_data)
+
+    return journals_to_watch
+
+
+# -------------------- API --------------------
+
+
+def watch(
+    build_instructions: model.BuildInstructions,
+    use_polling: bool = False,
+    polling_interval: float = 1.0,
+    stop_event: Optional[threading.Event] = None,
+    debounce_window: float = 0.5,
+    via_daemon: bool = False,
+    trace_filepath: Optional[Path] = None,
+):
+    """
+    Watch journal folders and rebuild journals whenever their files change.
+
+    The journals to watch are selected in the same way as in the build
+    command. Each modified journal is rebuilt in-process in the build
+    location once its files stop changing for a short period. A burst of
+    changes (e.g. a git pull) triggers a single rebuild per journal.
+
+    Args:
+        build_instructions: A BuildInstructions object.
+        use_polling (optional): If True, the file system is polled instead of
+                                using native file system events.
+        polling_interval (optional): Seconds between two polls.
+        stop_event (optional): The watcher stops when this event is set.
+                               Otherwise, it runs until interrupted.
+        debounce_window (optional): Seconds without changes in a journal
+                                    before it is rebuilt.
+        via_daemon (optional): If True, journals are rebuilt by the build
+                               daemon started with `jm daemon`.
+        trace_filepath (optional): If given, a Chrome trace event file with all
+                                   the rebuilds is written after each rebuild.
+    Raises:
+        InvalidName if invalid journal names are given.
+        InvalidLocation if invalid journal locations are given.
+        InvalidAttribute if no build location is given.
+    """
+    if not build_instructions.build_location:
+        raise exceptions.InvalidAttribute("No build location was given")
+
+    if stop_event is None:
+        stop_event = threading.Event()
+
+    profiler = None
+    if trace_filepath is not None:
+        profiler = profiling.Profiler()
+
+    journals_to_watch = __get_journals_to_watch__(build_instructions)
+    watched_journals = model.JournalDataList(journals_to_watch)
+
+    rebuild_queue = RebuildQueue(debounce_window)
+    event_handler = JournalEventHandler(
+        watched_journals,
+        rebuild_queue.put,
+        [Path(build_instructions.build_location).expanduser().absolute()],
+    )
+    observer = __start_observer__(
+        event_handler,
+        [
+            Path(journal_data.location_folder).expanduser()
+            for journal_data in journals_to_watch
+        ],
+        use_polling,
+        polling_interval,
+    )
+
+    try:
+        while not stop_event.is_set():
+            journals_names = rebuild_queue.get(timeout=0.1)
+            if len(journals_names) == 0:
+                continue
+
+            try:
+                __rebuild_journals__(
+                    build_instructions, journals_names, via_daemon, profiler
+                )
+            finally:
+                rebuild_queue.task_done(journals_names)
+
+            if profiler is not None and trace_filepath is not None:
+                build_command.__write_trace__(profiler, trace_filepath)
+    finally:
+        observer.stop()
+        observer.join()
+
+
+# -------------------- CLI --------------------
+
+
+def __watch__(
+    build_location: Path,
+    build_inactive: bool = False,
+    build_instructions_path: Optional[Path] = None,
+    journals_names_to_build: Optional[List[str]] = None,
+    journals_locations_to_build: Optional[List[str]] = None,
+    use_polling: bool = False,
+    polling_interval: float = 1.0,
+    debounce_window: float = 0.5,
+    via_daemon: bool = False,
+    trace_filepath: Optional[Path] = None,
+    **kwargs,
+):
+    utils.ensure_configuration_file_exists()
+    build_instructions = build_command.__merge_build_instructions__(
+        Path(build_location).absolute().expanduser(),
+        build_instructions_path,
+        build_inactive=build_inactive,
+        journals_names_to_build=journals_names_to_build,
+        journals_locations_to_build=journals_locations_to_build,
+    )
+
+    try:
+        print(f"Watching journals. Sites are built in: {build_location}")
+        watch(
+            build_instructions,
+            use_polling,
+            polling_interval,
+            debounce_window=debounce_window,
+            via_daemon=via_daemon,
+            trace_filepath=trace_filepath,
+        )
+    except exceptions.InvalidName as ex:
+        print(
+            f"The following journal names are not part of the registry: {', '.join(ex.names)}"
+        )
+        exit(1)
+    except exceptions.InvalidLocation as ex:
+        print(
+            f"The following journal location folders do not exist: {ex.locations}"
+        )
+        exit(1)
+    except KeyboardInterrupt:
+        print("Exiting watcher")
+
+
+def get_parser(subparser_action=None):
+    command_name = "watch"
+    command_description = watch.__doc__ if watch.__doc__ else ""
+    command_help = command_description.split(".")[0]
+
+    parser = None
+    if subparser_action:
+        parser = subparser_action.add_parser(
+            command_name,
+            description=command_description,
+            help=command_help,
+            aliases=["w"],
+            formatter_class=argparse.RawDescriptionHelpFormatter,
+        )
+    else:
+        parser = argparse.ArgumentParser(
+            command_name,
+            description=command_description,
+            formatter_class=argparse.RawDescriptionHelpFormatter,
+        )
+
+    parser.add_argument(
+        "--build-inactive",
+        help="If passed, inactive journals will also be watched.",
+        action="store_true",
+        default=False,
+    )
+    parser.add_argument(
+        "--build-instructions",
+        dest="build_instructions_path",
+        type=Path,
+        help="Configuration file with build instructions.",
+    )
+    parser.add_argument(
+        "--build-location",
+        help="Directory where build artifacts are stored. If not specified, current working directory is used",
+        type=Path,
+        default=Path.cwd(),
+    )
+    parser.add_argument(
+        "--debounce",
+        dest="debounce_window",
+        type=float,
+        default=0.5,
+        help="Seconds without changes in a journal before it is rebuilt.",
+    )
+    parser.add_argument(
+        "--journal-name",
+        "--jn",
+        dest="journals_names_to_build",
+        action="append",
+        help="Name of the journal to watch",
+    )
+    parser.add_argument(
+        "--journal-location",
+        "--jl",
+        dest="journals_locations_to_build",
+        action="append",
+        help="Location of the journal to watch",
+    )
+    parser.add_argument(
+        "--polling",
+        dest="use_polling",
+        action="store_true",
+        help="Poll the file system instead of using native file system events.",
+    )
+    parser.add_argument(
+        "--polling-interval",
+        type=float,
+        default=1.0,
+        help="Seconds between two polls of the file system.",
+    )
+    parser.add_argument(
+        "--trace",
+        dest="trace_filepath",
+        type=Path,
+        help="Write a Chrome trace event file of the rebuilds.",
+    )
+    parser.add_argument(
+        "--via-daemon",
+        action="store_true",
+        help="Send the rebuilds to the build daemon started with `jm daemon`.",
+    )
+    parser.set_defaults(func=__watch__)
+
+    return parser
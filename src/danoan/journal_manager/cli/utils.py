@@ -1,10 +1,11 @@
 from danoan.journal_manager.core import api, exceptions, model
 
+import importlib
 import itertools
 from pathlib import Path
 import re
 from textwrap import dedent
-from typing import Iterator, Any, Tuple
+from typing import Iterator, Any, List, NamedTuple, Optional, Tuple
 
 
 # -------------------- "Termination Criteria" --------------------
@@ -61,12 +62,11 @@ def ensure_journal_name_is_unique(
     """
     Exit application if journal name exist already.
     """
-    for entry in journal_data_file.list_of_journal_data:
-        if entry.name == journal_name:
-            print(
-                f"A journal with name {journal_name} is registered already. Please, choose a different name."
-            )
-            exit(1)
+    if len(journal_data_file.find_by_name(journal_name)) > 0:
+        print(
+            f"A journal with name {journal_name} is registered already. Please, choose a different name."
+        )
+        exit(1)
 
 
 def peek_is_empty(iterator: Iterator[Any]) -> Tuple[bool, Iterator[Any]]:
@@ -93,3 +93,65 @@ def journal_title_from_name(journal_name: str) -> str:
     Return a capitalized whitespace separted from a lower-snake-case version of a string.
     """
     return re.sub(r"-", " ", journal_name).capitalize()
+
+
+# -------------------- "Lazy Commands" --------------------
+class LazyCommand(NamedTuple):
+    """
+    Lightweight description of a subcommand.
+
+    The module of the command is imported only when the command is
+    dispatched. Modules of commands with subcommands (is_group) receive the
+    remaining arguments in `get_parser(subparser_action, argv)`, so they
+    can register their own subcommands lazily.
+    """
+
+    name: str
+    module: str
+    help: str
+    aliases: Tuple[str, ...] = ()
+    is_group: bool = False
+
+
+def get_command_name(argv: List[str]) -> Optional[str]:
+    """
+    Return the first argument that is not an option.
+    """
+    return next((x for x in argv if not x.startswith("-")), None)
+
+
+def register_lazy_commands(
+    subparser_action, lazy_commands: List[LazyCommand], argv=None
+):
+    """
+    Register subcommands, importing only the module of the dispatched one.
+
+    The other subcommands are registered with their name, aliases and help
+    only, which is enough to print the help of the parent command.
+
+    Args:
+        subparser_action: The subparsers action of the parent command.
+        lazy_commands: The subcommands of the parent command.
+        argv (optional): Arguments following the parent command. If None,
+                         the modules of all subcommands are imported.
+    """
+    command_name = None if argv is None else get_command_name(argv)
+    for command in lazy_commands:
+        if argv is not None and command_name not in [
+            command.name,
+            *command.aliases,
+        ]:
+            subparser_action.add_parser(
+                command.name, help=command.help, aliases=list(command.aliases)
+            )
+            continue
+
+        module = importlib.import_module(command.module)
+        if not command.is_group:
+            module.get_parser(subparser_action)
+        elif argv is None:
+            module.get_parser(subparser_action, None)
+        else:
+            module.get_parser(
+                subparser_action, argv[argv.index(command_name) + 1 :]
+            )
@@ -1,7 +1,9 @@
 from pathlib import Path
-import os
 import subprocess
 
+SUBPROCESS_ENGINE = "subprocess"
+IN_PROCESS_ENGINE = "in-process"
+
 
 def create(journal_location: Path):
     """
@@ -10,15 +12,65 @@ def create(journal_location: Path):
     subprocess.run(["mkdocs", "new", journal_location])
 
 
-def build(journal_location: Path, build_location: Path):
+def build(
+    journal_location: Path, build_location: Path
+) -> subprocess.CompletedProcess:
     """
     Build a static html page with mkdocs.
     """
-    cwd = os.getcwd()
-
-    os.chdir(journal_location)
     # By default, mkdocs uses a clean build. Files present in the
     # build location are removed before the new build starts.
-    subprocess.run(["mkdocs", "build", "-d", build_location])
+    return subprocess.run(
+        ["mkdocs", "build", "-d", build_location], cwd=journal_location
+    )
+
+
+def build_in_process(journal_location: Path, build_location: Path):
+    """
+    Build a static html page with mkdocs in the current interpreter.
+
+    mkdocs, its theme and plugins are imported only once per process, which
+    makes this engine well suited for long-lived build workers. Paths are
+    resolved with respect to the journal configuration file, so the current
+    working directory is not used.
+
+    Raises:
+        mkdocs.exceptions.MkDocsException if the build fails.
+    """
+    from mkdocs.commands import build as mkdocs_build
+    from mkdocs.config import load_config
+
+    config_filepath = Path(journal_location).joinpath("mkdocs.yml")
+    if not config_filepath.exists():
+        config_filepath = Path(journal_location).joinpath("mkdocs.yaml")
+
+    config = load_config(
+        config_file=config_filepath.as_posix(),
+        site_dir=Path(build_location).as_posix(),
+    )
+    config.plugins.on_startup(command="build", dirty=False)
+    try:
+        mkdocs_build.build(config)
+    finally:
+        config.plugins.on_shutdown()
+
+
+def preload():
+    """
+    Import mkdocs and the installed mkdocs themes and plugins.
+
+    Long-lived build workers call this function once, so the first build
+    does not pay for the imports. Themes and plugins that fail to import
+    are reported by mkdocs when they are used by a journal.
+    """
+    from importlib import metadata
+
+    import mkdocs.commands.build
+    import mkdocs.config
 
-    os.chdir(cwd)
+    for group in ["mkdocs.themes", "mkdocs.plugins"]:
+        for entry_point in metadata.entry_points(group=group):
+            try:
+                entry_point.load()
+            except Exception:
+                pass
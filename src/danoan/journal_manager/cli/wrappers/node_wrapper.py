@@ -1,17 +1,113 @@
-import subprocess
-from pathlib import Path
+from danoan.journal_manager.core import file_utils
+
+import hashlib
 import os
+from pathlib import Path
+import shutil
+import subprocess
+from typing import Optional
+import uuid
+
+PACKAGE_FILES = ["package.json", "package-lock.json"]
+
+
+def get_dependencies_digest(http_server_location: Path) -> str:
+    """
+    Return the sha256 digest of the package files of a node.js application.
+    """
+    sha = hashlib.sha256()
+    for package_file in PACKAGE_FILES:
+        package_filepath = http_server_location.joinpath(package_file)
+        if package_filepath.exists():
+            sha.update(package_file.encode())
+            sha.update(package_filepath.read_bytes())
+    return sha.hexdigest()
+
+
+def __run_npm__(npm_args, cwd: Path) -> bool:
+    return subprocess.run(npm_args, cwd=cwd.as_posix()).returncode == 0
 
 
-def install_dependencies(http_server_location: Path):
+def __populate_cache_entry__(http_server_location: Path, cache_entry: Path):
+    """
+    Install the dependencies in a new cache entry.
+
+    The dependencies are installed in a temporary folder that is renamed to
+    cache_entry once npm succeeds, so an interrupted installation is never
+    reused. If a package-lock.json is present, `npm ci --offline` is tried
+    first, which installs from the npm cache without network access.
+    """
+    temp_entry = cache_entry.with_name(
+        f".{cache_entry.name}.{uuid.uuid4().hex}.tmp"
+    )
+    temp_entry.mkdir(parents=True)
+    try:
+        for package_file in PACKAGE_FILES:
+            package_filepath = http_server_location.joinpath(package_file)
+            if package_filepath.exists():
+                shutil.copy2(package_filepath, temp_entry)
+
+        installed = temp_entry.joinpath(
+            "package-lock.json"
+        ).exists() and __run_npm__(["npm", "ci", "--offline"], temp_entry)
+        if not installed:
+            installed = __run_npm__(["npm", "install"], temp_entry)
+        if not installed:
+            raise RuntimeError(
+                f"Dependencies of {http_server_location} could not be installed."
+            )
+        temp_entry.joinpath("node_modules").mkdir(exist_ok=True)
+
+        try:
+            os.rename(temp_entry, cache_entry)
+        except OSError:
+            # Populated by a concurrent build in the meantime
+            if not cache_entry.exists():
+                raise
+    finally:
+        if temp_entry.exists():
+            shutil.rmtree(temp_entry)
+
+
+def install_dependencies(
+    http_server_location: Path, cache_folder: Optional[Path] = None
+):
     """
     Install dependencies for node.js.
+
+    If a cache folder is given, the dependencies are installed once per
+    version of the package files in cache_folder and the node_modules
+    folder of the application becomes a link to the cached one.
+
+    Args:
+        http_server_location: Folder of the node.js application.
+        cache_folder (optional): Folder where installed dependencies are kept.
+    Raises:
+        RuntimeError if npm fails to install the dependencies.
     """
-    cwd = os.getcwd()
-    os.chdir(http_server_location.expanduser().as_posix())
-    npm_args = ["npm", "install"]
-    subprocess.run(npm_args)
-    os.chdir(cwd)
+    http_server_location = http_server_location.expanduser()
+    if cache_folder is None:
+        subprocess.run(["npm", "install"], cwd=http_server_location.as_posix())
+        return
+
+    cache_entry = cache_folder.joinpath(
+        get_dependencies_digest(http_server_location)
+    )
+    cached_node_modules = cache_entry.joinpath("node_modules")
+    node_modules = http_server_location.joinpath("node_modules")
+    if (
+        node_modules.is_symlink()
+        and Path(os.readlink(node_modules)) == cached_node_modules.absolute()
+        and cached_node_modules.exists()
+    ):
+        return
+
+    if not cache_entry.exists():
+        __populate_cache_entry__(http_server_location, cache_entry)
+
+    if node_modules.is_dir() and not node_modules.is_symlink():
+        shutil.rmtree(node_modules)
+    file_utils.atomic_symlink(cached_node_modules.absolute(), node_modules)
 
 
 def start_server(init_script: Path):
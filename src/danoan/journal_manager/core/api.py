@@ -2,14 +2,91 @@
 Core methods that form the journal-manager api.
 """
 
-from danoan.journal_manager.core import exceptions, model
+from danoan.journal_manager.core import backends, exceptions, file_utils, model
 
+from contextlib import contextmanager
+import copy
 import os
 from pathlib import Path
-from typing import List, Optional
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+)
 
 ENV_JOURNAL_MANAGER_CONFIG_FOLDER = "JOURNAL_MANAGER_CONFIG_FOLDER"
 
+T = TypeVar("T")
+
+# Parsed toml files indexed by (filepath, dataclass). Each entry stores
+# the (mtime_ns, size, inode) signature of the file at the moment it was
+# parsed. Files are atomically replaced at every write, so the inode
+# changes even if two writes happen within the timestamp resolution.
+__file_cache__: Dict[Tuple[str, type], Tuple[Tuple[int, int, int], Any]] = {}
+
+
+# -------------------- Cache API --------------------
+
+
+def __read_cached__(
+    cls: Type[T],
+    filepath: Union[str, Path],
+    read_function: Optional[Callable[[], T]] = None,
+) -> T:
+    """
+    Return the dataclass instantiated from a file, parsing it only if needed.
+
+    The file is parsed again only if its modification time, size or inode
+    changed since the last read. Callers receive a copy of the cached
+    instance, so they are free to modify it.
+
+    Args:
+        cls: Dataclass stored in the file.
+        filepath: Path to the file.
+        read_function (optional): Function that reads the file. If None, cls.read is used.
+    """
+    path = Path(filepath).expanduser()
+    stat = path.stat()
+    signature = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+    cache_key = (path.as_posix(), cls)
+
+    entry = __file_cache__.get(cache_key)
+    if entry is None or entry[0] != signature:
+        if read_function is None:
+            entry = (signature, cls.read(path))  # type: ignore
+        else:
+            entry = (signature, read_function())
+        __file_cache__[cache_key] = entry
+
+    return copy.deepcopy(entry[1])
+
+
+def invalidate_cache(filepath: Optional[Union[str, Path]] = None):
+    """
+    Discard cached parsed files.
+
+    Writers must call this function after modifying a file that may have
+    been read through the api. The file signature alone is not enough
+    when two writes happen within the file system timestamp resolution.
+
+    Args:
+        filepath (optional): File to discard. If None, the whole cache is cleared.
+    """
+    if filepath is None:
+        __file_cache__.clear()
+        return
+
+    path = Path(filepath).expanduser().as_posix()
+    for cache_key in [k for k in __file_cache__.keys() if k[0] == path]:
+        del __file_cache__[cache_key]
+
 
 # -------------------- Configuration API --------------------
 
@@ -44,7 +121,9 @@ def get_configuration_file() -> model.ConfigurationFile:
     if not get_configuration_filepath().exists():
         raise exceptions.ConfigurationFileDoesNotExist()
 
-    return model.ConfigurationFile.read(get_configuration_filepath())
+    return __read_cached__(
+        model.ConfigurationFile, get_configuration_filepath()
+    )
 
 
 def get_template_list_file() -> model.JournalTemplateList:
@@ -52,15 +131,70 @@ def get_template_list_file() -> model.JournalTemplateList:
     Return JournalTemplateList dataclass instantiated from the templates register file.
     """
     config_file = get_configuration_file()
-    return model.JournalTemplateList.read(config_file.template_data_filepath)
+    return __read_cached__(
+        model.JournalTemplateList, config_file.template_data_filepath
+    )
+
+
+def get_journal_data_backend() -> backends.JournalDataBackend:
+    """
+    Return the storage backend of the journals register.
+
+    Raises:
+        InvalidAttribute if the configured backend is unknown.
+    """
+    config_file = get_configuration_file()
+    return backends.get_backend(
+        config_file.journal_data_backend,
+        Path(config_file.journal_data_filepath),
+    )
 
 
 def get_journal_data_file() -> model.JournalDataList:
     """
     Return JournalDataList dataclass instantiated from the journals register file.
     """
-    config_file = get_configuration_file()
-    return model.JournalDataList.read(config_file.journal_data_filepath)
+    backend = get_journal_data_backend()
+    return __read_cached__(
+        model.JournalDataList, backend.filepath, backend.read
+    )
+
+
+def write_configuration_file(config_file: model.ConfigurationFile):
+    """
+    Write the journal-manager configuration file.
+
+    Args:
+        config_file: Dataclass representation of the configuration file.
+    """
+    with file_utils.atomic_write(get_configuration_filepath()) as f:
+        config_file.write(f)
+    invalidate_cache(get_configuration_filepath())
+
+
+def write_template_list_file(template_list_file: model.JournalTemplateList):
+    """
+    Write the templates register file.
+
+    Args:
+        template_list_file: Dataclass representation of the templates register file.
+    """
+    filepath = get_configuration_file().template_data_filepath
+    with file_utils.atomic_write(filepath) as f:
+        template_list_file.write(f)
+    invalidate_cache(filepath)
+
+
+def write_journal_data_file(journal_data_file: model.JournalDataList):
+    """
+    Write the journals register file.
+
+    Args:
+        journal_data_file: Dataclass representation of the journals register file.
+    """
+    backend = get_journal_data_backend()
+    backend.write(journal_data_file)
+    invalidate_cache(backend.filepath)
 
 
 def create_configuration_file(
@@ -96,20 +230,17 @@ def create_configuration_file(
     )
 
     parameters = model.Parameters()
-    with open(get_configuration_filepath().as_posix(), "w") as f:
+    write_configuration_file(
         model.ConfigurationFile(
             journal_folder_default.as_posix(),
             templates_folder_default.as_posix(),
             journal_data_filepath,
             journal_template_data_filepath,
             parameters,
-        ).write(f)
-
-    with open(journal_data_filepath, "w") as f:
-        model.JournalDataList([]).write(f)
-
-    with open(journal_template_data_filepath, "w") as f:
-        model.JournalTemplateList([]).write(f)
+        )
+    )
+    write_journal_data_file(model.JournalDataList([]))
+    write_template_list_file(model.JournalTemplateList([]))
 
 
 def is_valid_template_path(template_path: Path):
@@ -161,8 +292,19 @@ def find_journal(
         logic_operator: If OR, all journals matching at least one attribute are returned.
                         If AND, a journal must match all attributes to be returned.
     """
+    # Under AND, a name or location restriction narrows the search
+    # to the entries of the corresponding hash index.
+    candidates = journal_data_file.list_of_journal_data
+    if logic_operator == model.LogicOperator.AND:
+        if journal_components.name is not None:
+            candidates = journal_data_file.find_by_name(journal_components.name)
+        elif journal_components.location_folder is not None:
+            candidates = journal_data_file.find_by_location(
+                journal_components.location_folder
+            )
+
     results: List[model.JournalData] = []
-    for journal_data in journal_data_file.list_of_journal_data:
+    for journal_data in candidates:
         potential_matches = 0
         concrete_matches = 0
         for key, value in journal_components.__dict__.items():
@@ -195,10 +337,7 @@ def find_journal_by_name(
         journal_data_file: Dataclass representation of the journal register file.
         journal_name: Journal name.
     """
-    journal_components = model.JournalData(journal_name, None, None, None, None)
-    results = find_journal(
-        journal_data_file, journal_components, model.LogicOperator.AND
-    )
+    results = journal_data_file.find_by_name(journal_name)
     if len(results) > 0:
         return results[0]
     else:
@@ -211,24 +350,35 @@ def find_journal_by_location(
     """
     Search a registered journal by location.
 
-    If the journal is not found, a None object is returned.
+    If the journal is not found, a None object is returned. Locations
+    are compared after normalization (see `model.normalize_location`).
 
     Args:
         journal_data_file: Dataclass representation of the journal register file.
         journal_location: Path to the journal folder.
     """
-    journal_components = model.JournalData(
-        None, journal_location, None, None, None
-    )
-    results = find_journal(
-        journal_data_file, journal_components, model.LogicOperator.AND
-    )
+    results = journal_data_file.find_by_location(journal_location)
     if len(results) > 0:
         return results[0]
     else:
         return None
 
 
+def __persist_operations__(
+    journal_data_file: Optional[model.JournalDataList],
+    operations: List[Tuple[backends.Operation, model.JournalData]],
+):
+    """
+    Persist operations already applied to an in-memory journals register.
+    """
+    if len(operations) == 0:
+        return
+
+    backend = get_journal_data_backend()
+    backend.apply(journal_data_file, operations)
+    invalidate_cache(backend.filepath)
+
+
 def update_journal(
     journal_data_file: model.JournalDataList, journal_data: model.JournalData
 ):
@@ -239,11 +389,188 @@ def update_journal(
         journal_data_file: Dataclass representation of the journal register file.
         journal_data: Updated journal.
     """
+    journal_data_file.update(journal_data)
+    __persist_operations__(
+        journal_data_file, [(backends.Operation.UPDATE, journal_data)]
+    )
+
+
+def add_journal(
+    journal_data_file: model.JournalDataList, journal_data: model.JournalData
+):
+    """
+    Add journal entry to the journal data file.
+
+    Args:
+        journal_data_file: Dataclass representation of the journal register file.
+        journal_data: Journal to add.
+    """
+    journal_data_file.append(journal_data)
+    __persist_operations__(
+        journal_data_file, [(backends.Operation.INSERT, journal_data)]
+    )
+
+
+def remove_journal(
+    journal_data_file: model.JournalDataList, journal_data: model.JournalData
+):
+    """
+    Remove journal entry from the journal data file.
+
+    Args:
+        journal_data_file: Dataclass representation of the journal register file.
+        journal_data: Registered journal to remove.
+    """
+    journal_data_file.remove(journal_data)
+    __persist_operations__(
+        journal_data_file, [(backends.Operation.DELETE, journal_data)]
+    )
+
+
+# -------------------- Transaction API --------------------
+
+
+class JournalDataTransaction:
+    """
+    Unit of work over the journals register.
 
-    for i, entry in enumerate(journal_data_file.list_of_journal_data):
-        if entry.name == journal_data.name:
-            journal_data_file.list_of_journal_data[i] = journal_data
-            break
+    The register is loaded once, on the first access to `journal_data_file`,
+    and modifications are applied to it in memory. They are persisted all at
+    once by `commit`, with a single write of the register. Prefer to create
+    transactions with `journal_data_transaction`.
 
-    with open(get_configuration_file().journal_data_filepath, "w") as f:
-        journal_data_file.write(f)
+    If the backend supports row operations (e.g. sqlite), journals searched
+    with `find_journal_by_name` and then updated or removed are queried and
+    modified row by row, without loading the register.
+    """
+
+    def __init__(self):
+        self.backend = get_journal_data_backend()
+        self._journal_data_file: Optional[model.JournalDataList] = None
+        self.operations: List[Tuple[backends.Operation, model.JournalData]] = []
+
+    @property
+    def journal_data_file(self) -> model.JournalDataList:
+        """
+        The in-memory register, with the pending operations applied.
+        """
+        if self._journal_data_file is None:
+            journal_data_file = get_journal_data_file()
+            backends.apply_operations(journal_data_file, self.operations)
+            self._journal_data_file = journal_data_file
+        return self._journal_data_file
+
+    def _uses_row_operations(self) -> bool:
+        return (
+            self._journal_data_file is None
+            and self.backend.supports_row_operations
+        )
+
+    def find_journal_by_name(
+        self, journal_name: str
+    ) -> Optional[model.JournalData]:
+        """
+        Search a registered journal by name, pending operations included.
+
+        If the journal is not found, a None object is returned.
+        """
+        if not self._uses_row_operations():
+            return find_journal_by_name(self.journal_data_file, journal_name)
+
+        for operation, journal_data in reversed(self.operations):
+            if journal_data.name == journal_name:
+                if operation == backends.Operation.DELETE:
+                    return None
+                return copy.copy(journal_data)
+
+        results = self.backend.find_by_name(journal_name)
+        if len(results) > 0:
+            return results[0]
+        else:
+            return None
+
+    def add_journal(self, journal_data: model.JournalData):
+        """
+        Add a journal to the register.
+
+        Raises:
+            InvalidName if a journal with the same name is registered already.
+        """
+        if self.find_journal_by_name(journal_data.name) is not None:
+            raise exceptions.InvalidName([journal_data.name])
+
+        if not self._uses_row_operations():
+            self.journal_data_file.append(journal_data)
+        self.operations.append((backends.Operation.INSERT, journal_data))
+
+    def update_journal(self, journal_data: model.JournalData):
+        """
+        Update the registered journal with the same name of `journal_data`.
+
+        Raises:
+            InvalidName if the journal is not registered.
+        """
+        if self._uses_row_operations():
+            if self.find_journal_by_name(journal_data.name) is None:
+                raise exceptions.InvalidName([journal_data.name])
+        elif not self.journal_data_file.update(journal_data):
+            raise exceptions.InvalidName([journal_data.name])
+
+        self.operations.append((backends.Operation.UPDATE, journal_data))
+
+    def remove_journal(self, journal_data: model.JournalData):
+        """
+        Remove a journal from the register.
+
+        Raises:
+            InvalidName if the journal is not registered.
+        """
+        if self._uses_row_operations():
+            if self.find_journal_by_name(journal_data.name) is None:
+                raise exceptions.InvalidName([journal_data.name])
+        else:
+            try:
+                self.journal_data_file.remove(journal_data)
+            except ValueError:
+                raise exceptions.InvalidName([journal_data.name])
+
+        self.operations.append((backends.Operation.DELETE, journal_data))
+
+    def commit(self):
+        """
+        Persist the pending operations.
+        """
+        __persist_operations__(self._journal_data_file, self.operations)
+        self.operations = []
+
+    def rollback(self):
+        """
+        Discard the pending operations.
+
+        The register is loaded again on the next access.
+        """
+        self._journal_data_file = None
+        self.operations = []
+
+
+@contextmanager
+def journal_data_transaction() -> Iterator[JournalDataTransaction]:
+    """
+    Open a transaction over the journals register.
+
+    Pending operations are committed when the block exits normally and
+    discarded if an exception is raised.
+
+    Example:
+        with api.journal_data_transaction() as transaction:
+            journal = transaction.find_journal_by_name("my-journal")
+            journal.active = False
+            transaction.update_journal(journal)
+    """
+    transaction = JournalDataTransaction()
+    try:
+        yield transaction
+    except BaseException:
+        transaction.rollback()
+        raise
+    transaction.commit()
@@ -0,0 +1,288 @@
+"""
+Storage backends for the journals register.
+"""
+
+from danoan.journal_manager.core import exceptions, file_utils, model
+
+import abc
+from contextlib import closing
+import copy
+from enum import Enum
+from pathlib import Path
+import sqlite3
+from typing import Dict, List, Optional, Tuple, Type
+
+TOML_BACKEND = "toml"
+SQLITE_BACKEND = "sqlite"
+
+
+class Operation(Enum):
+    INSERT = 0
+    UPDATE = 1
+    DELETE = 2
+
+
+def apply_operations(
+    journal_data_file: model.JournalDataList,
+    operations: List[Tuple[Operation, model.JournalData]],
+):
+    """
+    Apply row-level operations to an in-memory journals register.
+
+    Args:
+        journal_data_file: Register to modify.
+        operations: Operations in the order they were applied.
+    Raises:
+        InvalidName if an inserted journal name is registered already.
+    """
+    for operation, journal_data in operations:
+        registered = journal_data_file.find_by_name(journal_data.name)
+        if operation == Operation.INSERT:
+            if len(registered) > 0:
+                raise exceptions.InvalidName([journal_data.name])
+            journal_data_file.append(copy.copy(journal_data))
+        elif operation == Operation.UPDATE:
+            journal_data_file.update(copy.copy(journal_data))
+        elif operation == Operation.DELETE and len(registered) > 0:
+            journal_data_file.remove(registered[0])
+
+
+class JournalDataBackend(abc.ABC):
+    """
+    Base class for a storage backend of the journals register.
+
+    Backends must implement `read` and `_write`. The default implementations
+    of `write` and `apply` hold the register file lock. In particular,
+    `apply` replays the operations on a fresh read of the register, so
+    concurrent modifications done by other processes are not lost. Backends
+    that can query and persist row-level operations without reading the
+    whole register should override `find_by_name` and `apply`, and set
+    `supports_row_operations`.
+    """
+
+    supports_row_operations = False
+
+    def __init__(self, filepath: Path):
+        self.filepath = Path(filepath).expanduser()
+
+    @abc.abstractmethod
+    def read(self) -> model.JournalDataList:
+        """
+        Return the register content.
+        """
+
+    @abc.abstractmethod
+    def _write(self, journal_data_file: model.JournalDataList):
+        """
+        Replace the register content. The caller holds the file lock.
+        """
+
+    def write(self, journal_data_file: model.JournalDataList):
+        """
+        Replace the register content.
+        """
+        with file_utils.lock_file(self.filepath):
+            self._write(journal_data_file)
+
+    def find_by_name(self, journal_name: str) -> List[model.JournalData]:
+        """
+        Return the registered journals with the given name.
+
+        The default implementation reads the whole register.
+        """
+        return self.read().find_by_name(journal_name)
+
+    def apply(
+        self,
+        journal_data_file: Optional[model.JournalDataList],
+        operations: List[Tuple[Operation, model.JournalData]],
+    ):
+        """
+        Persist a sequence of row-level operations.
+
+        Args:
+            journal_data_file: Register with the operations already applied in memory.
+                               None if the register was not loaded.
+            operations: Operations in the order they were applied.
+        Raises:
+            InvalidName if an inserted journal name was registered concurrently.
+        """
+        with file_utils.lock_file(self.filepath):
+            current_journal_data_file = self.read()
+            apply_operations(current_journal_data_file, operations)
+            self._write(current_journal_data_file)
+
+
+class TomlJournalDataBackend(JournalDataBackend):
+    """
+    Journals register stored as a toml file.
+
+    The file is atomically replaced at every modification.
+    """
+
+    def read(self) -> model.JournalDataList:
+        return model.JournalDataList.read(self.filepath)
+
+    def _write(self, journal_data_file: model.JournalDataList):
+        with file_utils.atomic_write(self.filepath) as f:
+            journal_data_file.write(f)
+
+
+class SqliteJournalDataBackend(JournalDataBackend):
+    """
+    Journals register stored as a sqlite database.
+
+    The journals table is indexed by name, location_folder, active and
+    last_edit_date. Operations are persisted in a single sqlite transaction
+    and they do not rewrite the register. Journals are searched by name
+    with a query on the index, without reading the register.
+    Journals are read in the order they were inserted.
+    """
+
+    supports_row_operations = True
+
+    __schema__ = """
+        CREATE TABLE IF NOT EXISTS journal_data (
+            position INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            location_folder TEXT NOT NULL,
+            active INTEGER NOT NULL,
+            title TEXT NOT NULL,
+            last_edit_date TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS journal_data_name
+            ON journal_data(name);
+        CREATE INDEX IF NOT EXISTS journal_data_location_folder
+            ON journal_data(location_folder);
+        CREATE INDEX IF NOT EXISTS journal_data_active
+            ON journal_data(active);
+        CREATE INDEX IF NOT EXISTS journal_data_last_edit_date
+            ON journal_data(last_edit_date);
+        """
+
+    # Duplicated names are not expected, but a row-level operation only
+    # affects the first registered journal with the given name.
+    __first_with_name__ = (
+        "position = (SELECT MIN(position) FROM journal_data WHERE name = ?)"
+    )
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.filepath)
+        connection.executescript(SqliteJournalDataBackend.__schema__)
+        return connection
+
+    def read(self) -> model.JournalDataList:
+        with closing(self._connect()) as connection:
+            rows = connection.execute(
+                "SELECT name, location_folder, active, title, last_edit_date "
+                "FROM journal_data ORDER BY position"
+            ).fetchall()
+
+        return model.JournalDataList(
+            [
+                model.JournalData(name, location, bool(active), title, date)
+                for name, location, active, title, date in rows
+            ]
+        )
+
+    def find_by_name(self, journal_name: str) -> List[model.JournalData]:
+        with closing(self._connect()) as connection:
+            rows = connection.execute(
+                "SELECT name, location_folder, active, title, last_edit_date "
+                "FROM journal_data WHERE name = ? ORDER BY position",
+                (journal_name,),
+            ).fetchall()
+
+        return [
+            model.JournalData(name, location, bool(active), title, date)
+            for name, location, active, title, date in rows
+        ]
+
+    def _write(self, journal_data_file: model.JournalDataList):
+        with closing(self._connect()) as connection, connection:
+            connection.execute("DELETE FROM journal_data")
+            connection.executemany(
+                "INSERT INTO journal_data "
+                "(name, location_folder, active, title, last_edit_date) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [
+                    (
+                        x.name,
+                        x.location_folder,
+                        x.active,
+                        x.title,
+                        x.last_edit_date,
+                    )
+                    for x in journal_data_file.list_of_journal_data
+                ],
+            )
+
+    def apply(
+        self,
+        journal_data_file: Optional[model.JournalDataList],
+        operations: List[Tuple[Operation, model.JournalData]],
+    ):
+        with closing(self._connect()) as connection, connection:
+            for operation, journal_data in operations:
+                if operation == Operation.INSERT:
+                    connection.execute(
+                        "INSERT INTO journal_data "
+                        "(name, location_folder, active, title, last_edit_date) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (
+                            journal_data.name,
+                            journal_data.location_folder,
+                            journal_data.active,
+                            journal_data.title,
+                            journal_data.last_edit_date,
+                        ),
+                    )
+                elif operation == Operation.UPDATE:
+                    connection.execute(
+                        "UPDATE journal_data SET "
+                        "location_folder = ?, active = ?, title = ?, last_edit_date = ? "
+                        f"WHERE {SqliteJournalDataBackend.__first_with_name__}",
+                        (
+                            journal_data.location_folder,
+                            journal_data.active,
+                            journal_data.title,
+                            journal_data.last_edit_date,
+                            journal_data.name,
+                        ),
+                    )
+                elif operation == Operation.DELETE:
+                    connection.execute(
+                        "DELETE FROM journal_data "
+                        f"WHERE {SqliteJournalDataBackend.__first_with_name__}",
+                        (journal_data.name,),
+                    )
+
+
+__backends__: Dict[str, Type[JournalDataBackend]] = {
+    TOML_BACKEND: TomlJournalDataBackend,
+    SQLITE_BACKEND: SqliteJournalDataBackend,
+}
+
+
+def list_backends():
+    """
+    Return the names of the available journals register backends.
+    """
+    return list(__backends__.keys())
+
+
+def get_backend(backend_name: str, filepath: Path) -> JournalDataBackend:
+    """
+    Return the journals register backend with the given name.
+
+    Args:
+        backend_name: One of the names returned by `list_backends`.
+        filepath: Path to the file storing the journals register.
+    Raises:
+        InvalidAttribute if the backend name is unknown.
+    """
+    if backend_name not in __backends__:
+        raise exceptions.InvalidAttribute(
+            f"Unknown journal data backend: {backend_name}."
+        )
+    return __backends__[backend_name](filepath)
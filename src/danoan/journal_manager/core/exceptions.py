@@ -47,3 +47,13 @@ class InvalidTemplate(Exception):
 class InvalidAttribute(Exception):
     def __init__(self, msg: Optional[str] = None):
         self.msg = msg
+
+
+class DaemonNotRunning(Exception):
+    def __init__(self, socket_filepath: Optional[Path] = None):
+        self.socket_filepath = socket_filepath
+
+
+class DaemonAlreadyRunning(Exception):
+    def __init__(self, socket_filepath: Optional[Path] = None):
+        self.socket_filepath = socket_filepath
@@ -0,0 +1,154 @@
+"""
+File utilities to safely share configuration files among processes.
+"""
+
+from contextlib import contextmanager, nullcontext
+import os
+from pathlib import Path
+import threading
+from typing import Dict, Iterator, TextIO, Tuple, Union
+import uuid
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None  # type: ignore
+
+# Locks are reentrant within a thread. A process holds at most one flock
+# per lock file and counts how many times it was acquired.
+__locks_guard__ = threading.Lock()
+__thread_locks__: Dict[str, threading.RLock] = {}
+__held_locks__: Dict[str, Tuple[int, int]] = {}
+
+
+def get_lock_filepath(filepath: Union[str, Path]) -> Path:
+    """
+    Return the path of the lock file associated with a file.
+
+    The lock is not taken on the file itself because it is replaced
+    at every atomic write.
+    """
+    path = Path(filepath).expanduser()
+    return path.with_name(f"{path.name}.lock")
+
+
+@contextmanager
+def lock_file(filepath: Union[str, Path]) -> Iterator[None]:
+    """
+    Hold an exclusive advisory lock associated with a file.
+
+    The lock is shared among processes (flock) and threads. It is
+    reentrant: a thread that holds the lock can acquire it again.
+    On platforms without fcntl, only threads are synchronized.
+
+    Args:
+        filepath: File to protect.
+    """
+    lock_filepath = get_lock_filepath(filepath)
+    key = lock_filepath.as_posix()
+
+    with __locks_guard__:
+        thread_lock = __thread_locks__.setdefault(key, threading.RLock())
+
+    with thread_lock:
+        fd, depth = __held_locks__.get(key, (-1, 0))
+        if depth == 0:
+            fd = os.open(lock_filepath, os.O_RDWR | os.O_CREAT, 0o666)
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+        __held_locks__[key] = (fd, depth + 1)
+
+        try:
+            yield
+        finally:
+            fd, depth = __held_locks__.pop(key)
+            if depth > 1:
+                __held_locks__[key] = (fd, depth - 1)
+            else:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+                os.close(fd)
+
+
+@contextmanager
+def atomic_write(
+    filepath: Union[str, Path], lock: bool = True
+) -> Iterator[TextIO]:
+    """
+    Open a text stream that atomically replaces a file when closed.
+
+    The content is written to a temporary file in the same directory,
+    synced to disk and renamed over the original file while holding
+    the file lock. Readers see either the previous or the new content.
+    If an exception is raised, the original file is left untouched.
+
+    Args:
+        filepath: File to write.
+        lock (optional): If False, the file lock is not taken and no lock
+                         file is created next to the file. Use it for files
+                         with a single writer, e.g. files of a published site.
+    """
+    path = Path(filepath).expanduser()
+    temp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+
+    with lock_file(path) if lock else nullcontext():
+        fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+        try:
+            with os.fdopen(fd, "w") as f:
+                if path.exists():
+                    os.chmod(temp_path, path.stat().st_mode & 0o777)
+
+                yield f
+                f.flush()
+                os.fsync(f.fileno())
+
+            os.replace(temp_path, path)
+        except BaseException:
+            if temp_path.exists():
+                temp_path.unlink()
+            raise
+
+        __fsync_directory__(path.parent)
+
+
+def atomic_symlink(target: Union[str, Path], link_path: Union[str, Path]):
+    """
+    Create or atomically replace a symbolic link.
+
+    The link is created with a temporary name and renamed over link_path,
+    so link_path always exists and points either to the previous or to the
+    new target.
+
+    Args:
+        target: Path the link points to. Relative paths are resolved with
+                respect to the link folder.
+        link_path: Path of the link.
+    """
+    path = Path(link_path).expanduser()
+    temp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+
+    os.symlink(target, temp_path)
+    try:
+        os.replace(temp_path, path)
+    except BaseException:
+        temp_path.unlink()
+        raise
+
+    __fsync_directory__(path.parent)
+
+
+def __fsync_directory__(directory: Path):
+    """
+    Persist the directory entry of a renamed file.
+    """
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:  # pragma: no cover
+        return
+
+    try:
+        os.fsync(fd)
+    except OSError:  # pragma: no cover
+        pass
+    finally:
+        os.close(fd)
@@ -0,0 +1,436 @@
+"""
+Asynchronous static file server used to test built journals.
+"""
+
+import asyncio
+from dataclasses import dataclass
+from email.utils import formatdate, parsedate_to_datetime
+from http import HTTPStatus
+import mimetypes
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote, unquote, urlsplit
+
+try:
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None  # type: ignore
+
+PYTHON_BACKEND = "python"
+NODE_BACKEND = "node"
+DEFAULT_PORT = 4960
+
+# Content encodings of precompressed files, in order of preference.
+PRECOMPRESSED_ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+
+TEXT_CONTENT_TYPES = ["application/javascript", "application/json"]
+
+
+@dataclass
+class Request:
+    method: str
+    target: str
+    version: str
+    headers: Dict[str, str]
+
+    @property
+    def keep_alive(self) -> bool:
+        connection = self.headers.get("connection", "").lower()
+        if self.version == "HTTP/1.0":
+            return connection == "keep-alive"
+        return connection != "close"
+
+
+async def __read_request__(
+    reader: asyncio.StreamReader, timeout: float
+) -> Optional[Request]:
+    """
+    Read the request line and the headers of the next request.
+
+    Returns:
+        None if the connection is closed or idle for longer than timeout.
+    Raises:
+        ValueError if the request is malformed or its head is too long.
+    """
+    try:
+        data = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), timeout)
+    except (asyncio.IncompleteReadError, asyncio.TimeoutError):
+        return None
+    except asyncio.LimitOverrunError as ex:
+        raise ValueError("Request head is too long.") from ex
+
+    lines = data.decode("latin-1").split("\r\n")
+    request_line = lines[0].split()
+    if len(request_line) != 3 or not request_line[2].startswith("HTTP/"):
+        raise ValueError(f"Malformed request line: {lines[0]}")
+    method, target, version = request_line
+
+    headers: Dict[str, str] = {}
+    for line in lines[1:]:
+        if not line:
+            continue
+        name, separator, value = line.partition(":")
+        if not separator:
+            raise ValueError(f"Malformed header: {line}")
+        headers[name.strip().lower()] = value.strip()
+
+    return Request(method, target, version, headers)
+
+
+def __get_accepted_encodings__(accept_encoding: str) -> List[str]:
+    encodings = []
+    for item in accept_encoding.split(","):
+        name, _, parameters = item.partition(";")
+        quality = 1.0
+        parameters = parameters.strip()
+        if parameters.startswith("q="):
+            try:
+                quality = float(parameters[2:])
+            except ValueError:
+                quality = 0
+        if name.strip() and quality > 0:
+            encodings.append(name.strip().lower())
+    return encodings
+
+
+def __parse_range__(range_header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single byte range.
+
+    Returns:
+        The first and the last byte of the range. None if the header is
+        malformed or asks for several ranges, in which case it is ignored.
+    Raises:
+        ValueError if the range cannot be satisfied.
+    """
+    unit, _, byte_range = range_header.partition("=")
+    if unit.strip() != "bytes" or "," in byte_range:
+        return None
+
+    first, separator, last = byte_range.strip().partition("-")
+    if not separator or not (first + last).isdigit():
+        return None
+
+    if first == "":
+        suffix_length = int(last)
+        if suffix_length == 0 or size == 0:
+            raise ValueError("Range not satisfiable")
+        return max(size - suffix_length, 0), size - 1
+
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise ValueError("Range not satisfiable")
+    end = int(last) if last else size - 1
+    return start, min(end, size - 1)
+
+
+def __guess_content_type__(filepath: Path) -> str:
+    content_type, _ = mimetypes.guess_type(filepath.name)
+    if content_type is None:
+        return "application/octet-stream"
+    if content_type.startswith("text/") or content_type in TEXT_CONTENT_TYPES:
+        return f"{content_type}; charset=utf-8"
+    return content_type
+
+
+def __raise_open_files_limit__():
+    """
+    Raise the soft limit of open files to the hard limit.
+
+    Each connection holds a socket and, while a file is sent, a file
+    descriptor.
+    """
+    if resource is None:  # pragma: no cover
+        return
+    soft_limit, hard_limit = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if hard_limit == resource.RLIM_INFINITY:
+        hard_limit = max(soft_limit, 65536)
+    try:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard_limit, hard_limit))
+    except (ValueError, OSError):
+        pass
+
+
+class StaticFileServer:
+    """
+    Serve the files of a folder over http.
+
+    Connections are handled by a single asyncio event loop and are kept
+    alive between requests. File contents are transferred with
+    os.sendfile whenever the platform supports it. Responses carry ETag
+    and Last-Modified headers, conditional and single range requests are
+    supported, and a precompressed sibling (file.br or file.gz) is sent
+    instead of the file when the client accepts its encoding.
+    """
+
+    def __init__(self, root: Path, keep_alive_timeout: float = 5.0):
+        self.root = Path(root).expanduser().absolute()
+        self.keep_alive_timeout = keep_alive_timeout
+
+    async def start(
+        self, host: Optional[str] = None, port: int = DEFAULT_PORT
+    ) -> asyncio.Server:
+        """
+        Start listening for connections.
+
+        Args:
+            host (optional): Interface to listen on. By default, all.
+            port (optional): Port to listen on. If 0, a free port is chosen.
+        """
+        return await asyncio.start_server(self.handle, host, port, backlog=1024)
+
+    async def handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        """
+        Answer the requests of a connection until it is closed.
+        """
+        try:
+            while True:
+                try:
+                    request = await __read_request__(
+                        reader, self.keep_alive_timeout
+                    )
+                except ValueError:
+                    await self._send_error(writer, HTTPStatus.BAD_REQUEST)
+                    break
+
+                if request is None or not await self._respond(request, writer):
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    def _resolve(self, url_path: str) -> Optional[Path]:
+        parts = [x for x in url_path.split("/") if x not in ["", "."]]
+        if ".." in parts or any("\0" in x for x in parts):
+            return None
+        return self.root.joinpath(*parts)
+
+    def _select_variant(
+        self, request: Request, filepath: Path, stat: os.stat_result
+    ) -> Tuple[Path, os.stat_result, Optional[str]]:
+        """
+        Return the precompressed variant of a file accepted by the client.
+
+        Variants older than the file are ignored, so a stale variant is
+        never sent.
+        """
+        accepted_encodings = __get_accepted_encodings__(
+            request.headers.get("accept-encoding", "")
+        )
+        for encoding, suffix in PRECOMPRESSED_ENCODINGS:
+            if encoding not in accepted_encodings and "*" not in (
+                accepted_encodings
+            ):
+                continue
+            variant = filepath.with_name(filepath.name + suffix)
+            try:
+                variant_stat = variant.stat()
+            except OSError:
+                continue
+            if variant_stat.st_mtime_ns >= stat.st_mtime_ns:
+                return variant, variant_stat, encoding
+        return filepath, stat, None
+
+    async def _respond(
+        self, request: Request, writer: asyncio.StreamWriter
+    ) -> bool:
+        """
+        Send the response of a request.
+
+        Returns:
+            True if the connection can be used for another request.
+        """
+        if request.method not in ["GET", "HEAD"]:
+            await self._send_error(
+                writer, HTTPStatus.METHOD_NOT_ALLOWED, {"Allow": "GET, HEAD"}
+            )
+            return False
+
+        keep_alive = request.keep_alive
+        url = urlsplit(request.target)
+        url_path = unquote(url.path)
+        filepath = self._resolve(url_path)
+        if filepath is None:
+            await self._send_error(
+                writer, HTTPStatus.FORBIDDEN, keep_alive=keep_alive
+            )
+            return keep_alive
+
+        try:
+            if filepath.is_dir():
+                if not url_path.endswith("/"):
+                    location = quote(url_path) + "/"
+                    if url.query:
+                        location = f"{location}?{url.query}"
+                    await self._send_error(
+                        writer,
+                        HTTPStatus.MOVED_PERMANENTLY,
+                        {"Location": location},
+                        keep_alive,
+                        request.method == "GET",
+                    )
+                    return keep_alive
+                filepath = filepath.joinpath("index.html")
+            stat = filepath.stat()
+        except OSError:
+            stat = None
+
+        if stat is None or not filepath.is_file():
+            await self._send_error(
+                writer,
+                HTTPStatus.NOT_FOUND,
+                keep_alive=keep_alive,
+                send_body=request.method == "GET",
+            )
+            return keep_alive
+
+        range_header = request.headers.get("range")
+        encoding = None
+        if range_header is None:
+            filepath, stat, encoding = self._select_variant(
+                request, filepath, stat
+            )
+
+        etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        if encoding is not None:
+            etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}-{encoding}"'
+        last_modified = formatdate(stat.st_mtime, usegmt=True)
+        headers = {
+            "Content-Type": __guess_content_type__(
+                filepath.with_suffix("") if encoding else filepath
+            ),
+            "ETag": etag,
+            "Last-Modified": last_modified,
+            "Cache-Control": "public, max-age=0",
+            "Accept-Ranges": "bytes",
+            "Vary": "Accept-Encoding",
+        }
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+
+        if self._is_not_modified(request, etag, stat):
+            await self._send_head(
+                writer, HTTPStatus.NOT_MODIFIED, headers, keep_alive
+            )
+            return keep_alive
+
+        status = HTTPStatus.OK
+        start, count = 0, stat.st_size
+        if_range = request.headers.get("if-range")
+        if range_header is not None and if_range in [None, etag, last_modified]:
+            try:
+                byte_range = __parse_range__(range_header, stat.st_size)
+            except ValueError:
+                headers["Content-Range"] = f"bytes */{stat.st_size}"
+                await self._send_error(
+                    writer,
+                    HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE,
+                    headers,
+                    keep_alive,
+                    request.method == "GET",
+                )
+                return keep_alive
+
+            if byte_range is not None:
+                status = HTTPStatus.PARTIAL_CONTENT
+                start, count = byte_range[0], byte_range[1] - byte_range[0] + 1
+                headers[
+                    "Content-Range"
+                ] = f"bytes {byte_range[0]}-{byte_range[1]}/{stat.st_size}"
+
+        headers["Content-Length"] = str(count)
+        with open(filepath, "rb") as f:
+            await self._send_head(writer, status, headers, keep_alive)
+            if request.method == "GET" and count > 0:
+                await asyncio.get_running_loop().sendfile(
+                    writer.transport, f, start, count
+                )
+        return keep_alive
+
+    def _is_not_modified(
+        self, request: Request, etag: str, stat: os.stat_result
+    ) -> bool:
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            etags = [
+                x.strip().removeprefix("W/") for x in if_none_match.split(",")
+            ]
+            return "*" in etags or etag in etags
+
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since is not None:
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return int(stat.st_mtime) <= since
+        return False
+
+    async def _send_head(
+        self,
+        writer: asyncio.StreamWriter,
+        status: HTTPStatus,
+        headers: Dict[str, str],
+        keep_alive: bool,
+    ):
+        head = [f"HTTP/1.1 {status.value} {status.phrase}"]
+        head.append(f"Date: {formatdate(usegmt=True)}")
+        head.append("Server: journal-manager")
+        head.append(f"Connection: {'keep-alive' if keep_alive else 'close'}")
+        head.extend(f"{name}: {value}" for name, value in headers.items())
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1"))
+        await writer.drain()
+
+    async def _send_error(
+        self,
+        writer: asyncio.StreamWriter,
+        status: HTTPStatus,
+        headers: Optional[Dict[str, str]] = None,
+        keep_alive: bool = False,
+        send_body: bool = True,
+    ):
+        body = f"{status.value} {status.phrase}\n".encode()
+        error_headers = {
+            "Content-Type": "text/plain; charset=utf-8",
+            "Content-Length": str(len(body)),
+        }
+        for name in ["Allow", "Location", "Content-Range"]:
+            if headers is not None and name in headers:
+                error_headers[name] = headers[name]
+        await self._send_head(writer, status, error_headers, keep_alive)
+        if send_body:
+            writer.write(body)
+            await writer.drain()
+
+
+def serve(root: Path, host: Optional[str] = None, port: int = DEFAULT_PORT):
+    """
+    Serve the files of a folder until the process is interrupted.
+
+    Args:
+        root: Folder to serve.
+        host (optional): Interface to listen on. By default, all.
+        port (optional): Port to listen on.
+    """
+    __raise_open_files_limit__()
+
+    async def run_server():
+        server = await StaticFileServer(root).start(host, port)
+        print(f"Server running at http://{host or 'localhost'}:{port}")
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(run_server())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,104 @@
+"""
+Shared jinja2 environments used to render journal-manager templates.
+"""
+
+from danoan.journal_manager.core import api, exceptions
+
+from pathlib import Path
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+from jinja2 import (
+    BaseLoader,
+    Environment,
+    FileSystemBytecodeCache,
+    FileSystemLoader,
+    PackageLoader,
+)
+
+__environments_guard__ = threading.Lock()
+__environments__: Dict[Tuple[str, ...], Environment] = {}
+
+
+def get_bytecode_cache_folder() -> Optional[Path]:
+    """
+    Return the folder where compiled templates are stored.
+
+    The folder is located in the journal-manager configuration folder. If
+    the configuration folder is not set, None is returned.
+    """
+    try:
+        return api.get_configuration_folder().joinpath("cache", "jinja2")
+    except exceptions.ConfigurationFolderDoesNotExist:
+        return None
+
+
+def __get_environment__(
+    key: Tuple[str, ...], create_loader: Callable[[], BaseLoader]
+) -> Environment:
+    """
+    Return the environment registered with key, creating it if necessary.
+
+    Compiled templates are kept in memory by the environment and on disk by
+    the bytecode cache, so they are shared among processes. Templates are
+    compiled again whenever their source changes.
+    """
+    bytecode_cache_folder = get_bytecode_cache_folder()
+    key = (*key, str(bytecode_cache_folder))
+
+    with __environments_guard__:
+        if key not in __environments__:
+            bytecode_cache = None
+            if bytecode_cache_folder is not None:
+                bytecode_cache_folder.mkdir(parents=True, exist_ok=True)
+                bytecode_cache = FileSystemBytecodeCache(
+                    bytecode_cache_folder.as_posix()
+                )
+
+            __environments__[key] = Environment(
+                loader=create_loader(),
+                bytecode_cache=bytecode_cache,
+                auto_reload=True,
+            )
+        return __environments__[key]
+
+
+def get_package_environment(
+    package_name: str = "danoan.journal_manager.assets",
+    package_path: str = "templates",
+) -> Environment:
+    """
+    Return the shared environment of templates distributed with a package.
+
+    Args:
+        package_name (optional): Package containing the templates.
+        package_path (optional): Folder of the templates in the package.
+    """
+    return __get_environment__(
+        ("package", package_name, package_path),
+        lambda: PackageLoader(package_name, package_path=package_path),
+    )
+
+
+def get_filesystem_environment(templates_folder: Path) -> Environment:
+    """
+    Return the shared environment of templates located in a folder.
+
+    Args:
+        templates_folder: Folder of the templates.
+    """
+    templates_folder = Path(templates_folder).expanduser().absolute()
+    return __get_environment__(
+        ("filesystem", templates_folder.as_posix()),
+        lambda: FileSystemLoader(templates_folder),
+    )
+
+
+def clear_environments():
+    """
+    Forget all shared environments.
+
+    The bytecode cache on disk is kept.
+    """
+    with __environments_guard__:
+        __environments__.clear()
@@ -4,9 +4,12 @@ Data model for journal-manager api.
 
 from danoan.toml_dataclass import TomlDataClassIO, TomlTableDataClassIO
 
+import copy
 from dataclasses import dataclass
 from enum import Enum
-from typing import List, Optional, TypeVar, Type, Dict, Any
+import os
+from pathlib import Path
+from typing import List, Optional, TypeVar, Type, Dict, Any, Tuple
 
 
 class LogicOperator(Enum):
@@ -30,6 +33,9 @@ class ConfigurationFile(TomlDataClassIO):
     template_data_filepath: str
     parameters: Parameters
 
+    # Storage backend of the journals register. See core.backends.
+    journal_data_backend: str = "toml"
+
     @classmethod
     def from_dict(cls: Type[T], d: Dict[str, Any]) -> T:
         d["parameters"] = Parameters(**d["parameters"])
@@ -51,10 +57,148 @@ class JournalData(TomlDataClassIO):
     last_edit_date: str
 
 
+def normalize_location(location_folder: str) -> str:
+    """
+    Return the canonical string used to compare journal location folders.
+
+    User home is expanded and redundant separators, trailing slashes and
+    up-level references are collapsed. The file system is not accessed.
+    """
+    return os.path.normpath(Path(location_folder).expanduser().as_posix())
+
+
 @dataclass
 class JournalDataList(TomlTableDataClassIO):
+    """
+    Journal register with hash indexes on name and location folder.
+
+    The indexes are built at instantiation and they are kept up to date
+    as long as the register is modified via `append`, `remove` and
+    `update`. Modifying `list_of_journal_data` directly requires a call
+    to `reindex`.
+    """
+
     list_of_journal_data: List[JournalData]
 
+    def __post_init__(self):
+        self.reindex()
+
+    def __deepcopy__(self, memo):
+        # JournalData attributes are immutable, so a shallow copy per entry
+        # is enough. Indexes are keyed by object identity and are rebuilt.
+        return JournalDataList(
+            [copy.copy(x) for x in self.list_of_journal_data]
+        )
+
+    def reindex(self):
+        """
+        Rebuild the name and location indexes from scratch.
+        """
+        self._name_index: Dict[str, List[JournalData]] = {}
+        self._location_index: Dict[str, List[JournalData]] = {}
+        self._indexed_keys: Dict[int, Tuple[str, str]] = {}
+        for journal_data in self.list_of_journal_data:
+            self._index_entry(journal_data)
+
+    def append(self, journal_data: JournalData):
+        """
+        Add a journal to the register.
+        """
+        self.list_of_journal_data.append(journal_data)
+        self._index_entry(journal_data)
+
+    def remove(self, journal_data: JournalData):
+        """
+        Remove a journal from the register.
+
+        Raises:
+            ValueError if the journal is not in the register.
+        """
+        registered: Optional[JournalData] = journal_data
+        if id(journal_data) not in self._indexed_keys:
+            candidates = self._name_index.get(journal_data.name, [])
+            registered = next(
+                (x for x in candidates if x == journal_data), None
+            )
+
+        if registered is None:
+            raise ValueError(f"Journal {journal_data.name} is not registered.")
+
+        for i, entry in enumerate(self.list_of_journal_data):
+            if entry is registered:
+                del self.list_of_journal_data[i]
+                break
+        self._unindex_entry(registered)
+
+    def update(self, journal_data: JournalData) -> bool:
+        """
+        Replace the registered journal that has the same name as `journal_data`.
+
+        If `journal_data` is a registered object modified in place, only
+        its index entries are refreshed.
+
+        Returns:
+            True if the journal was found in the register. False otherwise.
+        """
+        if id(journal_data) in self._indexed_keys:
+            self._unindex_entry(journal_data)
+            self._index_entry(journal_data)
+            return True
+
+        candidates = self._name_index.get(journal_data.name, [])
+        if len(candidates) == 0:
+            return False
+
+        registered = candidates[0]
+        for i, entry in enumerate(self.list_of_journal_data):
+            if entry is registered:
+                self.list_of_journal_data[i] = journal_data
+                break
+
+        self._unindex_entry(registered)
+        self._index_entry(journal_data)
+        return True
+
+    def find_by_name(self, journal_name: str) -> List[JournalData]:
+        """
+        Return the registered journals with the given name.
+        """
+        return list(self._name_index.get(journal_name, []))
+
+    def find_by_location(self, location_folder: str) -> List[JournalData]:
+        """
+        Return the registered journals with the given location folder.
+
+        Locations are compared after normalization.
+        """
+        return list(
+            self._location_index.get(normalize_location(location_folder), [])
+        )
+
+    def _index_entry(self, journal_data: JournalData):
+        name_key = journal_data.name
+        location_key = normalize_location(journal_data.location_folder)
+
+        self._name_index.setdefault(name_key, []).append(journal_data)
+        self._location_index.setdefault(location_key, []).append(journal_data)
+        self._indexed_keys[id(journal_data)] = (name_key, location_key)
+
+    def _unindex_entry(self, journal_data: JournalData):
+        keys = self._indexed_keys.pop(id(journal_data), None)
+        if keys is None:
+            return
+
+        name_key, location_key = keys
+        for index, key in [
+            (self._name_index, name_key),
+            (self._location_index, location_key),
+        ]:
+            bucket = [x for x in index[key] if x is not journal_data]
+            if len(bucket) == 0:
+                del index[key]
+            else:
+                index[key] = bucket
+
 
 @dataclass
 class JournalTemplate(TomlDataClassIO):
@@ -74,7 +218,46 @@ class BuildInstructions(TomlDataClassIO):
     build_index: bool = True
     build_inactive: bool = False
     with_http_server: bool = False
+    # Either "python" or "node". See core.http_server.
+    http_server_backend: str = "python"
+
+    # Number of journals built concurrently. If 0, use all available CPUs.
+    max_workers: int = 1
+    # Either "subprocess" or "in-process". See cli.wrappers.mkdocs_wrapper.
+    build_engine: str = "subprocess"
+
+    # If True, journals are built even if they did not change since the
+    # last build.
+    force_rebuild: bool = False
+
+    # Number of build generations kept per journal for rollback.
+    generations_to_keep: int = 3
+
+    # If True, compressed copies of the site files are written for the
+    # http server.
+    precompress: bool = False
 
     journals_names_to_build: Optional[List[str]] = None
     journals_locations_to_build: Optional[List[str]] = None
     include_all_folder: Optional[str] = None
+
+
+@dataclass
+class JournalBuildRecord(TomlDataClassIO):
+    name: str
+    fingerprint: str
+
+
+@dataclass
+class BuildManifest(TomlTableDataClassIO):
+    list_of_build_records: List[JournalBuildRecord]
+
+
+@dataclass
+class SearchResult:
+    journal: str
+    path: str
+    title: str
+    snippet: str
+    # BM25 score. Lower is better.
+    score: float
@@ -0,0 +1,240 @@
+"""
+Wall and CPU time measurement of the build pipeline.
+"""
+
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List
+
+try:
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None  # type: ignore
+
+STEP_CATEGORY = "step"
+TASK_CATEGORY = "task"
+JOURNAL_CATEGORY = "journal"
+MKDOCS_CATEGORY = "mkdocs"
+
+
+@dataclass
+class Span:
+    """
+    A measured section of the build.
+
+    The start is a unix timestamp, so spans recorded by different processes
+    can be compared. The cpu time is the time of the thread that measured
+    the span, so spans running concurrently in other threads are not
+    counted. Spans that start child processes (e.g. mkdocs) also count
+    the time of the child processes that finished during the span.
+    """
+
+    name: str
+    category: str
+    start: float
+    wall_time: float = 0
+    cpu_time: float = 0
+    pid: int = 0
+    tid: int = 0
+    args: Dict[str, Any] = field(default_factory=dict)
+
+
+def __get_children_cpu_time__() -> float:
+    if resource is None:
+        return 0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+@contextmanager
+def measure(
+    name: str, category: str, include_children: bool = False, **kwargs
+) -> Iterator[Span]:
+    """
+    Measure the wall and cpu time of a block of code.
+
+    The span is completed when the block exits, even if an exception
+    is raised. The block must run in the thread that enters it.
+
+    Args:
+        name: Name of the span.
+        category: Category of the span, e.g. STEP_CATEGORY.
+        include_children (optional): If True, the cpu time of the child
+                                     processes that finished during the
+                                     span is added. It is accounted for
+                                     the whole process, so only set it for
+                                     blocks that start subprocesses.
+        kwargs: Additional information attached to the span.
+    """
+    span = Span(
+        name,
+        category,
+        time.time(),
+        pid=os.getpid(),
+        tid=threading.get_ident(),
+        args=kwargs,
+    )
+    start_wall_time = time.perf_counter()
+    start_cpu_time = time.thread_time()
+    if include_children:
+        start_children_cpu_time = __get_children_cpu_time__()
+    try:
+        yield span
+    finally:
+        span.wall_time = time.perf_counter() - start_wall_time
+        span.cpu_time = time.thread_time() - start_cpu_time
+        if include_children:
+            span.cpu_time += (
+                __get_children_cpu_time__() - start_children_cpu_time
+            )
+
+
+class Profiler:
+    """
+    Collect the spans of a build.
+
+    Spans measured in worker processes are returned to the main process
+    and added with `add_spans`.
+    """
+
+    def __init__(self):
+        self.spans: List[Span] = []
+        self.pid = os.getpid()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(
+        self,
+        name: str,
+        category: str,
+        include_children: bool = False,
+        **kwargs,
+    ) -> Iterator[Span]:
+        """
+        Measure a block of code and record its span.
+
+        See `measure` for the arguments.
+        """
+        with measure(name, category, include_children, **kwargs) as span:
+            try:
+                yield span
+            finally:
+                self.add_spans([span])
+
+    def add_spans(self, spans: Iterable[Span]):
+        with self._lock:
+            self.spans.extend(spans)
+
+    def get_report(self) -> Dict[str, Any]:
+        """
+        Return a json serializable report of the build.
+
+        The report lists the time of each build step and of each journal
+        build, with the mkdocs time split out, plus all the recorded spans.
+        """
+        with self._lock:
+            spans = sorted(self.spans, key=lambda x: x.start)
+
+        journals: Dict[str, Dict[str, Any]] = {}
+        for span in spans:
+            if span.category not in [JOURNAL_CATEGORY, MKDOCS_CATEGORY]:
+                continue
+            journal_name = span.args.get("journal", span.name)
+            entry = journals.setdefault(
+                journal_name,
+                {
+                    "name": journal_name,
+                    "wall_time": 0,
+                    "cpu_time": 0,
+                    "mkdocs_wall_time": 0,
+                    "mkdocs_cpu_time": 0,
+                    "pid": span.pid,
+                },
+            )
+            if span.category == JOURNAL_CATEGORY:
+                entry["wall_time"] += span.wall_time
+                entry["cpu_time"] += span.cpu_time
+            else:
+                entry["mkdocs_wall_time"] += span.wall_time
+                entry["mkdocs_cpu_time"] += span.cpu_time
+
+        return {
+            "steps": [
+                {
+                    "name": span.name,
+                    "wall_time": span.wall_time,
+                    "cpu_time": span.cpu_time,
+                }
+                for span in spans
+                if span.category == STEP_CATEGORY
+            ],
+            "journals": list(journals.values()),
+            "spans": [asdict(span) for span in spans],
+        }
+
+    def get_summary(self, top_n: int = 10) -> str:
+        """
+        Return a table with the top_n longest spans.
+        """
+        with self._lock:
+            spans = sorted(self.spans, key=lambda x: x.wall_time, reverse=True)
+
+        lines = [
+            f"{'Span':<40} {'Category':<10} {'Wall (s)':>10} {'CPU (s)':>10}"
+        ]
+        for span in spans[:top_n]:
+            name = span.name
+            if "journal" in span.args and span.args["journal"] != name:
+                name = f"{name} ({span.args['journal']})"
+            lines.append(
+                f"{name[:40]:<40} {span.category:<10} "
+                f"{span.wall_time:>10.3f} {span.cpu_time:>10.3f}"
+            )
+        return "\n".join(lines)
+
+    def get_trace(self) -> Dict[str, Any]:
+        """
+        Return the spans in the Chrome trace event format.
+
+        The result can be opened with chrome://tracing or Perfetto. Each
+        process is shown in its own track, so the spans of parallel build
+        workers appear side by side. Timestamps are in microseconds since
+        the first span.
+        """
+        with self._lock:
+            spans = sorted(self.spans, key=lambda x: x.start)
+
+        origin = spans[0].start if len(spans) > 0 else 0
+        events: List[Dict[str, Any]] = []
+        for pid in sorted(set(span.pid for span in spans)):
+            process_name = (
+                "journal-manager" if pid == self.pid else f"build worker {pid}"
+            )
+            events.append(
+                {
+                    "name": "process_name",
+                    "ph": "M",
+                    "pid": pid,
+                    "tid": 0,
+                    "args": {"name": process_name},
+                }
+            )
+
+        for span in spans:
+            events.append(
+                {
+                    "name": span.name,
+                    "cat": span.category,
+                    "ph": "X",
+                    "ts": round((span.start - origin) * 1e6),
+                    "dur": round(span.wall_time * 1e6),
+                    "pid": span.pid,
+                    "tid": span.tid,
+                    "args": {**span.args, "cpu_time": span.cpu_time},
+                }
+            )
+
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
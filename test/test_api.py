@@ -1,5 +1,15 @@
-from danoan.journal_manager.core import api, model
+from danoan.journal_manager.core import (
+    api,
+    backends,
+    exceptions,
+    file_utils,
+    jinja_utils,
+    model,
+)
 
+from conftest import *
+import multiprocessing
+import os
 import pytest
 
 
@@ -67,3 +77,299 @@ def test_find_journal_by_active_status(journal_data_list):
     assert results and len(results) == 2
     assert results[0] == journal_data_list.list_of_journal_data[0]
     assert results[1] == journal_data_list.list_of_journal_data[1]
+
+
+def test_find_journal_by_name_after_append(journal_data_list):
+    new_journal = model.JournalData(
+        "cooking",
+        "/home/user/journals/cooking",
+        True,
+        "Cooking",
+        "2023-10-14T09:14:32.914681",
+    )
+    journal_data_list.append(new_journal)
+
+    assert api.find_journal_by_name(journal_data_list, "cooking") is new_journal
+    assert (
+        api.find_journal_by_location(
+            journal_data_list, "/home/user/journals/cooking"
+        )
+        is new_journal
+    )
+
+
+def test_find_journal_after_remove(journal_data_list):
+    traveling = api.find_journal_by_name(journal_data_list, "traveling")
+    assert traveling
+
+    journal_data_list.remove(traveling)
+
+    assert api.find_journal_by_name(journal_data_list, "traveling") is None
+    assert (
+        api.find_journal_by_location(
+            journal_data_list, "/home/user/journals/traveling"
+        )
+        is None
+    )
+    assert len(journal_data_list.list_of_journal_data) == 2
+
+
+@pytest.mark.parametrize(
+    "location",
+    [
+        "/home/user/journals/theater/",
+        "/home/user/journals//theater",
+        "/home/user/journals/traveling/../theater",
+    ],
+)
+def test_find_journal_by_normalized_location(journal_data_list, location):
+    journal_data = api.find_journal_by_location(journal_data_list, location)
+    assert journal_data == journal_data_list.list_of_journal_data[2]
+
+
+def test_update_journal_index(journal_data_list, f_setup_init):
+    theater = api.find_journal_by_name(journal_data_list, "theater")
+    assert theater
+
+    theater.location_folder = "/home/user/archive/theater"
+    api.update_journal(journal_data_list, theater)
+
+    assert (
+        api.find_journal_by_location(
+            journal_data_list, "/home/user/journals/theater"
+        )
+        is None
+    )
+    assert (
+        api.find_journal_by_location(
+            journal_data_list, "/home/user/archive/theater"
+        )
+        is theater
+    )
+
+    replacement = model.JournalData(
+        "theater",
+        "/home/user/journals/theater",
+        True,
+        "Theater",
+        "2023-10-15T09:14:32.914681",
+    )
+    api.update_journal(journal_data_list, replacement)
+
+    assert api.find_journal_by_name(journal_data_list, "theater") is replacement
+    assert journal_data_list.list_of_journal_data[2] is replacement
+    assert (
+        api.find_journal_by_location(
+            journal_data_list, "/home/user/archive/theater"
+        )
+        is None
+    )
+
+
+def test_journal_data_file_is_parsed_once(f_setup_init, monkeypatch):
+    read_calls = []
+    original_read = model.JournalDataList.read.__func__
+
+    def counting_read(cls, stream_in):
+        read_calls.append(stream_in)
+        return original_read(cls, stream_in)
+
+    monkeypatch.setattr(
+        model.JournalDataList, "read", classmethod(counting_read)
+    )
+    api.invalidate_cache()
+
+    first = api.get_journal_data_file()
+    second = api.get_journal_data_file()
+    assert len(read_calls) == 1
+
+    # Callers receive independent copies of the cached register
+    first.append(
+        model.JournalData("cooking", "/tmp/cooking", True, "Cooking", "")
+    )
+    assert api.find_journal_by_name(second, "cooking") is None
+    assert (
+        api.find_journal_by_name(api.get_journal_data_file(), "cooking") is None
+    )
+
+    api.write_journal_data_file(first)
+    assert api.find_journal_by_name(api.get_journal_data_file(), "cooking")
+    assert len(read_calls) == 2
+
+
+def test_cache_detects_external_modification(f_setup_init):
+    journal_data_file = api.get_journal_data_file()
+    assert len(journal_data_file.list_of_journal_data) == 0
+
+    journal_data_file.append(
+        model.JournalData("cooking", "/tmp/cooking", True, "Cooking", "")
+    )
+    with open(api.get_configuration_file().journal_data_filepath, "w") as f:
+        journal_data_file.write(f)
+
+    assert api.find_journal_by_name(api.get_journal_data_file(), "cooking")
+
+
+def test_transaction_commits_with_a_single_write(f_setup_init, monkeypatch):
+    write_calls = []
+    original_write = backends.TomlJournalDataBackend._write
+
+    def counting_write(self, journal_data_file):
+        write_calls.append(journal_data_file)
+        original_write(self, journal_data_file)
+
+    monkeypatch.setattr(
+        backends.TomlJournalDataBackend, "_write", counting_write
+    )
+
+    with api.journal_data_transaction() as transaction:
+        for i in range(5):
+            transaction.add_journal(
+                model.JournalData(f"j-{i}", f"/tmp/j-{i}", True, f"J {i}", "")
+            )
+        j_0 = api.find_journal_by_name(transaction.journal_data_file, "j-0")
+        assert j_0
+        j_0.active = False
+        transaction.update_journal(j_0)
+
+        j_1 = api.find_journal_by_name(transaction.journal_data_file, "j-1")
+        assert j_1
+        transaction.remove_journal(j_1)
+
+        assert len(write_calls) == 0
+
+    assert len(write_calls) == 1
+
+    journal_data_file = api.get_journal_data_file()
+    assert [x.name for x in journal_data_file.list_of_journal_data] == [
+        "j-0",
+        "j-2",
+        "j-3",
+        "j-4",
+    ]
+    j_0 = api.find_journal_by_name(journal_data_file, "j-0")
+    assert j_0 and j_0.active == False
+
+
+def test_transaction_is_discarded_on_error(f_setup_init):
+    with pytest.raises(exceptions.InvalidName):
+        with api.journal_data_transaction() as transaction:
+            transaction.add_journal(
+                model.JournalData("j", "/tmp/j", True, "J", "")
+            )
+            transaction.add_journal(
+                model.JournalData("j", "/tmp/another-j", True, "J", "")
+            )
+
+    journal_data_file = api.get_journal_data_file()
+    assert len(journal_data_file.list_of_journal_data) == 0
+
+
+def __register_journals_from_stale_snapshot__(process_index: int):
+    journal_data_file = api.get_journal_data_file()
+    for i in range(10):
+        api.add_journal(
+            journal_data_file,
+            model.JournalData(
+                f"p{process_index}-{i}",
+                f"/tmp/p{process_index}-{i}",
+                True,
+                "",
+                "",
+            ),
+        )
+
+
+def test_concurrent_writers_do_not_lose_updates(f_setup_init):
+    context = multiprocessing.get_context("fork")
+    processes = [
+        context.Process(
+            target=__register_journals_from_stale_snapshot__, args=[i]
+        )
+        for i in range(4)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    assert all(process.exitcode == 0 for process in processes)
+    assert len(api.get_journal_data_file().list_of_journal_data) == 40
+
+
+def test_atomic_write_keeps_original_on_error(tmp_path):
+    filepath = tmp_path.joinpath("data.toml")
+    filepath.write_text("original")
+
+    with pytest.raises(RuntimeError):
+        with file_utils.atomic_write(filepath) as f:
+            f.write("partial")
+            raise RuntimeError()
+
+    assert filepath.read_text() == "original"
+
+    with file_utils.atomic_write(filepath) as f:
+        f.write("updated")
+
+    assert filepath.read_text() == "updated"
+    assert sorted(x.name for x in tmp_path.iterdir()) == [
+        "data.toml",
+        "data.toml.lock",
+    ]
+
+
+def test_jinja_environments_are_shared(f_setup_init, tmp_path):
+    assert (
+        jinja_utils.get_package_environment()
+        is jinja_utils.get_package_environment()
+    )
+
+    templates_folder = tmp_path.joinpath("templates", "my-template")
+    templates_folder.mkdir(parents=True)
+    template_path = templates_folder.joinpath("mkdocs.tpl.yml")
+    template_path.write_text("site_name: {{ title }}")
+
+    env = jinja_utils.get_filesystem_environment(templates_folder)
+    assert env is jinja_utils.get_filesystem_environment(templates_folder)
+    assert (
+        env.get_template("mkdocs.tpl.yml").render(title="A") == "site_name: A"
+    )
+
+    # Compiled templates are persisted in the configuration folder
+    bytecode_cache_folder = jinja_utils.get_bytecode_cache_folder()
+    assert bytecode_cache_folder
+    assert len(list(bytecode_cache_folder.iterdir())) == 1
+
+    # A modified template is compiled again
+    template_path.write_text("site_name: {{ title }}!")
+    os.utime(template_path, ns=(0, template_path.stat().st_mtime_ns + 10**9))
+    assert (
+        env.get_template("mkdocs.tpl.yml").render(title="A") == "site_name: A!"
+    )
+
+    # A new environment reuses the bytecode of the new template version
+    jinja_utils.clear_environments()
+    env = jinja_utils.get_filesystem_environment(templates_folder)
+    assert env is not jinja_utils.get_package_environment()
+    assert (
+        env.get_template("mkdocs.tpl.yml").render(title="B") == "site_name: B!"
+    )
+
+
+def test_atomic_write_without_lock(tmp_path):
+    filepath = tmp_path.joinpath("index.html")
+
+    with file_utils.atomic_write(filepath, lock=False) as f:
+        f.write("<html></html>")
+
+    assert filepath.read_text() == "<html></html>"
+    assert [x.name for x in tmp_path.iterdir()] == ["index.html"]
+
+
+def test_backends_must_implement_read_and_write(tmp_path):
+    class ReadOnlyBackend(backends.JournalDataBackend):
+        def read(self):
+            return model.JournalDataList([])
+
+    with pytest.raises(TypeError):
+        ReadOnlyBackend(tmp_path.joinpath("journal_data"))  # type: ignore
@@ -1,17 +1,33 @@
 from danoan.journal_manager.cli.commands.build import (
+    BuildGraph,
+    BuildHttpServer,
+    BuildStep,
+    FailedStep,
     build as build_journal,
+    get_build_steps,
+    register_build_step,
+    rollback as rollback_journal,
     __merge_build_instructions__,
+    __precompress_directory__,
+    __report_profile__,
+    __sync_directory__,
 )
 import danoan.journal_manager.cli.commands.journal_commands as jm
+from danoan.journal_manager.cli.wrappers import mkdocs_wrapper, node_wrapper
 
-from danoan.journal_manager.core import api
+from danoan.journal_manager.core import api, exceptions, profiling
 from danoan.journal_manager.core import model
 from danoan.journal_manager.cli import utils
 
 from conftest import *
 
+import gzip
+import json
 from pathlib import Path
 import pytest
+import subprocess
+import threading
+from typing import Dict, List
 
 
 @pytest.mark.usefixtures("f_set_env_variable")
@@ -34,6 +50,9 @@ class TestBuild:
 
         if build_index:
             assert build_location.joinpath("site", "index.html").exists()
+            assert not build_location.joinpath(
+                "site", "index.html.lock"
+            ).exists()
         else:
             assert not build_location.joinpath("site", "index.html").exists()
 
@@ -196,3 +215,695 @@ class TestBuild:
             assert not default_build_location.joinpath(
                 "site", "journal-2", "index.html"
             ).exists()
+
+    @pytest.mark.parametrize(
+        "max_workers, build_engine",
+        [
+            (0, mkdocs_wrapper.SUBPROCESS_ENGINE),
+            (2, mkdocs_wrapper.SUBPROCESS_ENGINE),
+            (1, mkdocs_wrapper.IN_PROCESS_ENGINE),
+            (2, mkdocs_wrapper.IN_PROCESS_ENGINE),
+        ],
+    )
+    def test_build_in_parallel(
+        self, f_setup_init, tmp_path, max_workers, build_engine
+    ):
+        for i in range(4):
+            jm.create.create(f"journal-{i}", tmp_path)
+        build_location = tmp_path.joinpath("build")
+        build_location.mkdir()
+
+        build_instructions = __merge_build_instructions__(
+            build_location.expanduser().as_posix(),
+            max_workers=max_workers,
+            build_engine=build_engine,
+        )
+
+        build_result = build_journal(build_instructions)
+
+        assert build_result["failed_journals"] == {}
+        assert [x.name for x in build_result["journal_data"]["journals"]] == [
+            f"journal-{i}" for i in range(4)
+        ]
+        for i in range(4):
+            assert build_location.joinpath(
+                "site", f"journal-{i}", "index.html"
+            ).exists()
+
+    @pytest.mark.parametrize(
+        "max_workers, build_engine",
+        [
+            (1, mkdocs_wrapper.SUBPROCESS_ENGINE),
+            (2, mkdocs_wrapper.SUBPROCESS_ENGINE),
+            (1, mkdocs_wrapper.IN_PROCESS_ENGINE),
+        ],
+    )
+    def test_build_failure_does_not_abort_others(
+        self, f_setup_init, tmp_path, max_workers, build_engine
+    ):
+        self.create_mock_journals(tmp_path)
+        tmp_path.joinpath("journal-1", "mkdocs.yml").write_text("site_name: [")
+
+        build_location = tmp_path.joinpath("build")
+        build_location.mkdir()
+
+        build_instructions = __merge_build_instructions__(
+            build_location.expanduser().as_posix(),
+            max_workers=max_workers,
+            build_engine=build_engine,
+        )
+
+        build_result = build_journal(build_instructions)
+
+        assert list(build_result["failed_journals"].keys()) == ["journal-1"]
+        assert build_location.joinpath("site", "index.html").exists()
+        assert build_location.joinpath(
+            "site", "journal-2", "index.html"
+        ).exists()
+
+    def test_incremental_build(self, f_setup_init, tmp_path, monkeypatch):
+        from danoan.journal_manager.cli.commands import build as build_module
+
+        self.create_mock_journals(tmp_path)
+        build_location = tmp_path.joinpath("build")
+        build_location.mkdir()
+
+        # The build environment is fingerprinted once per build
+        environment_fingerprint_calls: List[str] = []
+        get_environment_fingerprint = (
+            build_module.__get_build_environment_fingerprint__
+        )
+
+        def count_environment_fingerprint():
+            fingerprint = get_environment_fingerprint()
+            environment_fingerprint_calls.append(fingerprint)
+            return fingerprint
+
+        monkeypatch.setattr(
+            build_module,
+            "__get_build_environment_fingerprint__",
+            count_environment_fingerprint,
+        )
+
+        def site_mtime(journal_name):
+            return (
+                build_location.joinpath("site", journal_name, "index.html")
+                .stat()
+                .st_mtime_ns
+            )
+
+        build_instructions = __merge_build_instructions__(
+            build_location.expanduser().as_posix()
+        )
+        build_journal(build_instructions)
+        assert build_location.joinpath("build-manifest.toml").exists()
+        assert len(environment_fingerprint_calls) == 1
+        first_mtimes = [site_mtime("journal-1"), site_mtime("journal-2")]
+
+        # Nothing changed
+        build_journal(build_instructions)
+        assert [
+            site_mtime("journal-1"),
+            site_mtime("journal-2"),
+        ] == first_mtimes
+
+        # A source file changed
+        tmp_path.joinpath("journal-1", "docs", "index.md").write_text("# New")
+        build_journal(build_instructions)
+        assert site_mtime("journal-1") != first_mtimes[0]
+        assert site_mtime("journal-2") == first_mtimes[1]
+
+        # The published site was removed
+        build_location.joinpath("site", "journal-2").unlink()
+        build_journal(build_instructions)
+        assert site_mtime("journal-2") != first_mtimes[1]
+
+        # Forced rebuild
+        second_mtimes = [site_mtime("journal-1"), site_mtime("journal-2")]
+        build_instructions.force_rebuild = True
+        build_journal(build_instructions)
+        assert site_mtime("journal-1") != second_mtimes[0]
+        assert site_mtime("journal-2") != second_mtimes[1]
+
+    def test_search_index(self, f_setup_init, tmp_path):
+        self.create_mock_journals(tmp_path)
+        # Journal sites named search do not clash with the merged index
+        jm.create.create("search", tmp_path)
+        build_location = tmp_path.joinpath("build")
+        build_location.mkdir()
+        site_folder = build_location.joinpath("site")
+        search_folder = site_folder.joinpath("_search")
+
+        build_instructions = __merge_build_instructions__(
+            build_location.expanduser().as_posix()
+        )
+        build_result = build_journal(build_instructions)
+        assert build_result["updated_search_shards"] == [
+            "journal-1",
+            "journal-2",
+            "search",
+        ]
+        assert list(site_folder.rglob("*.lock")) == []
+
+        manifest = json.loads(
+            search_folder.joinpath("manifest.json").read_text()
+        )
+        shards = {x["journal"]: x for x in manifest["shards"]}
+        assert sorted(shards) == ["journal-1", "journal-2", "search"]
+        for journal_name, shard in shards.items():
+            docs = json.loads(search_folder.joinpath(shard["url"]).read_text())[
+                "docs"
+            ]
+            assert len(docs) > 0
+            assert all(
+                x["location"].startswith(f"{journal_name}/") for x in docs
+            )
+
+        # Only the shard of the rebuilt journal is replaced, also when the
+        # index page is not rebuilt (e.g. by the file watcher)
+        tmp_path.joinpath("journal-1", "docs", "index.md").write_text(
+            "# Quaternions"
+        )
+        build_result = build_journal(
+            __merge_build_instructions__(
+                build_location.expanduser().as_posix(),
+                journals_names_to_build=["journal-1"],
+                build_index=False,
+            )
+        )
+        assert build_result["updated_search_shards"] == ["journal-1"]
+        assert list(site_folder.rglob("*.lock")) == []
+
+        manifest = json.loads(
+            search_folder.joinpath("manifest.json").read_text()
+        )
+        new_shards = {x["journal"]: x for x in manifest["shards"]}
+        assert new_shards["journal-2"] == shards["journal-2"]
+        assert new_shards["journal-1"]["url"] != shards["journal-1"]["url"]
+        assert not search_folder.joinpath(shards["journal-1"]["url"]).exists()
+        assert "Quaternions" in (
+            search_folder.joinpath(new_shards["journal-1"]["url"]).read_text()
+        )
+
+    def test_build_generations_and_rollback(self, f_setup_init, tmp_path):
+        self.create_mock_journals(tmp_path)
+        build_location = tmp_path.joinpath("build")
+        build_location.mkdir()
+        journal_site_folder = build_location.joinpath("site", "journal-1")
+        generations_folder = build_location.joinpath("generations", "journal-1")
+
+        build_instructions = __merge_build_instructions__(
+            build_location.expanduser().as_posix(),
+            journals_names_to_build=["journal-1"],
+            force_rebuild=True,
+            generations_to_keep=2,
+        )
+
+        published = []
+        for i in range(4):
+            tmp_path.joinpath("journal-1", "docs", "index.md").write_text(
+                f"# Version {i}"
+            )
+            build_journal(build_instructions)
+            assert journal_site_folder.is_symlink()
+            published.append(journal_site_folder.resolve())
+
+        assert len(set(published)) == 4
+        assert sorted(generations_folder.iterdir()) == published[-2:]
+        assert (
+            "Version 3"
+            in journal_site_folder.joinpath("index.html").read_text()
+        )
+
+        rolled_back = rollback_journal(build_instructions)
+        assert rolled_back == {"journal-1": published[2]}
+        assert journal_site_folder.resolve() == published[2]
+        assert (
+            "Version 2"
+            in journal_site_folder.joinpath("index.html").read_text()
+        )
+
+        # No older generation is left
+        assert rollback_journal(build_instructions) == {}
+
+        # The rolled back journal is built again by an incremental build
+        build_instructions.force_rebuild = False
+        build_journal(build_instructions)
+        assert (
+            "Version 3"
+            in journal_site_folder.joinpath("index.html").read_text()
+        )
+
+    def test_failed_build_keeps_published_site(self, f_setup_init, tmp_path):
+        self.create_mock_journals(tmp_path)
+        build_location = tmp_path.joinpath("build")
+        build_location.mkdir()
+        journal_site_folder = build_location.joinpath("site", "journal-1")
+
+        build_instructions = __merge_build_instructions__(
+            build_location.expanduser().as_posix(),
+            journals_names_to_build=["journal-1"],
+        )
+        build_journal(build_instructions)
+        published = journal_site_folder.resolve()
+
+        tmp_path.joinpath("journal-1", "mkdocs.yml").write_text("site_name: [")
+        build_result = build_journal(build_instructions)
+
+        assert list(build_result["failed_journals"].keys()) == ["journal-1"]
+        assert journal_site_folder.resolve() == published
+        assert list(
+            build_location.joinpath("generations", "journal-1").iterdir()
+        ) == [published]
+
+    def test_publish_replaces_site_folder(self, f_setup_init, tmp_path):
+        self.create_mock_journals(tmp_path)
+        build_location = tmp_path.joinpath("build")
+        journal_site_folder = build_location.joinpath("site", "journal-1")
+        journal_site_folder.mkdir(parents=True)
+        journal_site_folder.joinpath("index.html").write_text("old build")
+
+        build_journal(
+            __merge_build_instructions__(
+                build_location.expanduser().as_posix(),
+                journals_names_to_build=["journal-1"],
+            )
+        )
+        assert journal_site_folder.is_symlink()
+
+        rollback_journal(
+            __merge_build_instructions__(
+                build_location.expanduser().as_posix(),
+                journals_names_to_build=["journal-1"],
+            )
+        )
+        assert journal_site_folder.joinpath("index.html").read_text() == (
+            "old build"
+        )
+
+    def test_index_assets_are_not_copied_again(self, f_setup_init, tmp_path):
+        self.create_mock_journals(tmp_path)
+        build_location = tmp_path.joinpath("build")
+        build_location.mkdir()
+        assets_folder = build_location.joinpath("site", "assets")
+
+        build_instructions = __merge_build_instructions__(
+            build_location.expanduser().as_posix()
+        )
+        build_journal(build_instructions)
+        assets_stat = {
+            x: (x.stat().st_ino, x.stat().st_mtime_ns)
+            for x in assets_folder.rglob("*")
+            if x.is_file()
+        }
+        assert len(assets_stat) > 0
+
+        build_instructions.force_rebuild = True
+        build_journal(build_instructions)
+        assert assets_stat == {
+            x: (x.stat().st_ino, x.stat().st_mtime_ns)
+            for x in assets_folder.rglob("*")
+            if x.is_file()
+        }
+
+    def test_precompress(self, f_setup_init, tmp_path):
+        self.create_mock_journals(tmp_path)
+        build_location = tmp_path.joinpath("build")
+        build_location.mkdir()
+        build_instructions = __merge_build_instructions__(
+            build_location.as_posix(), precompress=True
+        )
+
+        build_result = build_journal(build_instructions)
+        site_folder = build_location.joinpath("site")
+        precompressed_files = build_result["precompressed_files"]
+        assert site_folder.joinpath("index.html") in precompressed_files
+        for journal_name in ["journal-1", "journal-2"]:
+            assert site_folder.joinpath(journal_name, "index.html") in (
+                precompressed_files
+            )
+        for filepath in precompressed_files:
+            compressed_filepath = Path(f"{filepath}.gz")
+            assert gzip.decompress(compressed_filepath.read_bytes()) == (
+                filepath.read_bytes()
+            )
+            assert compressed_filepath.stat().st_mtime_ns >= (
+                filepath.stat().st_mtime_ns
+            )
+
+        # Identical files of both journals share the compressed content
+        compressed_search_js = Path("search", "main.js.gz")
+        assert (
+            site_folder.joinpath("journal-1", compressed_search_js)
+            .stat()
+            .st_ino
+            == site_folder.joinpath("journal-2", compressed_search_js)
+            .stat()
+            .st_ino
+        )
+
+        # Only the index page, which is rendered at every build, is
+        # precompressed again
+        build_result = build_journal(build_instructions)
+        assert build_result["precompressed_files"] == [
+            site_folder.joinpath("index.html")
+        ]
+
+    @pytest.mark.parametrize(
+        "max_workers, build_engine",
+        [
+            (1, mkdocs_wrapper.SUBPROCESS_ENGINE),
+            (2, mkdocs_wrapper.IN_PROCESS_ENGINE),
+        ],
+    )
+    def test_build_profile(
+        self, f_setup_init, tmp_path, capsys, max_workers, build_engine
+    ):
+        self.create_mock_journals(tmp_path)
+        build_location = tmp_path.joinpath("build")
+        build_location.mkdir()
+
+        build_result = build_journal(
+            __merge_build_instructions__(
+                build_location.expanduser().as_posix(),
+                max_workers=max_workers,
+                build_engine=build_engine,
+            )
+        )
+
+        profile_filepath = tmp_path.joinpath("report.json")
+        __report_profile__(build_result, profile_filepath, 3)
+        report = json.loads(profile_filepath.read_text())
+        assert not tmp_path.joinpath("report.json.lock").exists()
+
+        assert sorted(x["name"] for x in report["steps"]) == [
+            "BuildHttpServer",
+            "BuildIndexPage",
+            "BuildJournals",
+            "BuildSearchIndex",
+            "PrecompressSite",
+            "SelectJournals",
+            "UpdateFullTextIndex",
+        ]
+        assert sorted(x["name"] for x in report["journals"]) == [
+            "journal-1",
+            "journal-2",
+        ]
+        for journal in report["journals"]:
+            assert 0 < journal["mkdocs_wall_time"] <= journal["wall_time"]
+            assert journal["mkdocs_cpu_time"] > 0
+
+        summary = capsys.readouterr().out.splitlines()
+        assert summary[-4].startswith("Span")
+        assert summary[-3].startswith("BuildJournals")
+
+    def test_span_cpu_time_excludes_other_threads(self):
+        stop_event = threading.Event()
+
+        def busy_loop():
+            while not stop_event.is_set():
+                pass
+
+        thread = threading.Thread(target=busy_loop)
+        thread.start()
+        try:
+            with profiling.measure("idle", profiling.TASK_CATEGORY) as span:
+                stop_event.wait(0.3)
+        finally:
+            stop_event.set()
+            thread.join()
+
+        assert span.wall_time >= 0.3
+        assert span.cpu_time < 0.1
+
+    def test_build_trace(self, f_setup_init, tmp_path):
+        self.create_mock_journals(tmp_path)
+        build_location = tmp_path.joinpath("build")
+        build_location.mkdir()
+
+        build_result = build_journal(
+            __merge_build_instructions__(
+                build_location.expanduser().as_posix(), max_workers=2
+            )
+        )
+
+        trace_filepath = tmp_path.joinpath("trace.json")
+        __report_profile__(build_result, trace_filepath=trace_filepath)
+        events = json.loads(trace_filepath.read_text())["traceEvents"]
+        assert not tmp_path.joinpath("trace.json.lock").exists()
+
+        spans = [x for x in events if x["ph"] == "X"]
+        assert {
+            "resolve journal names",
+            "load registry",
+            "copy assets",
+            "render index",
+            "BuildHttpServer",
+        }.issubset(x["name"] for x in spans)
+        assert all(x["ts"] >= 0 and x["dur"] >= 0 for x in spans)
+
+        # Journals are built by workers, which have their own track
+        journal_spans = [x for x in spans if x["cat"] == "journal"]
+        assert sorted(x["name"] for x in journal_spans) == [
+            "journal-1",
+            "journal-2",
+        ]
+        process_names = {
+            x["pid"]: x["args"]["name"] for x in events if x["ph"] == "M"
+        }
+        for journal_span in journal_spans:
+            assert process_names[journal_span["pid"]].startswith("build worker")
+
+
+def test_sync_directory(tmp_path):
+    src_dir = tmp_path.joinpath("src")
+    src_dir.joinpath("images").mkdir(parents=True)
+    src_dir.joinpath("main.css").write_text("body {}")
+    src_dir.joinpath("images", "logo.svg").write_text("<svg/>")
+
+    dest_dir = tmp_path.joinpath("dest")
+    updated_files = __sync_directory__(src_dir, dest_dir)
+    assert sorted(updated_files) == [
+        dest_dir.joinpath("images", "logo.svg"),
+        dest_dir.joinpath("main.css"),
+    ]
+    assert __sync_directory__(src_dir, dest_dir) == []
+
+    # Modified, stale and unexpected entries are fixed
+    dest_dir.joinpath("main.css").unlink()
+    dest_dir.joinpath("main.css").write_text("body { color: red }")
+    dest_dir.joinpath("stale.js").write_text("")
+    dest_dir.joinpath("stale").mkdir()
+    src_dir.joinpath("images", "logo.svg").unlink()
+    src_dir.joinpath("images", "logo.svg").write_text("<svg></svg>")
+
+    updated_files = __sync_directory__(src_dir, dest_dir)
+    assert sorted(updated_files) == [
+        dest_dir.joinpath("images", "logo.svg"),
+        dest_dir.joinpath("main.css"),
+    ]
+    assert sorted(x.name for x in dest_dir.iterdir()) == ["images", "main.css"]
+    assert dest_dir.joinpath("main.css").read_text() == "body {}"
+    assert dest_dir.joinpath("images", "logo.svg").read_text() == "<svg></svg>"
+
+
+def test_precompress_cache_without_hardlinks(tmp_path, monkeypatch):
+    from danoan.journal_manager.cli.commands import build as build_module
+
+    def failing_link(src, dst):
+        raise OSError("Hardlinks are not supported")
+
+    # The site files are copied from the cache, so all of them have a
+    # single link.
+    monkeypatch.setattr(build_module.os, "link", failing_link)
+
+    site_folder = tmp_path.joinpath("site")
+    site_folder.mkdir()
+    site_folder.joinpath("main.css").write_text("body {}" * 500)
+    site_folder.joinpath("main.js").write_text("console.log(1);" * 500)
+    cache_folder = tmp_path.joinpath("cache")
+
+    assert len(__precompress_directory__(site_folder, cache_folder)) == 2
+    cached_entries = sorted(cache_folder.iterdir())
+    assert len(cached_entries) > 2
+
+    # Up-to-date files keep their cache entries and are not compressed again
+    assert __precompress_directory__(site_folder, cache_folder) == []
+    assert sorted(cache_folder.iterdir()) == cached_entries
+
+    # Entries of removed files are deleted
+    site_folder.joinpath("main.js").unlink()
+    assert __precompress_directory__(site_folder, cache_folder) == []
+    assert len(list(cache_folder.iterdir())) < len(cached_entries)
+    site_folder.joinpath("main.js").write_text("console.log(1);" * 500)
+    assert __precompress_directory__(site_folder, cache_folder) == [
+        site_folder.joinpath("main.js")
+    ]
+    assert sorted(cache_folder.iterdir()) == cached_entries
+
+
+def test_node_modules_cache(tmp_path, monkeypatch):
+    npm_calls = []
+
+    def fake_run(args, cwd=None, **kwargs):
+        npm_calls.append(args)
+        Path(cwd).joinpath("node_modules", "express").mkdir(parents=True)
+        return subprocess.CompletedProcess(args, 0)
+
+    monkeypatch.setattr(node_wrapper.subprocess, "run", fake_run)
+
+    http_server_folder = tmp_path.joinpath("http-server")
+    http_server_folder.mkdir()
+    package_json = http_server_folder.joinpath("package.json")
+    package_json.write_text('{"dependencies": {"express": "^4.17.1"}}')
+    cache_folder = tmp_path.joinpath("cache")
+
+    node_wrapper.install_dependencies(http_server_folder, cache_folder)
+    node_modules = http_server_folder.joinpath("node_modules")
+    assert npm_calls == [["npm", "install"]]
+    assert node_modules.is_symlink()
+    assert node_modules.joinpath("express").is_dir()
+
+    # Repeated and fresh installations reuse the cache
+    node_wrapper.install_dependencies(http_server_folder, cache_folder)
+    other_folder = tmp_path.joinpath("other-http-server")
+    other_folder.mkdir()
+    other_folder.joinpath("package.json").write_text(package_json.read_text())
+    node_wrapper.install_dependencies(other_folder, cache_folder)
+    assert len(npm_calls) == 1
+    assert other_folder.joinpath("node_modules").resolve() == (
+        node_modules.resolve()
+    )
+
+    # A lockfile changes the cache key and is installed with npm ci
+    http_server_folder.joinpath("package-lock.json").write_text("{}")
+    node_wrapper.install_dependencies(http_server_folder, cache_folder)
+    assert npm_calls[1:] == [["npm", "ci", "--offline"]]
+    assert (
+        node_modules.resolve()
+        != other_folder.joinpath("node_modules").resolve()
+    )
+
+
+def test_node_http_server_backend(
+    f_set_env_variable, f_setup_init, tmp_path, monkeypatch
+):
+    installed_folders = []
+    monkeypatch.setattr(
+        node_wrapper,
+        "install_dependencies",
+        lambda location, cache_folder=None: installed_folders.append(
+            (location, cache_folder)
+        ),
+    )
+
+    build_instructions = model.BuildInstructions(
+        build_location=tmp_path.as_posix(),
+        with_http_server=True,
+        http_server_backend="node",
+    )
+    build_step = BuildHttpServer(
+        build_instructions=build_instructions,
+        journals_site_folder=tmp_path.joinpath("site"),
+    ).build()
+
+    http_server_folder = tmp_path.joinpath("http-server")
+    assert not isinstance(build_step, FailedStep)
+    assert http_server_folder.joinpath("package.json").exists()
+    assert http_server_folder.joinpath("init.js").exists()
+    # The cache folder follows the current configuration folder
+    assert installed_folders == [
+        (
+            http_server_folder,
+            api.get_configuration_folder().joinpath("cache", "node_modules"),
+        )
+    ]
+
+
+class TestBuildGraph:
+    def create_step(self, name, inputs, outputs, events, wait_for=None):
+        def build(self, **kwargs):
+            events[name].set()
+            if wait_for is not None:
+                # Only succeeds if the steps run concurrently
+                assert events[wait_for].wait(timeout=5)
+            for output in outputs:
+                self.__dict__[output] = f"{name}-{output}"
+            return self
+
+        events[name] = threading.Event()
+        return type(
+            name,
+            (BuildStep,),
+            {"inputs": inputs, "outputs": outputs, "build": build},
+        )
+
+    def test_independent_steps_run_concurrently(self):
+        events: Dict[str, threading.Event] = {}
+        first = self.create_step("First", (), ("a",), events, "Second")
+        second = self.create_step("Second", (), ("b",), events, "First")
+        third = self.create_step("Third", ("a", "b"), ("c",), events)
+
+        build_result = BuildGraph([third, first, second]).run()
+        assert not isinstance(build_result, FailedStep)
+        assert build_result["c"] == "Third-c"
+        assert build_result["a"] == "First-a"
+
+    def test_failure_skips_dependent_steps(self):
+        events: Dict[str, threading.Event] = {}
+
+        class Failing(BuildStep):
+            outputs = ("a",)
+
+            def build(self, **kwargs):
+                raise RuntimeError("failing step")
+
+        dependent = self.create_step("Dependent", ("a",), ("b",), events)
+        independent = self.create_step("Independent", (), ("c",), events)
+
+        build_result = BuildGraph([Failing, dependent, independent]).run()
+        assert isinstance(build_result, FailedStep)
+        assert build_result.msg == "failing step"
+        assert not events["Dependent"].is_set()
+        assert build_result.build_step["c"] == "Independent-c"
+
+    def test_invalid_graphs(self):
+        events: Dict[str, threading.Event] = {}
+        first = self.create_step("First", ("b",), ("a",), events)
+        second = self.create_step("Second", ("a",), ("b",), events)
+        with pytest.raises(exceptions.InvalidAttribute):
+            BuildGraph([first, second])
+
+        third = self.create_step("Third", (), ("a",), events)
+        with pytest.raises(exceptions.InvalidAttribute):
+            BuildGraph([first, third])
+
+        with pytest.raises(exceptions.InvalidAttribute):
+            BuildGraph([first]).run()
+
+    @pytest.mark.usefixtures("f_set_env_variable")
+    def test_register_build_step(self, f_setup_init, tmp_path, monkeypatch):
+        from danoan.journal_manager.cli.commands import build as build_module
+
+        monkeypatch.setattr(
+            build_module, "__registered_build_steps__", [], raising=True
+        )
+
+        @register_build_step
+        class CountJournals(BuildStep):
+            inputs = ("journal_data",)
+            outputs = ("number_of_journals",)
+
+            def build(self, **kwargs):
+                self.number_of_journals = len(self["journal_data"]["journals"])
+                return self
+
+        assert get_build_steps()[-1] is CountJournals
+
+        jm.create.create("journal-1", tmp_path)
+        build_location = tmp_path.joinpath("build")
+        build_location.mkdir()
+        build_result = build_journal(
+            __merge_build_instructions__(build_location.as_posix())
+        )
+        assert build_result["number_of_journals"] == 1
@@ -0,0 +1,133 @@
+from danoan.journal_manager.cli.commands import daemon, watch
+from danoan.journal_manager.cli.commands.build import (
+    FailedStep,
+    __build_with_daemon__,
+    __merge_build_instructions__,
+)
+import danoan.journal_manager.cli.commands.journal_commands as jm
+
+from danoan.journal_manager.core import exceptions
+
+from conftest import *
+
+import logging
+import threading
+import pytest
+
+
+@pytest.fixture
+def f_daemon(f_setup_init, request):
+    socket_filepath = daemon.get_socket_filepath()
+    max_workers = getattr(request, "param", 1)
+    server = daemon.BuildDaemon(socket_filepath, max_workers)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+
+    yield socket_filepath
+
+    daemon.stop(socket_filepath)
+    thread.join()
+    server.server_close()
+    assert not socket_filepath.exists()
+
+
+@pytest.mark.usefixtures("f_set_env_variable")
+class TestDaemon:
+    def create_mock_journals(self, base_path):
+        jm.create.create("journal-1", base_path)
+        jm.create.create("journal-2", base_path)
+
+    @pytest.mark.parametrize("f_daemon", [1, 2], indirect=True)
+    def test_build_with_daemon(self, f_setup_init, tmp_path, f_daemon):
+        self.create_mock_journals(tmp_path)
+        build_location = tmp_path.joinpath("build")
+        build_location.mkdir()
+
+        build_instructions = __merge_build_instructions__(build_location)
+        response = daemon.request_build(build_instructions, f_daemon)
+
+        assert response["status"] == "ok"
+        assert response["failed_journals"] == {}
+        assert build_location.joinpath("site", "index.html").exists()
+        for journal_name in ["journal-1", "journal-2"]:
+            assert build_location.joinpath(
+                "site", journal_name, "index.html"
+            ).exists()
+
+    def test_build_error_is_reported(self, f_setup_init, tmp_path, f_daemon):
+        build_location = tmp_path.joinpath("build")
+        build_location.mkdir()
+
+        build_instructions = __merge_build_instructions__(
+            build_location,
+            journals_names_to_build=["unknown-journal"],
+        )
+        response = daemon.request_build(build_instructions, f_daemon)
+        assert response["status"] == "error"
+
+    def test_daemon_not_running(self, f_setup_init, tmp_path):
+        with pytest.raises(exceptions.DaemonNotRunning):
+            daemon.request_build(
+                __merge_build_instructions__(tmp_path),
+                tmp_path.joinpath("daemon.sock"),
+            )
+
+    def test_daemon_already_running(self, f_setup_init, f_daemon):
+        with pytest.raises(exceptions.DaemonAlreadyRunning):
+            daemon.BuildDaemon(f_daemon)
+
+    def test_stale_socket_is_replaced(self, f_setup_init, tmp_path):
+        socket_filepath = tmp_path.joinpath("daemon.sock")
+        socket_filepath.touch()
+
+        server = daemon.BuildDaemon(socket_filepath)
+        server.server_close()
+        assert not socket_filepath.exists()
+
+    @pytest.mark.parametrize("start_daemon", [True, False])
+    def test_build_cli_via_daemon(
+        self, f_setup_init, tmp_path, request, start_daemon
+    ):
+        self.create_mock_journals(tmp_path)
+        build_location = tmp_path.joinpath("build")
+        build_location.mkdir()
+
+        if start_daemon:
+            request.getfixturevalue("f_daemon")
+
+        # Falls back to a local build if the daemon is not running
+        build_result = __build_with_daemon__(
+            __merge_build_instructions__(build_location)
+        )
+        assert not isinstance(build_result, FailedStep)
+        assert build_result["failed_journals"] == {}
+        assert build_location.joinpath(
+            "site", "journal-1", "index.html"
+        ).exists()
+
+    def test_watch_rebuild_via_daemon(
+        self, f_setup_init, tmp_path, f_daemon, monkeypatch, caplog
+    ):
+        self.create_mock_journals(tmp_path)
+        build_location = tmp_path.joinpath("build")
+        build_location.mkdir()
+
+        build_instructions = __merge_build_instructions__(build_location)
+        watch.__rebuild_journals__(
+            build_instructions, ["journal-1"], via_daemon=True
+        )
+        assert build_location.joinpath(
+            "site", "journal-1", "index.html"
+        ).exists()
+
+        # A failing request is logged and does not stop the watcher
+        def failing_request(*args, **kwargs):
+            raise ConnectionResetError("connection reset")
+
+        monkeypatch.setattr(daemon, "request_build", failing_request)
+        with caplog.at_level(logging.ERROR, logger="danoan.journal_manager"):
+            watch.__rebuild_journals__(
+                build_instructions, ["journal-2"], via_daemon=True
+            )
+        assert "connection reset" in caplog.text
+        assert not build_location.joinpath("site", "journal-2").exists()
@@ -0,0 +1,175 @@
+from danoan.journal_manager.core.http_server import StaticFileServer
+
+import asyncio
+import gzip
+import http.client
+import os
+import threading
+import pytest
+
+
+@pytest.fixture
+def f_http_server(tmp_path):
+    root = tmp_path.joinpath("site")
+    root.joinpath("journal-1").mkdir(parents=True)
+    root.joinpath("journal-1", "index.html").write_text("<h1>Journal 1</h1>")
+    root.joinpath("app.js").write_text("console.log('journal');" * 100)
+    tmp_path.joinpath("secret.txt").write_text("secret")
+
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(
+        StaticFileServer(root).start("127.0.0.1", 0)
+    )
+    thread = threading.Thread(target=loop.run_forever)
+    thread.start()
+
+    port = server.sockets[0].getsockname()[1]
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    yield root, connection
+
+    async def shutdown():
+        server.close()
+        tasks = asyncio.all_tasks() - {asyncio.current_task()}
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    connection.close()
+    asyncio.run_coroutine_threadsafe(shutdown(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+
+def request(connection, method, url, headers={}):
+    connection.request(method, url, headers=headers)
+    response = connection.getresponse()
+    return response, response.read()
+
+
+class TestStaticFileServer:
+    def test_get_and_head(self, f_http_server):
+        root, connection = f_http_server
+
+        # Requests share the same connection
+        response, body = request(connection, "GET", "/journal-1/")
+        assert response.status == 200
+        assert body == b"<h1>Journal 1</h1>"
+        assert response.getheader("Content-Type") == "text/html; charset=utf-8"
+        assert response.getheader("ETag") is not None
+
+        response, body = request(connection, "HEAD", "/app.js")
+        assert response.status == 200
+        assert body == b""
+        assert int(response.getheader("Content-Length")) == (
+            root.joinpath("app.js").stat().st_size
+        )
+
+        response, _ = request(connection, "GET", "/journal-1?x=1")
+        assert response.status == 301
+        assert response.getheader("Location") == "/journal-1/?x=1"
+
+        response, _ = request(connection, "GET", "/missing.html")
+        assert response.status == 404
+
+        response, _ = request(connection, "GET", "/../secret.txt")
+        assert response.status == 403
+
+        response, _ = request(connection, "GET", "/%2e%2e/secret.txt")
+        assert response.status == 403
+
+    def test_conditional_get(self, f_http_server):
+        root, connection = f_http_server
+
+        response, _ = request(connection, "GET", "/app.js")
+        etag = response.getheader("ETag")
+        last_modified = response.getheader("Last-Modified")
+
+        response, body = request(
+            connection, "GET", "/app.js", {"If-None-Match": etag}
+        )
+        assert response.status == 304
+        assert body == b""
+
+        response, _ = request(
+            connection, "GET", "/app.js", {"If-Modified-Since": last_modified}
+        )
+        assert response.status == 304
+
+        mtime = root.joinpath("app.js").stat().st_mtime
+        os.utime(root.joinpath("app.js"), (mtime + 10, mtime + 10))
+        response, _ = request(
+            connection, "GET", "/app.js", {"If-None-Match": etag}
+        )
+        assert response.status == 200
+        assert response.getheader("ETag") != etag
+
+    def test_range(self, f_http_server):
+        root, connection = f_http_server
+        content = root.joinpath("app.js").read_bytes()
+
+        response, body = request(
+            connection, "GET", "/app.js", {"Range": "bytes=10-19"}
+        )
+        assert response.status == 206
+        assert body == content[10:20]
+        assert response.getheader("Content-Range") == (
+            f"bytes 10-19/{len(content)}"
+        )
+
+        response, body = request(
+            connection, "GET", "/app.js", {"Range": "bytes=-5"}
+        )
+        assert response.status == 206
+        assert body == content[-5:]
+
+        response, _ = request(
+            connection, "GET", "/app.js", {"Range": f"bytes={len(content)}-"}
+        )
+        assert response.status == 416
+        assert response.getheader("Content-Range") == f"bytes */{len(content)}"
+
+        # Outdated If-Range returns the whole file
+        response, body = request(
+            connection,
+            "GET",
+            "/app.js",
+            {"Range": "bytes=0-1", "If-Range": '"outdated"'},
+        )
+        assert response.status == 200
+        assert body == content
+
+    def test_precompressed_variant(self, f_http_server):
+        root, connection = f_http_server
+        content = root.joinpath("app.js").read_bytes()
+        root.joinpath("app.js.gz").write_bytes(gzip.compress(content))
+
+        response, body = request(
+            connection, "GET", "/app.js", {"Accept-Encoding": "br, gzip"}
+        )
+        assert response.status == 200
+        assert response.getheader("Content-Encoding") == "gzip"
+        assert "javascript" in response.getheader("Content-Type")
+        assert gzip.decompress(body) == content
+
+        response, body = request(
+            connection, "GET", "/app.js", {"Accept-Encoding": "gzip;q=0"}
+        )
+        assert response.getheader("Content-Encoding") is None
+        assert body == content
+
+        # Variants older than the file are not sent
+        mtime = root.joinpath("app.js.gz").stat().st_mtime
+        os.utime(root.joinpath("app.js"), (mtime + 10, mtime + 10))
+        response, body = request(
+            connection, "GET", "/app.js", {"Accept-Encoding": "gzip"}
+        )
+        assert response.getheader("Content-Encoding") is None
+        assert body == content
+
+    def test_method_not_allowed(self, f_http_server):
+        _, connection = f_http_server
+
+        response, _ = request(connection, "POST", "/app.js")
+        assert response.status == 405
+        assert response.getheader("Allow") == "GET, HEAD"
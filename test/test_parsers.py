@@ -1,6 +1,7 @@
 from danoan.journal_manager.core import api
 
-from danoan.journal_manager.cli.commands import build
+from danoan.journal_manager.cli import cli
+from danoan.journal_manager.cli.commands import build, daemon, search, watch
 from danoan.journal_manager.cli.commands import journal_commands as jm
 from danoan.journal_manager.cli.commands import setup_commands as setup
 from danoan.journal_manager.cli.commands import template_commands as template
@@ -16,6 +17,8 @@ from danoan.journal_manager.cli.commands.template import (
 import argparse
 from conftest import *
 import pytest
+import subprocess
+import sys
 
 
 @pytest.fixture(scope="function")
@@ -84,6 +87,21 @@ class TestBuildParser(TestParser):
         self.parser_tester(build.get_parser)
 
 
+class TestDaemonParser(TestParser):
+    def test_daemon_parser(self, f_setup_init):
+        self.parser_tester(daemon.get_parser)
+
+
+class TestSearchParser(TestParser):
+    def test_search_parser(self, f_setup_init):
+        self.parser_tester(search.get_parser)
+
+
+class TestWatchParser(TestParser):
+    def test_watch_parser(self, f_setup_init):
+        self.parser_tester(watch.get_parser)
+
+
 class TestSetupParser(TestParser):
     def test_setup_parser(self):
         self.parser_tester(setup_parser)
@@ -91,6 +109,9 @@ class TestSetupParser(TestParser):
     def test_init_parser(self):
         self.parser_tester(setup.init.get_parser)
 
+    def test_migrate_registry_parser(self):
+        self.parser_tester(setup.migrate_registry.get_parser)
+
 
 class TestTemplateParser(TestParser):
     def test_template_parser(self):
@@ -104,3 +125,69 @@ class TestTemplateParser(TestParser):
 
     def test_show_parser(self):
         self.parser_tester(template.show.get_parser)
+
+
+@pytest.mark.usefixtures("f_setup_init")
+class TestLazyCommands:
+    def choices(self, get_parser_function, argv):
+        parser = get_parser_function(
+            argparse.ArgumentParser().add_subparsers(), argv
+        )
+        subparser_action = next(
+            x
+            for x in parser._actions
+            if isinstance(x, argparse._SubParsersAction)
+        )
+        return [
+            (x.dest, x.metavar, " ".join((x.help or "").split()))
+            for x in subparser_action._choices_actions
+        ]
+
+    @pytest.mark.parametrize(
+        "get_parser_function", [journal_parser, setup_parser, template_parser]
+    )
+    def test_metadata_matches_command_parsers(self, get_parser_function):
+        assert self.choices(get_parser_function, []) == self.choices(
+            get_parser_function, None
+        )
+
+    def test_cli_metadata_matches_command_parsers(self):
+        def get_parser_function(subparser_action, argv):
+            return cli.get_parser(argv)
+
+        assert self.choices(get_parser_function, []) == self.choices(
+            get_parser_function, None
+        )
+
+    @pytest.mark.parametrize(
+        "argv", [["--help"], ["journal", "show", "--help"], ["j", "--help"]]
+    )
+    def test_trivial_commands_do_not_import_heavy_modules(self, argv):
+        script = (
+            "import sys;"
+            "from danoan.journal_manager.cli import cli;"
+            f"cli.get_parser({argv!r});"
+            "print(' '.join(sys.modules))"
+        )
+        modules = subprocess.run(
+            [sys.executable, "-c", script],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.split()
+
+        for module in [
+            "asyncio",
+            "jinja2",
+            "mkdocs",
+            "watchdog",
+            "danoan.journal_manager.cli.commands.build",
+        ]:
+            assert module not in modules
+
+    def test_dispatched_command_is_parsed(self):
+        args = cli.get_parser(["j", "s", "journal-1"]).parse_args(
+            ["j", "s", "journal-1"]
+        )
+        assert args.journal_name == "journal-1"
+        assert args.func.__module__.endswith("journal_commands.show")
@@ -0,0 +1,113 @@
+from danoan.journal_manager.cli.commands import build, search
+import danoan.journal_manager.cli.commands.journal_commands as jm
+
+from conftest import *
+
+import pytest
+
+
+@pytest.mark.usefixtures("f_set_env_variable")
+class TestSearch:
+    def create_mock_journals(self, base_path):
+        jm.create.create("physics", base_path)
+        jm.create.create("cooking", base_path)
+
+        physics_docs = base_path.joinpath("physics", "docs")
+        physics_docs.joinpath("quaternions.md").write_text(
+            "# Quaternions\n\nRotations in three dimensions."
+        )
+        physics_docs.joinpath("notes").mkdir()
+        physics_docs.joinpath("notes", "rotations.md").write_text(
+            "# Rigid bodies\n\nQuaternions avoid gimbal lock in rotations."
+        )
+        base_path.joinpath("cooking", "docs", "bread.md").write_text(
+            "# Bread\n\nThe dough rotates in the mixer."
+        )
+
+    def test_search(self, f_setup_init, tmp_path):
+        self.create_mock_journals(tmp_path)
+
+        results = search.search("quaternions")
+        assert [x.title for x in results] == ["Quaternions", "Rigid bodies"]
+        assert results[0].journal == "physics"
+        assert (
+            results[0].path
+            == tmp_path.joinpath("physics", "docs", "quaternions.md").as_posix()
+        )
+        assert "[gimbal]" in search.search("gimbal")[0].snippet
+
+        results = search.search("rotat*", journals_names=["cooking"])
+        assert [x.title for x in results] == ["Bread"]
+
+        # Invalid FTS5 syntax is searched literally
+        assert [x.title for x in search.search('gimbal "lock')] == [
+            "Rigid bodies"
+        ]
+        assert search.search(" ") == []
+
+    def test_incremental_update(self, f_setup_init, tmp_path):
+        self.create_mock_journals(tmp_path)
+
+        assert search.update_index() == {
+            "added": 5,
+            "updated": 0,
+            "removed": 0,
+        }
+        assert search.update_index() == {
+            "added": 0,
+            "updated": 0,
+            "removed": 0,
+        }
+
+        tmp_path.joinpath("cooking", "docs", "bread.md").write_text(
+            "# Sourdough\n\nA long fermentation."
+        )
+        tmp_path.joinpath("physics", "docs", "notes", "rotations.md").unlink()
+        tmp_path.joinpath("physics", "docs", "spin.md").write_text("# Spin")
+        assert search.update_index() == {
+            "added": 1,
+            "updated": 1,
+            "removed": 1,
+        }
+        assert [x.title for x in search.search("fermentation")] == ["Sourdough"]
+        assert search.search("dough") == []
+
+        # Searches use the index as it is unless an update is requested
+        tmp_path.joinpath("physics", "docs", "spin.md").write_text(
+            "# Spin\n\nAngular momentum."
+        )
+        assert search.search("angular") == []
+        assert len(search.search("angular", update=True)) == 1
+
+    def test_build_updates_index(self, f_setup_init, tmp_path):
+        self.create_mock_journals(tmp_path)
+        assert len(search.search("bread")) == 1
+
+        tmp_path.joinpath("cooking", "docs", "bread.md").write_text(
+            "# Sourdough\n\nA long fermentation."
+        )
+        build_location = tmp_path.joinpath("build")
+        build_location.mkdir()
+        build.build(
+            build.__merge_build_instructions__(
+                build_location, journals_names_to_build=["cooking"]
+            )
+        )
+        assert [x.title for x in search.search("fermentation")] == ["Sourdough"]
+
+    def test_inactive_journals(self, f_setup_init, tmp_path):
+        self.create_mock_journals(tmp_path)
+        assert len(search.search("bread")) == 1
+
+        # Inactive journals stay indexed and are filtered by the query
+        jm.deactivate.deactivate(["cooking"])
+        assert search.update_index() == {
+            "added": 0,
+            "updated": 0,
+            "removed": 0,
+        }
+        assert search.search("bread") == []
+        assert len(search.search("bread", include_inactive=True)) == 1
+
+        jm.activate.activate(["cooking"])
+        assert len(search.search("bread")) == 1
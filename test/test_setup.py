@@ -1,6 +1,11 @@
-from danoan.journal_manager.cli.commands.setup_commands import init
+from danoan.journal_manager.cli.commands import journal_commands as jm
+from danoan.journal_manager.cli.commands import setup
+from danoan.journal_manager.cli.commands.setup_commands import (
+    init,
+    migrate_registry,
+)
 
-from danoan.journal_manager.core import api, exceptions
+from danoan.journal_manager.core import api, backends, exceptions, model
 
 from conftest import *
 from pathlib import Path
@@ -99,3 +104,122 @@ class TestInit:
             config_file.default_template_folder
             == second_default_template_folder.as_posix()
         )
+
+
+class TestMigrateRegistry:
+    def test_migrate_to_sqlite_and_back(self, f_setup_init, tmp_path):
+        for i in range(3):
+            location_folder = tmp_path.joinpath(f"journal-{i}")
+            location_folder.mkdir()
+            jm.register.register(location_folder, f"Journal {i}")
+
+        sqlite_filepath = migrate_registry.migrate_registry(
+            backends.SQLITE_BACKEND
+        )
+
+        config_file = api.get_configuration_file()
+        assert config_file.journal_data_backend == backends.SQLITE_BACKEND
+        assert config_file.journal_data_filepath == sqlite_filepath.as_posix()
+        assert [
+            x.name for x in api.get_journal_data_file().list_of_journal_data
+        ] == ["journal-0", "journal-1", "journal-2"]
+
+        # Row-level operations on the sqlite backend
+        jm.deregister.deregister(["journal-1"])
+        jm.deactivate.deactivate(["journal-2"])
+        location_folder = tmp_path.joinpath("journal-3")
+        location_folder.mkdir()
+        jm.register.register(location_folder, "Journal 3")
+
+        journal_data_file = api.get_journal_data_file()
+        assert [x.name for x in journal_data_file.list_of_journal_data] == [
+            "journal-0",
+            "journal-2",
+            "journal-3",
+        ]
+        journal_2 = api.find_journal_by_name(journal_data_file, "journal-2")
+        assert journal_2 and journal_2.active == False
+
+        toml_filepath = tmp_path.joinpath("registry.toml")
+        migrate_registry.migrate_registry(backends.TOML_BACKEND, toml_filepath)
+
+        config_file = api.get_configuration_file()
+        assert config_file.journal_data_backend == backends.TOML_BACKEND
+        assert (
+            model.JournalDataList.read(toml_filepath)
+            == api.get_journal_data_file()
+        )
+        assert api.get_journal_data_file() == journal_data_file
+
+    def test_sqlite_row_operations_do_not_load_the_register(
+        self, f_setup_init, tmp_path, monkeypatch
+    ):
+        for i in range(3):
+            location_folder = tmp_path.joinpath(f"journal-{i}")
+            location_folder.mkdir()
+            jm.register.register(location_folder, f"Journal {i}")
+
+        migrate_registry.migrate_registry(backends.SQLITE_BACKEND)
+
+        def load_register():
+            raise AssertionError("The register should not be loaded.")
+
+        get_journal_data_file = api.get_journal_data_file
+        edited_files = []
+        monkeypatch.setattr(api, "get_journal_data_file", load_register)
+        monkeypatch.setattr(
+            jm.edit.nvim_wrapper,
+            "edit_file",
+            lambda filepath, *args: edited_files.append(filepath),
+        )
+
+        jm.deactivate.deactivate(["journal-0", "journal-2"])
+        jm.activate.activate(["journal-2"])
+        jm.deregister.deregister(["journal-1"])
+        jm.edit.edit("journal-2")
+        with pytest.raises(exceptions.InvalidName):
+            jm.edit.edit("journal-1")
+
+        location_folder = tmp_path.joinpath("journal-3")
+        location_folder.mkdir()
+        jm.register.register(location_folder, "Journal 3")
+        with pytest.raises(exceptions.InvalidName):
+            jm.register.register(location_folder, "Journal 3")
+
+        monkeypatch.setattr(api, "get_journal_data_file", get_journal_data_file)
+        assert edited_files == [
+            tmp_path.joinpath("journal-2", "mkdocs.yml").expanduser()
+        ]
+
+        journal_data_file = api.get_journal_data_file()
+        assert [
+            (x.name, x.active) for x in journal_data_file.list_of_journal_data
+        ] == [("journal-0", False), ("journal-2", True), ("journal-3", True)]
+        journal_2 = api.find_journal_by_name(journal_data_file, "journal-2")
+        assert journal_2 and journal_2.last_edit_date
+
+    def test_sqlite_register_is_not_edited_as_text(self, f_setup_init, capsys):
+        migrate_registry.migrate_registry(backends.SQLITE_BACKEND)
+
+        args = setup.get_parser().parse_args(["--journal"])
+        with pytest.raises(SystemExit) as e:
+            args.func(**vars(args))
+
+        assert e.value.code == 1
+        assert "toml" in capsys.readouterr().out
+
+    def test_migrate_to_current_backend(self, f_setup_init):
+        with pytest.raises(exceptions.InvalidAttribute):
+            migrate_registry.migrate_registry(backends.TOML_BACKEND)
+
+    def test_migrate_to_existing_file(self, f_setup_init, tmp_path):
+        existing_filepath = tmp_path.joinpath("registry.sqlite")
+        existing_filepath.touch()
+        with pytest.raises(exceptions.InvalidLocation):
+            migrate_registry.migrate_registry(
+                backends.SQLITE_BACKEND, existing_filepath
+            )
+        assert (
+            api.get_configuration_file().journal_data_backend
+            == backends.TOML_BACKEND
+        )
@@ -0,0 +1,211 @@
+from danoan.journal_manager.cli.commands import watch
+from danoan.journal_manager.cli.commands.build import (
+    __merge_build_instructions__,
+)
+import danoan.journal_manager.cli.commands.journal_commands as jm
+
+from danoan.journal_manager.core import api, model
+
+from conftest import *
+
+import json
+from pathlib import Path
+import threading
+import time
+from typing import List, Set
+import pytest
+from watchdog.events import FileModifiedEvent, FileMovedEvent
+
+
+def wait_for(condition, timeout: float = 30):
+    start = time.monotonic()
+    while time.monotonic() - start < timeout:
+        if condition():
+            return True
+        time.sleep(0.1)
+    return False
+
+
+@pytest.fixture
+def journal_data_list():
+    return model.JournalDataList(
+        [
+            model.JournalData("nlp", "/home/user/journals/nlp", True, "", ""),
+            model.JournalData(
+                "nlp-archive", "/home/user/journals/nlp-archive", True, "", ""
+            ),
+        ]
+    )
+
+
+class TestJournalEventHandler:
+    def collect_events(self, journal_data_list, events, ignored_folders=()):
+        modified: List[str] = []
+        handler = watch.JournalEventHandler(
+            journal_data_list, modified.append, ignored_folders
+        )
+        for event in events:
+            handler.dispatch(event)
+        return modified
+
+    def test_map_event_to_journal(self, journal_data_list):
+        modified = self.collect_events(
+            journal_data_list,
+            [
+                FileModifiedEvent("/home/user/journals/nlp/docs/a/index.md"),
+                FileModifiedEvent("/home/user/journals/nlp-archive/mkdocs.yml"),
+                FileModifiedEvent("/home/user/journals/unknown/mkdocs.yml"),
+                FileModifiedEvent("/home/user/journals/nlp/.git/index"),
+            ],
+        )
+        assert modified == ["nlp", "nlp-archive"]
+
+    def test_moved_event_notifies_both_journals(self, journal_data_list):
+        modified = self.collect_events(
+            journal_data_list,
+            [
+                FileMovedEvent(
+                    "/home/user/journals/nlp/docs/index.md",
+                    "/home/user/journals/nlp-archive/docs/index.md",
+                )
+            ],
+        )
+        assert modified == ["nlp", "nlp-archive"]
+
+    def test_ignored_folders(self, journal_data_list):
+        modified = self.collect_events(
+            journal_data_list,
+            [FileModifiedEvent("/home/user/journals/nlp/site/index.html")],
+            [Path("/home/user/journals/nlp/site")],
+        )
+        assert modified == []
+
+
+class TestRebuildQueue:
+    def test_coalesce_requests(self):
+        rebuild_queue = watch.RebuildQueue(debounce_window=0)
+        for _ in range(200):
+            rebuild_queue.put("nlp")
+        rebuild_queue.put("theater")
+
+        assert rebuild_queue.get(timeout=1) == ["nlp", "theater"]
+        assert rebuild_queue.get(timeout=0.1) == []
+
+    def test_debounce_window(self):
+        rebuild_queue = watch.RebuildQueue(debounce_window=0.5)
+        rebuild_queue.put("nlp")
+        time.sleep(0.2)
+        rebuild_queue.put("nlp")
+
+        # The window started again with the second request
+        assert rebuild_queue.get(timeout=0.2) == []
+        assert rebuild_queue.get(timeout=1) == ["nlp"]
+
+    def test_single_follow_up_build(self):
+        rebuild_queue = watch.RebuildQueue(debounce_window=0)
+        rebuild_queue.put("nlp")
+        assert rebuild_queue.get(timeout=1) == ["nlp"]
+
+        # Changes received while nlp is being built
+        rebuild_queue.put("nlp")
+        rebuild_queue.put("nlp")
+        assert rebuild_queue.get(timeout=0.1) == []
+        assert rebuild_queue.pending() == ["nlp"]
+
+        rebuild_queue.task_done(["nlp"])
+        assert rebuild_queue.get(timeout=1) == ["nlp"]
+        rebuild_queue.task_done(["nlp"])
+        assert rebuild_queue.get(timeout=0.1) == []
+
+    def test_no_concurrent_builds_of_the_same_journal(self):
+        rebuild_queue = watch.RebuildQueue(debounce_window=0.01)
+        lock = threading.Lock()
+        building: Set[str] = set()
+        built = []
+        errors = []
+
+        def consumer(stop_event):
+            while not stop_event.is_set():
+                names = rebuild_queue.get(timeout=0.05)
+                with lock:
+                    if building.intersection(names):
+                        errors.append(names)
+                    building.update(names)
+                time.sleep(0.02)
+                with lock:
+                    building.difference_update(names)
+                    built.extend(names)
+                rebuild_queue.task_done(names)
+
+        stop_event = threading.Event()
+        consumers = [
+            threading.Thread(target=consumer, args=[stop_event])
+            for _ in range(4)
+        ]
+        for thread in consumers:
+            thread.start()
+
+        for i in range(300):
+            rebuild_queue.put(f"journal-{i % 3}")
+            time.sleep(0.001)
+
+        assert wait_for(lambda: len(rebuild_queue.pending()) == 0)
+        time.sleep(0.1)
+        stop_event.set()
+        for thread in consumers:
+            thread.join()
+
+        assert errors == []
+        assert set(built) == {"journal-0", "journal-1", "journal-2"}
+        assert len(built) < 300
+
+
+@pytest.mark.usefixtures("f_set_env_variable")
+class TestWatch:
+    @pytest.mark.parametrize("use_polling", [False, True])
+    def test_rebuild_modified_journal(
+        self, f_setup_init, tmp_path, use_polling
+    ):
+        jm.create.create("journal-1", tmp_path)
+        jm.create.create("journal-2", tmp_path)
+        build_location = tmp_path.joinpath("build")
+        build_location.mkdir()
+
+        site_folder = build_location.joinpath("site")
+        stop_event = threading.Event()
+        trace_filepath = tmp_path.joinpath("trace.json")
+        watcher = threading.Thread(
+            target=watch.watch,
+            args=[
+                __merge_build_instructions__(build_location.as_posix()),
+                use_polling,
+                0.2,
+                stop_event,
+                0.1,
+            ],
+            kwargs={"trace_filepath": trace_filepath},
+        )
+        watcher.start()
+        try:
+            # Let the observer take its initial snapshot
+            time.sleep(0.5)
+
+            # Folders created after the watcher started are also watched
+            new_folder = tmp_path.joinpath("journal-1", "docs", "new")
+            new_folder.mkdir()
+            time.sleep(0.5)
+            new_folder.joinpath("page.md").write_text("# New page")
+
+            assert wait_for(
+                lambda: site_folder.joinpath(
+                    "journal-1", "new", "page", "index.html"
+                ).exists()
+            )
+            assert not site_folder.joinpath("journal-2").exists()
+        finally:
+            stop_event.set()
+            watcher.join()
+
+        assert not watcher.is_alive()
+        trace = json.loads(trace_filepath.read_text())
+        assert "journal-1" in [x["name"] for x in trace["traceEvents"]]